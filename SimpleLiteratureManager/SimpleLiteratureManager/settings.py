@@ -43,6 +43,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Inactive unless REQUEST_METRICS is enabled, see below
+    'library.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,7 +58,8 @@ ROOT_URLCONF = 'SimpleLiteratureManager.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates with render timing for the request metrics
+        'BACKEND': 'library.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'library', 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -74,16 +77,107 @@ TEMPLATES = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploaded PDFs are stored by content hash in sharded directories below
+# MEDIA_ROOT/pdfs (see library.storage); move older uploads with
+# `python manage.py migrate_pdf_storage`
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'pdfs': {'BACKEND': 'library.storage.ContentAddressedStorage'},
+}
+
+# PDFs are delivered by library.views.publication_pdf (byte ranges, ETags). Behind
+# nginx, set this to an internal location aliasing MEDIA_ROOT, e.g.
+#   location /protected-media/ { internal; alias /srv/literature/media/; }
+# and nginx sends the file itself.
+PDF_ACCEL_REDIRECT_PREFIX = os.environ.get('PDF_ACCEL_REDIRECT_PREFIX', '')
+
+# Crossref REST endpoint for DOI lookups; the DOI is appended to this URL
+CROSSREF_API_URL = os.environ.get('CROSSREF_API_URL', 'https://api.crossref.org/works/')
+
+# Seconds a cached Crossref response is used without revalidation; unknown DOIs
+# (404) are remembered for DOI_CACHE_NEGATIVE_TTL seconds
+DOI_CACHE_TTL = int(os.environ.get('DOI_CACHE_TTL', 30 * 24 * 60 * 60))
+DOI_CACHE_NEGATIVE_TTL = int(os.environ.get('DOI_CACHE_NEGATIVE_TTL', 24 * 60 * 60))
+
+# Worker processes for extracting the text of uploaded PDFs (0 = inline after commit)
+PDF_TEXT_WORKERS = int(os.environ.get('PDF_TEXT_WORKERS', 2))
+
+# Linearize (web-optimize) uploaded PDFs in the same worker pool so pdf.js can
+# render the first page before the rest of the file arrives; requires pikepdf
+PDF_LINEARIZE = os.environ.get('PDF_LINEARIZE', '') == '1'
+
+# Cache for rendered BibLaTeX entries (keyed by publication version); use a shared
+# backend such as Redis when several worker processes serve the app
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 50000))},
+    }
+}
+BIBLATEX_CACHE_TIMEOUT = int(os.environ.get('BIBLATEX_CACHE_TIMEOUT', 7 * 24 * 60 * 60))
+
+# Serve publication counts in the project, tag and journal lists from the
+# denormalized columns instead of counting on every request
+PUBLICATION_COUNT_COLUMNS = os.environ.get('PUBLICATION_COUNT_COLUMNS', '') == '1'
+
+# Request instrumentation (library.instrumentation): query count, DB and template
+# time and the slowest statements per request, sent as Server-Timing header
+# and/or logged as one JSON line per request. Views declare query budgets with
+# @query_budget; exceeding one logs a warning or, with QUERY_BUDGETS_ENFORCED,
+# raises QueryBudgetExceeded
+REQUEST_METRICS = os.environ.get('REQUEST_METRICS', '') == '1'
+REQUEST_METRICS_SERVER_TIMING = os.environ.get('REQUEST_METRICS_SERVER_TIMING', '1') == '1'
+REQUEST_METRICS_LOG = os.environ.get('REQUEST_METRICS_LOG', '') == '1'
+REQUEST_METRICS_SLOWEST = int(os.environ.get('REQUEST_METRICS_SLOWEST', 5))
+QUERY_BUDGETS_ENFORCED = os.environ.get('QUERY_BUDGETS_ENFORCED', '') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {'message': {'format': '%(message)s'}},
+    'handlers': {
+        'request_metrics': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        'library.request_metrics': {
+            'handlers': ['request_metrics'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 WSGI_APPLICATION = 'SimpleLiteratureManager.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# WAL lets readers continue while a write is in progress. synchronous=NORMAL is
+# safe with WAL (only the last commits can be lost on power failure) and saves
+# most fsyncs. Each pragma runs once per connection.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 20000)),
+    'cache_size': -64000,  # KiB
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        # SQLITE_PATH points e.g. benchmarks at a separate database file
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()
+            ),
+        },
     }
 }
 
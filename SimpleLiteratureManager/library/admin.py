@@ -1,6 +1,14 @@
 from django.contrib import admin
 from .forms import ProjectForm
-from .models import Author, Journal, Project, Publication, PublicationAnnotation, Tag
+from .models import (
+    Author,
+    DoiMetadataCache,
+    Journal,
+    Project,
+    Publication,
+    PublicationAnnotation,
+    Tag,
+)
 
 @admin.register(Author)
 class AuthorAdmin(admin.ModelAdmin):
@@ -56,3 +64,11 @@ class ProjectAdmin(admin.ModelAdmin):
     list_display = ("title",)
     search_fields = ("title", "description")
     form = ProjectForm
+
+
+@admin.register(DoiMetadataCache)
+class DoiMetadataCacheAdmin(admin.ModelAdmin):
+    list_display = ("doi", "status_code", "fetched_at", "hit_count", "miss_count")
+    list_filter = ("status_code",)
+    search_fields = ("doi",)
+    readonly_fields = ("fetched_at", "hit_count", "miss_count")
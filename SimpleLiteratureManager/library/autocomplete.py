@@ -0,0 +1,115 @@
+import re
+
+from django.db import models
+
+from .duplicates import normalize_name
+from .models import Author, Journal, Project, Publication, Tag
+from .resolution import ORCID_PREFIXES, normalize_orcid
+from .search import search_publications
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+def _choice(pk, text):
+    return {"id": pk, "text": text}
+
+
+def _starts_last_name(term):
+    key = normalize_name(term)
+    if key:
+        return models.Q(last_name_key__startswith=key)
+    return models.Q(last_name__istartswith=term)
+
+
+def _starts_name_part(term):
+    return (
+        _starts_last_name(term)
+        | models.Q(last_name__icontains=f" {term}")
+        | models.Q(first_name__istartswith=term)
+        | models.Q(first_name__icontains=f" {term}")
+    )
+
+
+def author_choices(query, limit):
+    authors = Author.objects.order_by("last_name_key", "first_name", "pk")
+    orcid = normalize_orcid(query)
+    if orcid:
+        found = authors.filter(orcid__in=[orcid, *(prefix + orcid for prefix in ORCID_PREFIXES)])
+        return [_choice(author.pk, str(author)) for author in found[:limit]]
+
+    terms = [re.sub(r"[^\w]", "", term) for term in query.split()]
+    terms = [term for term in terms if term]
+    if not terms:
+        return [_choice(author.pk, str(author)) for author in authors[:limit]]
+
+    # Every term has to start a part of the name, and one of them the last
+    # name, which the indexed last_name_key answers.
+    anchor = models.Q()
+    for term in terms:
+        anchor |= _starts_last_name(term)
+        authors = authors.filter(_starts_name_part(term))
+    return [_choice(author.pk, str(author)) for author in authors.filter(anchor)[:limit]]
+
+
+def _by_name(queryset, field, query, limit, extra=None):
+    # Names starting with the query come before names only containing it.
+    if query:
+        condition = models.Q(**{f"{field}__icontains": query})
+        if extra is not None:
+            condition |= extra
+        queryset = queryset.filter(condition).order_by(
+            models.Case(
+                models.When(**{f"{field}__istartswith": query}, then=0),
+                default=1,
+                output_field=models.IntegerField(),
+            ),
+            field,
+            "pk",
+        )
+    else:
+        queryset = queryset.order_by(field, "pk")
+    return queryset[:limit]
+
+
+def journal_choices(query, limit):
+    extra = models.Q(short_name__icontains=query) | models.Q(issn=query) if query else None
+    journals = _by_name(Journal.objects.only("pk", "name"), "name", query, limit, extra)
+    return [_choice(journal.pk, journal.name) for journal in journals]
+
+
+def tag_choices(query, limit):
+    tags = _by_name(Tag.objects.only("pk", "name"), "name", query, limit)
+    return [_choice(tag.pk, tag.name) for tag in tags]
+
+
+def project_choices(query, limit):
+    projects = _by_name(Project.objects.only("pk", "title"), "title", query, limit)
+    return [_choice(project.pk, project.title) for project in projects]
+
+
+def publication_choices(query, limit):
+    if query:
+        publications = [hit["publication"] for hit in search_publications(query, limit)]
+    else:
+        publications = Publication.objects.only("pk", "title", "year").order_by(
+            "-year", "title", "pk"
+        )[:limit]
+    return [_choice(publication.pk, str(publication)) for publication in publications]
+
+
+SOURCES = {
+    "authors": author_choices,
+    "journals": journal_choices,
+    "tags": tag_choices,
+    "projects": project_choices,
+    "publications": publication_choices,
+}
+
+
+def parse_limit(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+    return max(1, min(limit, MAX_LIMIT))
@@ -0,0 +1,448 @@
+import re
+import sys
+import time
+import unicodedata
+from itertools import islice
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+from .counters import refresh_publication_counts
+from .doi_import import existing_dois, normalize_doi
+from .models import (
+    ORDERED_AUTHORS_ATTR,
+    Journal,
+    Publication,
+    PublicationAuthor,
+    write_transaction,
+)
+from .resolution import Resolver
+from .search import schedule_reindex
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 50
+
+ARTICLE = Publication.PublicationType.ARTICLE
+PROCEEDINGS = Publication.PublicationType.PROCEEDINGS
+BOOK = Publication.PublicationType.BOOK
+
+BIBTEX_TYPES = {
+    "article": ARTICLE,
+    "inproceedings": PROCEEDINGS,
+    "conference": PROCEEDINGS,
+    "proceedings": PROCEEDINGS,
+    "incollection": PROCEEDINGS,
+    "book": BOOK,
+    "inbook": BOOK,
+    "collection": BOOK,
+    "mvbook": BOOK,
+}
+RIS_TYPES = {
+    "JOUR": ARTICLE,
+    "JFULL": ARTICLE,
+    "EJOUR": ARTICLE,
+    "CONF": PROCEEDINGS,
+    "CPAPER": PROCEEDINGS,
+    "BOOK": BOOK,
+    "EBOOK": BOOK,
+    "CHAP": BOOK,
+    "ECHAP": BOOK,
+}
+
+MONTH_MACROS = {
+    name: name.capitalize()
+    for name in ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+}
+
+LATEX_ACCENTS = {
+    '"': "\u0308",
+    "'": "\u0301",
+    "`": "\u0300",
+    "^": "\u0302",
+    "~": "\u0303",
+    "=": "\u0304",
+    ".": "\u0307",
+    "c": "\u0327",
+    "v": "\u030c",
+    "u": "\u0306",
+    "H": "\u030b",
+    "r": "\u030a",
+}
+LATEX_SYMBOLS = {
+    "ss": "ß",
+    "ae": "æ",
+    "AE": "Æ",
+    "oe": "œ",
+    "OE": "Œ",
+    "aa": "å",
+    "AA": "Å",
+    "o": "ø",
+    "O": "Ø",
+    "l": "ł",
+    "L": "Ł",
+}
+SYMBOL_ACCENT = re.compile(r"""\\(["'`^~=.])\s*\{?\\?([A-Za-z])\}?""")
+LETTER_ACCENT = re.compile(r"\\([cvuHr])(?:\s+|\{)\\?([A-Za-z])\}?")
+SYMBOL = re.compile(r"\\(ss|ae|AE|oe|OE|aa|AA|o|O|l|L)(?![A-Za-z])(?:\{\})?")
+ESCAPED = re.compile(r"\\([&%_$#{}])")
+
+ENTRY_START = re.compile(r"@\s*(\w+)\s*\{")
+FIELD_NAME = re.compile(r"[\s,]*([\w.:+-]+)\s*=\s*")
+BARE_VALUE = re.compile(r"[^\s,#}]+")
+CONCATENATION = re.compile(r"\s*#\s*")
+NAME_SEPARATOR = re.compile(r"[{}]|\s+and\s+", flags=re.IGNORECASE)
+RIS_LINE = re.compile(r"^([A-Z][A-Z0-9])  -(?: (.*))?$")
+YEAR = re.compile(r"\d{4}")
+
+
+def latex_to_text(value):
+    def accented(match):
+        return unicodedata.normalize("NFC", match[2] + LATEX_ACCENTS[match[1]])
+
+    value = SYMBOL_ACCENT.sub(accented, value)
+    value = LETTER_ACCENT.sub(accented, value)
+    value = SYMBOL.sub(lambda match: LATEX_SYMBOLS[match[1]], value)
+    value = ESCAPED.sub(lambda match: f"\0{ord(match[1])}\0", value)
+    value = value.replace("{", "").replace("}", "").replace("~", " ")
+    value = re.sub(r"\0(\d+)\0", lambda match: chr(int(match[1])), value)
+    return " ".join(value.split())
+
+
+def _closing_brace(text, start):
+    depth = 0
+    for index in range(start, len(text)):
+        char = text[index]
+        if char == "\\":
+            continue
+        if char == "{" and text[index - 1] != "\\":
+            depth += 1
+        elif char == "}" and text[index - 1] != "\\":
+            depth -= 1
+            if depth == 0:
+                return index
+    return len(text)
+
+
+def _closing_quote(text, start):
+    depth = 0
+    for index in range(start + 1, len(text)):
+        char = text[index]
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif char == '"' and depth == 0 and text[index - 1] != "\\":
+            return index
+    return len(text)
+
+
+def _parse_fields(text, macros):
+    fields = {}
+    position = 0
+    while match := FIELD_NAME.match(text, position):
+        name = match[1].lower()
+        position = match.end()
+        parts = []
+        while position < len(text):
+            if text[position] == "{":
+                end = _closing_brace(text, position)
+                parts.append(text[position + 1 : end])
+            elif text[position] == '"':
+                end = _closing_quote(text, position)
+                parts.append(text[position + 1 : end])
+            else:
+                word = BARE_VALUE.match(text, position)
+                if not word:
+                    break
+                parts.append(macros.get(word[0].lower(), word[0]))
+                end = word.end() - 1
+            position = end + 1
+            concatenation = CONCATENATION.match(text, position)
+            if not concatenation:
+                break
+            position = concatenation.end()
+        fields[name] = "".join(parts)
+    return fields
+
+
+def iter_bibtex_entries(lines):
+    # Collects the lines of one entry until its braces are balanced, so only a
+    # single entry is held in memory at a time.
+    macros = dict(MONTH_MACROS)
+    buffer = []
+    depth = 0
+    for line in lines:
+        starts_entry = line.lstrip().startswith("@")
+        if starts_entry and depth == 0:
+            # Drops anything unterminated, e.g. entries delimited by parentheses.
+            buffer = []
+        elif not buffer and not starts_entry:
+            continue
+        buffer.append(line)
+        counted = line.replace("\\{", "").replace("\\}", "")
+        depth += counted.count("{") - counted.count("}")
+        if depth > 0 or not any("{" in part for part in buffer):
+            continue
+
+        text = "".join(buffer).strip()
+        buffer = []
+        depth = 0
+        match = ENTRY_START.match(text)
+        if not match:
+            continue
+        kind = match[1].lower()
+        body = text[match.end() : _closing_brace(text, match.end() - 1)]
+        if kind in {"comment", "preamble"}:
+            continue
+        if kind == "string":
+            macros.update(
+                (name, latex_to_text(value)) for name, value in _parse_fields(body, macros).items()
+            )
+            continue
+        key, _, rest = body.partition(",")
+        yield {"type": kind, "key": key.strip(), "fields": _parse_fields(rest, macros)}
+
+
+def iter_ris_records(lines):
+    record = None
+    last_tag = None
+    for line in lines:
+        line = line.rstrip("\r\n").lstrip("\ufeff")
+        match = RIS_LINE.match(line)
+        if not match:
+            # Continuation of a wrapped value, typically an abstract.
+            if record is not None and last_tag and line.strip():
+                record[last_tag][-1] = f"{record[last_tag][-1]} {line.strip()}"
+            continue
+        tag, value = match[1], (match[2] or "").strip()
+        if tag == "TY":
+            record = {"TY": [value]}
+        elif tag == "ER":
+            if record is not None:
+                yield record
+            record = None
+        elif record is not None:
+            record.setdefault(tag, []).append(value)
+        last_tag = tag if record is not None else None
+
+
+def _split_names(value):
+    names = []
+    depth = 0
+    start = 0
+    for match in NAME_SEPARATOR.finditer(value):
+        if match[0] == "{":
+            depth += 1
+        elif match[0] == "}":
+            depth -= 1
+        elif depth == 0:
+            names.append(value[start : match.start()])
+            start = match.end()
+    names.append(value[start:])
+    return [name.strip() for name in names if name.strip()]
+
+
+def split_name(name):
+    name = name.strip()
+    if name.startswith("{") and name.endswith("}") and _closing_brace(name, 0) == len(name) - 1:
+        # Corporate authors such as {World Health Organization}.
+        return "", latex_to_text(name)
+    text = latex_to_text(name)
+    if "," in text:
+        parts = [part.strip() for part in text.split(",")]
+        return parts[-1] if len(parts) > 1 else "", parts[0]
+    tokens = text.split()
+    if len(tokens) < 2:
+        return "", text
+    # Lower-case particles ("van", "de") belong to the last name.
+    split = len(tokens) - 1
+    while split > 1 and tokens[split - 1][:1].islower():
+        split -= 1
+    return " ".join(tokens[:split]), " ".join(tokens[split:])
+
+
+def _year(*values):
+    for value in values:
+        match = YEAR.search(value or "")
+        if match:
+            return int(match[0])
+    return None
+
+
+def bibtex_record(entry):
+    fields = entry["fields"]
+    text = {name: latex_to_text(value) for name, value in fields.items()}
+    authors = [
+        split_name(name)
+        for name in _split_names(fields.get("author") or fields.get("editor") or "")
+        if name.lower() != "others"
+    ]
+    return {
+        "source": entry["key"],
+        "title": text.get("title", ""),
+        "year": _year(text.get("year"), text.get("date")),
+        "publication_type": BIBTEX_TYPES.get(entry["type"], ARTICLE),
+        "journal": text.get("journaltitle") or text.get("journal") or text.get("booktitle") or "",
+        "volume": text.get("volume", ""),
+        "pages": text.get("pages", "").replace("--", "-"),
+        "doi": normalize_doi(text.get("doi")),
+        "abstract": text.get("abstract", ""),
+        "authors": authors,
+    }
+
+
+def ris_record(record):
+    def first(*tags):
+        for tag in tags:
+            if record.get(tag):
+                return record[tag][0]
+        return ""
+
+    pages = first("SP")
+    if first("EP"):
+        pages = f"{pages}-{first('EP')}"
+    return {
+        "source": first("ID", "TI", "T1"),
+        "title": first("TI", "T1"),
+        "year": _year(first("PY", "Y1", "DA")),
+        "publication_type": RIS_TYPES.get(first("TY"), ARTICLE),
+        "journal": first("JO", "JF", "T2", "JA", "J2"),
+        "volume": first("VL"),
+        "pages": pages,
+        "doi": normalize_doi(first("DO")),
+        "abstract": first("AB", "N2"),
+        "authors": [split_name(name) for name in record.get("AU", []) + record.get("A1", [])],
+    }
+
+
+def read_records(lines, file_format):
+    if file_format == "ris":
+        return (ris_record(record) for record in iter_ris_records(lines))
+    return (bibtex_record(entry) for entry in iter_bibtex_entries(lines))
+
+
+def guess_format(filename):
+    return "ris" if filename.lower().endswith((".ris", ".txt")) else "bibtex"
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class BibliographyImporter:
+    # Authors and journals of a chunk are resolved in bulk by one Resolver,
+    # whose memo is shared by all chunks. It refreshes the duplicate
+    # candidates of the authors each chunk creates; full rebuilds are left to
+    # the rebuild_author_duplicates command.
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.resolver = Resolver()
+        self.seen_dois = set()
+        self.errors = []
+        self.counts = {
+            "created": 0,
+            "duplicates": 0,
+            "errors": 0,
+            "authors_created": 0,
+            "journals_created": 0,
+        }
+
+    def run(self, records):
+        started = time.perf_counter()
+        records = iter(records)
+        while chunk := list(islice(records, self.chunk_size)):
+            self._import_chunk(chunk)
+        self.counts["authors_created"] = self.resolver.authors_created
+        self.counts["journals_created"] = self.resolver.journals_created
+
+        seconds = time.perf_counter() - started
+        processed = self.counts["created"] + self.counts["duplicates"] + self.counts["errors"]
+        return {
+            **self.counts,
+            "seconds": round(seconds, 2),
+            "entries_per_second": round(processed / seconds, 1) if seconds else None,
+            "peak_memory_mb": peak_memory_mb(),
+            "error_details": self.errors,
+        }
+
+    def _error(self, record, message):
+        self.counts["errors"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"source": record.get("source", ""), "error": message})
+
+    def _valid_records(self, chunk):
+        valid = []
+        for record in chunk:
+            if not record["title"]:
+                self._error(record, "Titel fehlt.")
+            elif not record["year"]:
+                self._error(record, "Jahr fehlt.")
+            elif record["doi"] and record["doi"].lower() in self.seen_dois:
+                self.counts["duplicates"] += 1
+            else:
+                if record["doi"]:
+                    self.seen_dois.add(record["doi"].lower())
+                valid.append(record)
+        stored = existing_dois([record["doi"] for record in valid if record["doi"]])
+        self.counts["duplicates"] += sum(
+            1 for record in valid if record["doi"] and record["doi"].lower() in stored
+        )
+        return [
+            record for record in valid if not record["doi"] or record["doi"].lower() not in stored
+        ]
+
+    def _import_chunk(self, chunk):
+        records = self._valid_records(chunk)
+        if not records:
+            return
+
+        with write_transaction():
+            journals = self.resolver.journals((record["journal"], None) for record in records)
+            author_lists = self.resolver.author_lists(
+                [
+                    {"first_name": first_name, "last_name": last_name}
+                    for first_name, last_name in record["authors"]
+                ]
+                for record in records
+            )
+            publications = []
+            for record, journal, authors in zip(records, journals, author_lists):
+                publication = Publication(
+                    title=record["title"][:500],
+                    year=record["year"],
+                    doi=record["doi"][:255] or None,
+                    publication_type=record["publication_type"],
+                    journal=journal,
+                    volume=record["volume"][:50],
+                    pages=record["pages"][:50],
+                    abstract=record["abstract"],
+                )
+                setattr(publication, ORDERED_AUTHORS_ATTR, authors)
+                publications.append(publication)
+
+            Publication.objects.assign_bibtex_keys(publications, batch_size=self.chunk_size)
+            Publication.objects.bulk_create(publications)
+            PublicationAuthor.objects.bulk_create(
+                PublicationAuthor(publication=publication, author=author, position=position)
+                for publication in publications
+                for position, author in enumerate(
+                    getattr(publication, ORDERED_AUTHORS_ATTR), start=1
+                )
+            )
+            refresh_publication_counts(
+                Journal, {publication.journal_id for publication in publications}
+            )
+            schedule_reindex([publication.pk for publication in publications])
+        self.counts["created"] += len(publications)
+
+
+def import_bibliography(lines, file_format="bibtex", chunk_size=DEFAULT_CHUNK_SIZE):
+    return BibliographyImporter(chunk_size=chunk_size).run(read_records(lines, file_format))
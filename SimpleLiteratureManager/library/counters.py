@@ -0,0 +1,90 @@
+from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Journal, Project, Publication, Tag
+
+COUNTED_RELATIONS = {
+    Tag: (Publication.tags.through, "tag"),
+    Project: (Publication.projects.through, "project"),
+    Journal: (Publication, "journal"),
+}
+
+
+def refresh_publication_counts(model, pks=None):
+    # Recount instead of incrementing so repeated or partial signals cannot let
+    # the columns drift.
+    source, field = COUNTED_RELATIONS[model]
+    count = (
+        source.objects.filter(**{field: models.OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=models.Count("*"))
+        .values("total")
+    )
+    targets = model.objects.all()
+    if pks is not None:
+        pks = {pk for pk in pks if pk is not None}
+        if not pks:
+            return 0
+        targets = targets.filter(pk__in=pks)
+    return targets.update(
+        cached_publication_count=Coalesce(models.Subquery(count), 0)
+    )
+
+
+def refresh_all_publication_counts():
+    return {model.__name__: refresh_publication_counts(model) for model in COUNTED_RELATIONS}
+
+
+def _refresh_m2m_counts(model, instance, action, reverse, pk_set):
+    if action == "pre_clear" and not reverse:
+        instance._cleared_counter_pks = set(
+            COUNTED_RELATIONS[model][0]
+            .objects.filter(publication=instance)
+            .values_list(f"{model._meta.model_name}_id", flat=True)
+        )
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+    if reverse:
+        refresh_publication_counts(model, [instance.pk])
+    elif action == "post_clear":
+        refresh_publication_counts(model, instance.__dict__.pop("_cleared_counter_pks", ()))
+    else:
+        refresh_publication_counts(model, pk_set or ())
+
+
+@receiver(m2m_changed, sender=Publication.tags.through)
+def refresh_tag_counts(sender, instance, action, reverse, pk_set=None, **kwargs):
+    _refresh_m2m_counts(Tag, instance, action, reverse, pk_set)
+
+
+@receiver(m2m_changed, sender=Publication.projects.through)
+def refresh_project_counts(sender, instance, action, reverse, pk_set=None, **kwargs):
+    _refresh_m2m_counts(Project, instance, action, reverse, pk_set)
+
+
+@receiver(post_save, sender=Publication)
+def refresh_journal_counts(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_loaded_journal_id", None)
+    if created or previous != instance.journal_id:
+        refresh_publication_counts(Journal, [previous, instance.journal_id])
+    instance._loaded_journal_id = instance.journal_id
+
+
+@receiver(pre_delete, sender=Publication)
+def remember_counted_relations(sender, instance, **kwargs):
+    instance._counted_relations = {
+        Tag: list(instance.tags.values_list("pk", flat=True)),
+        Project: list(instance.projects.values_list("pk", flat=True)),
+        Journal: [instance.journal_id],
+    }
+
+
+@receiver(post_delete, sender=Publication)
+def refresh_counts_after_delete(sender, instance, **kwargs):
+    for model, pks in getattr(instance, "_counted_relations", {}).items():
+        refresh_publication_counts(model, pks)
@@ -0,0 +1,361 @@
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Lower
+from django.utils import timezone
+from django.utils.html import strip_tags
+from requests.adapters import HTTPAdapter
+
+from .models import (
+    DoiMetadataCache,
+    Publication,
+    deferred_derived_fields,
+    write_transaction,
+)
+from .resolution import Resolver
+
+logger = logging.getLogger(__name__)
+
+DOI_PATTERN = re.compile(r"10\.\d{4,9}/[^\s,]+", flags=re.IGNORECASE)
+DOI_PREFIXES = ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "doi:")
+# Punctuation of the surrounding text, e.g. "(doi:10.1000/xyz)." in a pasted
+# reference list; a ")" stays when the DOI itself opens a parenthesis.
+DOI_TRAILING_CHARACTERS = ".,;:)]}>'\""
+
+REQUEST_TIMEOUT = 10
+DEFAULT_WORKERS = 8
+DEFAULT_BATCH_SIZE = 50
+
+HIT, STALE, REVALIDATED, MISS = "hit", "stale", "revalidated", "miss"
+
+_local = threading.local()
+
+
+def normalize_doi(value):
+    doi = (value or "").strip()
+    for prefix in DOI_PREFIXES:
+        if doi.lower().startswith(prefix):
+            doi = doi[len(prefix) :]
+            break
+    return strip_trailing_punctuation(doi.strip())
+
+
+def strip_trailing_punctuation(doi):
+    while doi and doi[-1] in DOI_TRAILING_CHARACTERS:
+        if doi[-1] == ")" and doi.count("(") >= doi.count(")"):
+            break
+        doi = doi[:-1]
+    return doi
+
+
+def parse_doi_list(text):
+    dois = []
+    seen = set()
+    for match in DOI_PATTERN.findall(text or ""):
+        doi = normalize_doi(match)
+        if doi.lower() not in seen:
+            seen.add(doi.lower())
+            dois.append(doi)
+    return dois
+
+
+def get_session(pool_size=DEFAULT_WORKERS):
+    # One keep-alive connection pool per thread that starts imports; worker
+    # threads of a batch share it.
+    session = getattr(_local, "session", None)
+    if session is None or getattr(_local, "pool_size", 0) < pool_size:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session, _local.pool_size = session, pool_size
+    return session
+
+
+def _extract_year(message):
+    for key in ("published-print", "published-online", "issued"):
+        info = message.get(key)
+        if info and "date-parts" in info and info["date-parts"]:
+            return info["date-parts"][0][0]
+    raise ValueError("Kein Veröffentlichungsjahr in den DOI-Daten gefunden.")
+
+
+def _parse_authors(message):
+    authors = []
+    for entry in message.get("author", []):
+        first = entry.get("given", "").strip()
+        last = entry.get("family", "").strip()
+        if not (first or last):
+            continue
+        orcid = entry.get("ORCID") or ""
+        authors.append(
+            {
+                "first_name": first,
+                "last_name": last,
+                "orcid": orcid.replace("https://orcid.org/", "") if orcid else None,
+            }
+        )
+    return authors
+
+
+def _map_crossref_type(raw_type):
+    mapping = {
+        "journal-article": Publication.PublicationType.ARTICLE,
+        "article": Publication.PublicationType.ARTICLE,
+        "proceedings-article": Publication.PublicationType.PROCEEDINGS,
+        "proceedings": Publication.PublicationType.PROCEEDINGS,
+        "book": Publication.PublicationType.BOOK,
+        "monograph": Publication.PublicationType.BOOK,
+    }
+    return mapping.get(raw_type, Publication.PublicationType.ARTICLE)
+
+
+def parse_crossref_message(message):
+    title_list = message.get("title", [])
+    if not title_list:
+        raise ValueError("Kein Titel in den DOI-Daten gefunden.")
+
+    title = title_list[0]
+    year = _extract_year(message)
+    abstract = strip_tags(message.get("abstract", "")).strip()
+    journal_title = (message.get("container-title") or [None])[0]
+    issn = (message.get("ISSN") or [None])[0]
+    authors = _parse_authors(message)
+    publication_type = _map_crossref_type(message.get("type"))
+
+    return {
+        "title": title,
+        "year": year,
+        "abstract": abstract,
+        "journal_title": journal_title,
+        "issn": issn,
+        "authors": authors,
+        "volume": message.get("volume", ""),
+        "pages": message.get("page", ""),
+        "publication_type": publication_type,
+    }
+
+
+def cache_key(doi):
+    return normalize_doi(doi).lower()
+
+
+def _is_fresh(entry, now):
+    ttl = settings.DOI_CACHE_NEGATIVE_TTL if entry.is_negative else settings.DOI_CACHE_TTL
+    return entry.fetched_at + timedelta(seconds=ttl) > now
+
+
+def _request_crossref(doi, session, entry=None):
+    headers = {}
+    if entry is not None and not entry.is_negative:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    response = session.get(
+        f"{settings.CROSSREF_API_URL}{doi}", headers=headers, timeout=REQUEST_TIMEOUT
+    )
+    if response.status_code == 304 and headers:
+        return None
+    if response.status_code == 404:
+        return {"status_code": 404, "message": None, "etag": "", "last_modified": ""}
+    response.raise_for_status()
+    message = response.json().get("message", {})
+    # The reference list is often most of the payload and is never used.
+    message.pop("reference", None)
+    return {
+        "status_code": response.status_code,
+        "message": message,
+        "etag": response.headers.get("ETag", ""),
+        "last_modified": response.headers.get("Last-Modified", ""),
+    }
+
+
+def _lookup(doi, entry, session):
+    # Does not touch the database so batches can run it in worker threads.
+    if entry is not None and _is_fresh(entry, timezone.now()):
+        return HIT, None
+    try:
+        response = _request_crossref(doi, session, entry)
+    except requests.RequestException:
+        if entry is None or entry.is_negative:
+            raise
+        logger.warning("Crossref nicht erreichbar, verwende Cache-Eintrag für %s.", doi)
+        return STALE, None
+    return (REVALIDATED, None) if response is None else (MISS, response)
+
+
+def _record(key, entry, outcome, response):
+    now = timezone.now()
+    if outcome == MISS:
+        entry, _ = DoiMetadataCache.objects.update_or_create(
+            doi=key,
+            defaults={
+                **response,
+                "fetched_at": now,
+                "miss_count": entry.miss_count + 1 if entry else 1,
+            },
+        )
+        return entry
+
+    updates = {"hit_count": F("hit_count") + 1}
+    if outcome == REVALIDATED:
+        updates["fetched_at"] = entry.fetched_at = now
+    DoiMetadataCache.objects.filter(pk=entry.pk).update(**updates)
+    return entry
+
+
+def _message_from_entry(entry):
+    if entry.is_negative:
+        raise ValueError(f"Die DOI {entry.doi} wurde bei Crossref nicht gefunden.")
+    return entry.message
+
+
+def fetch_crossref_message(doi, session=None):
+    key = cache_key(doi)
+    entry = DoiMetadataCache.objects.filter(doi=key).first()
+    outcome, response = _lookup(normalize_doi(doi), entry, session or get_session())
+    return _message_from_entry(_record(key, entry, outcome, response))
+
+
+def fetch_publication_by_doi(doi, session=None):
+    return parse_crossref_message(fetch_crossref_message(doi, session=session))
+
+
+def fetch_publications(dois, max_workers=DEFAULT_WORKERS):
+    keys = {doi: cache_key(doi) for doi in dois}
+    entries = DoiMetadataCache.objects.in_bulk(set(keys.values()), field_name="doi")
+    now = timezone.now()
+    pending = [
+        doi
+        for doi in dois
+        if keys[doi] not in entries or not _is_fresh(entries[keys[doi]], now)
+    ]
+
+    session = get_session(pool_size=max_workers)
+
+    def lookup(doi):
+        try:
+            return _lookup(doi, entries.get(keys[doi]), session), None
+        except requests.RequestException as exc:
+            return (None, None), str(exc)
+
+    lookups = {}
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            lookups = dict(zip(pending, executor.map(lookup, pending)))
+
+    results = []
+    hit_ids = []
+    for doi in dois:
+        entry = entries.get(keys[doi])
+        (outcome, response), error = lookups.get(doi, ((HIT, None), None))
+        if error:
+            results.append((doi, None, error))
+            continue
+        if outcome in (HIT, STALE):
+            hit_ids.append(entry.pk)
+        else:
+            entry = _record(keys[doi], entry, outcome, response)
+        try:
+            results.append((doi, parse_crossref_message(_message_from_entry(entry)), None))
+        except ValueError as exc:
+            results.append((doi, None, str(exc)))
+
+    if hit_ids:
+        DoiMetadataCache.objects.filter(pk__in=hit_ids).update(hit_count=F("hit_count") + 1)
+    return results
+
+
+def cache_stats():
+    return DoiMetadataCache.objects.aggregate(
+        entries=Count("pk"),
+        negative=Count("pk", filter=Q(status_code=404)),
+        hits=Coalesce(Sum("hit_count"), 0),
+        misses=Coalesce(Sum("miss_count"), 0),
+    )
+
+
+def create_publication_from_doi(doi, publication_data, resolver=None):
+    resolver = resolver or Resolver()
+    try:
+        with deferred_derived_fields():
+            journal = resolver.journal(
+                publication_data["journal_title"] or "", publication_data.get("issn")
+            )
+            author_instances = resolver.authors(publication_data["authors"])
+
+            publication = Publication(
+                title=publication_data["title"],
+                year=publication_data["year"],
+                doi=doi,
+                journal=journal,
+                abstract=publication_data["abstract"],
+                volume=publication_data.get("volume") or "",
+                pages=publication_data.get("pages") or "",
+                publication_type=publication_data.get(
+                    "publication_type", Publication.PublicationType.ARTICLE
+                ),
+            )
+            # The key is derived from the first author, so it is final at insert.
+            publication._pending_ordered_authors = author_instances
+            publication.save()
+            publication.set_authors_in_order(author_instances)
+    except Exception:
+        # Rows created in the rolled back block must not stay memoized.
+        resolver.clear()
+        raise
+    return publication
+
+
+def existing_dois(dois):
+    lowered = {doi.lower() for doi in dois}
+    return {
+        doi.lower(): publication_id
+        for publication_id, doi in Publication.objects.annotate(doi_lower=Lower("doi"))
+        .filter(doi_lower__in=lowered)
+        .values_list("pk", "doi")
+    }
+
+
+def import_dois(dois, max_workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE):
+    dois = parse_doi_list(" ".join(dois))
+    known = existing_dois(dois)
+    results = {
+        doi.lower(): {
+            "doi": doi,
+            "status": "exists",
+            "publication_id": known[doi.lower()],
+            "error": None,
+        }
+        for doi in dois
+        if doi.lower() in known
+    }
+
+    fetched = fetch_publications(
+        [doi for doi in dois if doi.lower() not in known], max_workers=max_workers
+    )
+    resolver = Resolver()
+    for start in range(0, len(fetched), batch_size):
+        with write_transaction():
+            for doi, publication_data, error in fetched[start : start + batch_size]:
+                result = {"doi": doi, "status": "error", "publication_id": None, "error": error}
+                if publication_data is not None:
+                    try:
+                        publication = create_publication_from_doi(
+                            doi, publication_data, resolver=resolver
+                        )
+                    except (DatabaseError, ValueError) as exc:
+                        result["error"] = str(exc)
+                    else:
+                        result.update(status="created", publication_id=publication.pk)
+                results[doi.lower()] = result
+
+    return [results[doi.lower()] for doi in dois]
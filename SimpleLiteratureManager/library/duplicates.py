@@ -0,0 +1,203 @@
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import combinations
+
+# Number of neighbours each author is compared with after sorting by name. This
+# catches typos in the first letters that the blocking keys cannot see.
+DEFAULT_WINDOW = 5
+
+# Blocks larger than this (e.g. very common surnames) are only compared inside a
+# sorted window instead of pairwise, which keeps the worst case subquadratic.
+MAX_BLOCK_SIZE = 100
+
+SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(value):
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return re.sub(r"[^a-z]", "", value.lower())
+
+
+def phonetic_code(value):
+    normalized = normalize_name(value)
+    if not normalized:
+        return ""
+
+    code = [normalized[0]]
+    previous = SOUNDEX_CODES.get(normalized[0], "")
+    for char in normalized[1:]:
+        digit = SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code.append(digit)
+        if char not in "hw":
+            previous = digit
+    return "".join(code)[:4].ljust(4, "0")
+
+
+def is_abbreviation_match(left, right):
+    left_norm, right_norm = normalize_name(left), normalize_name(right)
+    if not left_norm or not right_norm or left_norm[0] != right_norm[0]:
+        return False
+
+    short, long = (
+        (left_norm, right_norm) if len(left_norm) <= len(right_norm) else (right_norm, left_norm)
+    )
+    return len(short) == 1 or long.startswith(short) or (len(short) <= 3 and long.startswith(short))
+
+
+def is_similar_enough(left, right, threshold=0.85):
+    left_norm, right_norm = normalize_name(left), normalize_name(right)
+    if not left_norm or not right_norm:
+        return False
+    if left_norm == right_norm:
+        return True
+    # The quick ratios are cheap upper bounds of ratio(), so most pairs are
+    # rejected before the full matching runs.
+    matcher = SequenceMatcher(None, left_norm, right_norm)
+    return (
+        matcher.real_quick_ratio() >= threshold
+        and matcher.quick_ratio() >= threshold
+        and matcher.ratio() >= threshold
+    )
+
+
+def is_first_name_match(left, right):
+    return is_abbreviation_match(left, right) or is_similar_enough(left, right, threshold=0.8)
+
+
+def is_last_name_match(left, right):
+    return is_similar_enough(left, right, threshold=0.85)
+
+
+def is_potential_duplicate(first_author, second_author):
+    return is_last_name_match(first_author.last_name, second_author.last_name) and is_first_name_match(
+        first_author.first_name, second_author.first_name
+    )
+
+
+def similarity_score(first_author, second_author):
+    if not is_potential_duplicate(first_author, second_author):
+        return None
+
+    def ratio(left, right):
+        left_norm, right_norm = normalize_name(left), normalize_name(right)
+        if left_norm == right_norm:
+            return 1.0
+        return SequenceMatcher(None, left_norm, right_norm).ratio()
+
+    last_ratio = ratio(first_author.last_name, second_author.last_name)
+    first_ratio = (
+        1.0
+        if is_abbreviation_match(first_author.first_name, second_author.first_name)
+        else ratio(first_author.first_name, second_author.first_name)
+    )
+    return round((last_ratio + first_ratio) / 2, 4)
+
+
+def blocking_keys(author):
+    last_name = normalize_name(author.last_name)
+    first_initial = normalize_name(author.first_name)[:1]
+    if not last_name:
+        return []
+    return [
+        ("prefix", last_name[:3], first_initial),
+        ("phonetic", phonetic_code(last_name), first_initial),
+    ]
+
+
+def _sort_key(author):
+    return (normalize_name(author.last_name), normalize_name(author.first_name), author.id)
+
+
+def _window_pairs(authors, window):
+    ordered = sorted(authors, key=_sort_key)
+    for index, author in enumerate(ordered):
+        for other in ordered[index + 1 : index + 1 + window]:
+            yield author, other
+
+
+def candidate_pairs(authors, window=DEFAULT_WINDOW):
+    blocks = defaultdict(list)
+    for author in authors:
+        for key in blocking_keys(author):
+            blocks[key].append(author)
+
+    seen = set()
+
+    def unseen(pairs):
+        for first, second in pairs:
+            pair_key = (first.id, second.id) if first.id < second.id else (second.id, first.id)
+            if pair_key not in seen:
+                seen.add(pair_key)
+                yield first, second
+
+    for block in blocks.values():
+        if len(block) < 2:
+            continue
+        if len(block) > MAX_BLOCK_SIZE:
+            yield from unseen(_window_pairs(block, max(window, DEFAULT_WINDOW)))
+        else:
+            yield from unseen(combinations(block, 2))
+
+    if window:
+        yield from unseen(_window_pairs(authors, window))
+
+
+def scored_duplicate_pairs(authors, window=DEFAULT_WINDOW):
+    for first, second in candidate_pairs(authors, window=window):
+        score = similarity_score(first, second)
+        if score is not None:
+            yield first, second, score
+
+
+class DisjointSet:
+    def __init__(self, ids):
+        self.parent = {item: item for item in ids}
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first, second):
+        root_first, root_second = self.find(first), self.find(second)
+        if root_first != root_second:
+            self.parent[root_second] = root_first
+
+    def groups(self):
+        grouped = defaultdict(list)
+        for item in self.parent:
+            grouped[self.find(item)].append(item)
+        return list(grouped.values())
+
+
+def find_duplicate_groups(authors, window=DEFAULT_WINDOW):
+    authors = list(authors)
+    by_id = {author.id: author for author in authors}
+    disjoint_set = DisjointSet(by_id)
+
+    for first, second in candidate_pairs(authors, window=window):
+        if disjoint_set.find(first.id) == disjoint_set.find(second.id):
+            continue
+        if is_potential_duplicate(first, second):
+            disjoint_set.union(first.id, second.id)
+
+    return [
+        [by_id[author_id] for author_id in group]
+        for group in disjoint_set.groups()
+        if len(group) > 1
+    ]
@@ -0,0 +1,51 @@
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db.models import Case, IntegerField, When
+
+from .forms import PublicationFilterForm
+from .models import BIBLATEX_VARIANTS, Publication
+from .search import search_publications
+
+DEFAULT_CHUNK_SIZE = 2000
+SEARCH_EXPORT_LIMIT = 1000
+
+
+def selected_publications(params):
+    # Accepts the filters of the publication list (year, journal, tag, project,
+    # type, has_pdf, sort) plus ``q`` for the results of a full-text search.
+    form = PublicationFilterForm(params)
+    if not form.is_valid():
+        raise ValidationError(form.errors)
+
+    publications = form.filter_queryset(Publication.objects.all())
+    sort = form.cleaned_data.get("sort")
+    query = (params.get("q") or "").strip()
+    if query:
+        ids = [
+            result["publication"].pk
+            for result in search_publications(query, limit=SEARCH_EXPORT_LIMIT)
+        ]
+        publications = publications.filter(pk__in=ids)
+        if not sort and ids:
+            # Without a chosen order the file follows the search ranking.
+            return publications.order_by(
+                Case(
+                    *(When(pk=pk, then=position) for position, pk in enumerate(ids)),
+                    output_field=IntegerField(),
+                )
+            )
+    # The same orderings as the publication list, so the file matches the page.
+    return publications.order_by(
+        *PublicationFilterForm.SORT_ORDERINGS[sort or PublicationFilterForm.DEFAULT_SORT]
+    )
+
+
+def iter_biblatex_entries(publications, variant="full", chunk_size=DEFAULT_CHUNK_SIZE):
+    # Yields one string per chunk of publications. Only ids and versions are
+    # streamed from the database; entries come from the cache or are rendered
+    # per chunk, so memory stays bounded by ``chunk_size``.
+    rows = publications.values_list("pk", "biblatex_version").iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        entries = Publication.objects.biblatex_entries(chunk, variant)
+        yield "".join(f"{entry}\n\n" for entry in entries)
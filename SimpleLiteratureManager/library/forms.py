@@ -1,5 +1,47 @@
 from django import forms
-from .models import Author, Journal, Project, Publication, Tag
+from django.db import models
+from django.urls import reverse
+from .doi_import import existing_dois, normalize_doi, parse_doi_list
+from .models import Author, Journal, Project, Publication, Tag, deferred_derived_fields
+
+class AutocompleteMixin:
+    # Renders only the selected options; the form scripts load everything else
+    # from the autocomplete view, so the page does not grow with the library.
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["attrs"]["data-autocomplete-url"] = reverse(
+            "autocomplete", args=[self.source]
+        )
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [str(item) for item in value if str(item).isdigit()]
+        options = []
+        empty_label = self.choices.field.empty_label
+        if not self.allow_multiple_selected and empty_label is not None:
+            options.append(self.create_option(name, "", empty_label, not selected, 0, attrs))
+        if selected:
+            found = self.choices.queryset.in_bulk([int(pk) for pk in selected])
+            for pk in selected:
+                if int(pk) in found:
+                    option_value, label = self.choices.choice(found[int(pk)])
+                    options.append(
+                        self.create_option(name, option_value, label, True, len(options), attrs)
+                    )
+        return [(None, options, 0)]
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
+
 
 class AuthorForm(forms.ModelForm):
     class Meta:
@@ -44,12 +86,12 @@ class PublicationForm(forms.ModelForm):
         ]
         widgets = {
             "publication_type": forms.Select(attrs={"class": "form-select"}),
-            "authors": forms.SelectMultiple(attrs={"class": "form-select"}),
-            "journal": forms.Select(attrs={"class": "form-select"}),
+            "authors": AutocompleteSelectMultiple("authors", attrs={"class": "form-select"}),
+            "journal": AutocompleteSelect("journals", attrs={"class": "form-select"}),
             "volume": forms.TextInput(attrs={"class": "form-control"}),
             "pages": forms.TextInput(attrs={"class": "form-control"}),
-            "tags": forms.SelectMultiple(attrs={"class": "form-select"}),
-            "projects": forms.SelectMultiple(attrs={"class": "form-select"}),
+            "tags": AutocompleteSelectMultiple("tags", attrs={"class": "form-select"}),
+            "projects": AutocompleteSelectMultiple("projects", attrs={"class": "form-select"}),
             "year": forms.NumberInput(attrs={"class": "form-control"}),
             "title": forms.TextInput(attrs={"class": "form-control"}),
             "doi": forms.TextInput(attrs={"class": "form-control"}),
@@ -96,6 +138,16 @@ class PublicationForm(forms.ModelForm):
         ordered_authors.extend(remaining)
         return ordered_authors
 
+    def clean_doi(self):
+        doi = normalize_doi(self.cleaned_data.get("doi")) or None
+        if doi:
+            existing = existing_dois([doi]).get(doi.lower())
+            if existing is not None and existing != self.instance.pk:
+                raise forms.ValidationError(
+                    "Eine Publikation mit dieser DOI ist bereits vorhanden."
+                )
+        return doi
+
     def clean(self):
         cleaned_data = super().clean()
         self._cleaned_ordered_authors = self._ordered_authors_from_cleaned()
@@ -110,17 +162,15 @@ class PublicationForm(forms.ModelForm):
             publication._pending_ordered_authors = ordered_authors
 
         def save_relations():
-            publication.save()
-            final_order = ordered_authors or self._ordered_authors_from_cleaned()
-            publication.set_authors_in_order(final_order)
-
-            if "tags" in self.cleaned_data:
-                publication.tags.set(self.cleaned_data.get("tags", []))
-            if "projects" in self.cleaned_data:
-                publication.projects.set(self.cleaned_data.get("projects", []))
+            with deferred_derived_fields():
+                publication.save()
+                final_order = ordered_authors or self._ordered_authors_from_cleaned()
+                publication.set_authors_in_order(final_order)
 
-            publication.generate_bibtex_key(force=True)
-            publication.save(update_fields=["bibtex_key"])
+                if "tags" in self.cleaned_data:
+                    publication.tags.set(self.cleaned_data.get("tags", []))
+                if "projects" in self.cleaned_data:
+                    publication.projects.set(self.cleaned_data.get("projects", []))
 
         if commit:
             save_relations()
@@ -144,11 +194,118 @@ class DoiImportForm(forms.Form):
     )
 
 
+class DoiBatchImportForm(forms.Form):
+    doi_list = forms.CharField(
+        label="DOIs",
+        required=False,
+        widget=forms.Textarea(
+            attrs={
+                "class": "form-control font-monospace",
+                "rows": 10,
+                "placeholder": "Eine DOI pro Zeile oder eine Literaturliste einfügen",
+            }
+        ),
+    )
+    doi_file = forms.FileField(
+        label="Datei mit DOIs",
+        required=False,
+        widget=forms.ClearableFileInput(attrs={"class": "form-control"}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        text = cleaned_data.get("doi_list") or ""
+        upload = cleaned_data.get("doi_file")
+        if upload:
+            text += "\n" + upload.read().decode("utf-8", errors="ignore")
+
+        dois = parse_doi_list(text)
+        if not dois:
+            raise forms.ValidationError("Es wurde keine DOI gefunden.")
+        cleaned_data["dois"] = dois
+        return cleaned_data
+
+
+class PublicationFilterForm(forms.Form):
+    SORT_CHOICES = [
+        ("-year", "Jahr absteigend"),
+        ("year", "Jahr aufsteigend"),
+        ("title", "Titel A-Z"),
+        ("-title", "Titel Z-A"),
+    ]
+    DEFAULT_SORT = "-year"
+    # Every ordering ends with the primary key so that the keyset cursor is unique.
+    SORT_ORDERINGS = {
+        "-year": ("-year", "title", "id"),
+        "year": ("year", "title", "id"),
+        "title": ("title", "-year", "id"),
+        "-title": ("-title", "-year", "id"),
+    }
+    PDF_CHOICES = [("", "Alle"), ("1", "Mit PDF"), ("0", "Ohne PDF")]
+
+    year = forms.IntegerField(
+        required=False,
+        min_value=0,
+        widget=forms.NumberInput(attrs={"class": "form-control", "placeholder": "Jahr"}),
+    )
+    journal = forms.ModelChoiceField(
+        queryset=Journal.objects.all(),
+        required=False,
+        empty_label="Alle Journale",
+        widget=AutocompleteSelect("journals", attrs={"class": "form-select"}),
+    )
+    tag = forms.ModelChoiceField(
+        queryset=Tag.objects.all(),
+        required=False,
+        empty_label="Alle Tags",
+        widget=AutocompleteSelect("tags", attrs={"class": "form-select"}),
+    )
+    project = forms.ModelChoiceField(
+        queryset=Project.objects.all(),
+        required=False,
+        empty_label="Alle Projekte",
+        widget=AutocompleteSelect("projects", attrs={"class": "form-select"}),
+    )
+    type = forms.ChoiceField(
+        choices=[("", "Alle Typen"), *Publication.PublicationType.choices],
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    has_pdf = forms.ChoiceField(
+        choices=PDF_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    sort = forms.ChoiceField(
+        choices=SORT_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+
+    def filter_queryset(self, queryset):
+        data = self.cleaned_data
+        if data.get("year") is not None:
+            queryset = queryset.filter(year=data["year"])
+        if data.get("journal"):
+            queryset = queryset.filter(journal=data["journal"])
+        if data.get("tag"):
+            queryset = queryset.filter(tags=data["tag"])
+        if data.get("project"):
+            queryset = queryset.filter(projects=data["project"])
+        if data.get("type"):
+            queryset = queryset.filter(publication_type=data["type"])
+        if data.get("has_pdf") == "1":
+            queryset = queryset.exclude(pdf="").exclude(pdf__isnull=True)
+        elif data.get("has_pdf") == "0":
+            queryset = queryset.filter(models.Q(pdf="") | models.Q(pdf__isnull=True))
+        return queryset
+
+
 class ProjectForm(forms.ModelForm):
     publications = forms.ModelMultipleChoiceField(
         queryset=Publication.objects.all(),
         required=False,
-        widget=forms.SelectMultiple(attrs={"class": "form-select"}),
+        widget=AutocompleteSelectMultiple("publications", attrs={"class": "form-select"}),
     )
 
     class Meta:
@@ -178,3 +335,22 @@ class ProjectForm(forms.ModelForm):
             self.save_m2m = save_m2m
 
         return project
+
+
+class BibliographyImportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ("", "Automatisch (nach Dateiendung)"),
+        ("bibtex", "BibTeX / BibLaTeX"),
+        ("ris", "RIS"),
+    ]
+
+    file = forms.FileField(
+        label="Literaturdatei (.bib oder .ris)",
+        widget=forms.ClearableFileInput(attrs={"class": "form-control"}),
+    )
+    file_format = forms.ChoiceField(
+        label="Format",
+        choices=FORMAT_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
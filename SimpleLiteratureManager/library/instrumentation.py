@@ -0,0 +1,171 @@
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+# One JSON line per request when REQUEST_METRICS_LOG is enabled.
+metrics_logger = logging.getLogger("library.request_metrics")
+
+_current = ContextVar("request_metrics", default=None)
+_recorded = ContextVar("recorded_request_metrics", default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries, methods=("GET", "HEAD")):
+    # Declares how many queries a view may run; see RequestMetricsMiddleware.
+    # Writes vary with the submitted data, so only reads are budgeted by default.
+    def decorator(view):
+        view.query_budget = (max_queries, frozenset(methods))
+        return view
+
+    return decorator
+
+
+class RequestMetrics:
+    def __init__(self, slowest=5):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.max_slowest = slowest
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += seconds
+            if len(self.slowest) < self.max_slowest:
+                heapq.heappush(self.slowest, (seconds, sql))
+            elif self.max_slowest:
+                heapq.heappushpop(self.slowest, (seconds, sql))
+
+    def summary(self, request, response, total_seconds, budget):
+        match = request.resolver_match
+        return {
+            "view": match.view_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": self.queries,
+            "query_budget": budget,
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "template_ms": round(self.template_seconds * 1000, 2),
+            "total_ms": round(total_seconds * 1000, 2),
+            "slowest_queries": [
+                {"ms": round(seconds * 1000, 2), "sql": sql}
+                for seconds, sql in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+def server_timing(summary):
+    return ", ".join(
+        [
+            f'db;dur={summary["db_ms"]};desc="{summary["queries"]} queries"',
+            f"tpl;dur={summary['template_ms']}",
+            f"total;dur={summary['total_ms']}",
+        ]
+    )
+
+
+class TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        started = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            # Includes queries run by lazy querysets while rendering.
+            metrics.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+class RequestMetricsMiddleware:
+    # Records query count, DB and template time and the slowest statements of
+    # each request when REQUEST_METRICS is enabled (or a test uses
+    # recorded_requests). Queries run while a streaming response is consumed
+    # happen after the view returned and are not counted.
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorded = _recorded.get()
+        if not settings.REQUEST_METRICS and recorded is None:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(slowest=settings.REQUEST_METRICS_SLOWEST)
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        match = request.resolver_match
+        budget = None
+        if match and hasattr(match.func, "query_budget"):
+            max_queries, methods = match.func.query_budget
+            budget = max_queries if request.method in methods else None
+        summary = metrics.summary(request, response, time.perf_counter() - started, budget)
+        if recorded is not None:
+            recorded.append(summary)
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response["Server-Timing"] = server_timing(summary)
+        if settings.REQUEST_METRICS_LOG:
+            metrics_logger.info(json.dumps(summary))
+
+        if budget is not None and metrics.queries > budget:
+            message = (
+                f"{summary['view']}: {metrics.queries} Abfragen bei einem Budget von {budget}."
+            )
+            if settings.QUERY_BUDGETS_ENFORCED:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+@contextmanager
+def recorded_requests(enforce_budgets=True):
+    # Test helper: collects the summary of every request made inside the block
+    # and turns exceeded query budgets into QueryBudgetExceeded errors.
+    from django.test.utils import override_settings
+
+    recorded = []
+    token = _recorded.set(recorded)
+    try:
+        with override_settings(QUERY_BUDGETS_ENFORCED=enforce_budgets):
+            yield recorded
+    finally:
+        _recorded.reset(token)
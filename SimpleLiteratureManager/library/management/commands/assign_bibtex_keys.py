@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from library.models import Publication, ordered_authors_prefetch
+
+
+class Command(BaseCommand):
+    help = "Vergibt BibTeX-Schlüssel für alle Publikationen in einem Durchlauf."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Auch passende Schlüssel neu vergeben (Lücken werden geschlossen).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        publications = Publication.objects.prefetch_related(ordered_authors_prefetch()).order_by(
+            "pk"
+        )
+        changed = Publication.objects.assign_bibtex_keys(
+            publications, force=options["force"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(changed)} von {publications.count()} Schlüsseln neu vergeben."
+            )
+        )
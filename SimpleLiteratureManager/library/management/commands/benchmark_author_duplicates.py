@@ -0,0 +1,59 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from library.duplicates import DEFAULT_WINDOW, candidate_pairs, find_duplicate_groups
+from library.synthetic import synthetic_authors
+
+
+class Command(BaseCommand):
+    help = "Misst die Laufzeit der Duplikatsuche für synthetische Autorenlisten."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[1000, 10000, 100000],
+            help="Anzahl synthetischer Autoren pro Durchlauf.",
+        )
+        parser.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--json", action="store_true", help="Ergebnisse als JSON ausgeben."
+        )
+
+    def handle(self, *args, **options):
+        results = []
+        for size in options["sizes"]:
+            authors = synthetic_authors(size, seed=options["seed"])
+
+            comparisons = sum(1 for _ in candidate_pairs(authors, window=options["window"]))
+            started = time.perf_counter()
+            groups = find_duplicate_groups(authors, window=options["window"])
+            elapsed = time.perf_counter() - started
+
+            all_pairs = size * (size - 1) // 2
+            results.append(
+                {
+                    "authors": size,
+                    "candidate_pairs": comparisons,
+                    "all_pairs": all_pairs,
+                    "pair_ratio": comparisons / all_pairs if all_pairs else 0,
+                    "groups": len(groups),
+                    "seconds": round(elapsed, 4),
+                }
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results:
+            self.stdout.write(
+                "{authors:>8} Autoren: {candidate_pairs:>10} Kandidatenpaare "
+                "({pair_ratio:.5%} aller Paare), {groups} Gruppen in {seconds:.3f}s".format(
+                    **result
+                )
+            )
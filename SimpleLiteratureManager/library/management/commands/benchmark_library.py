@@ -0,0 +1,210 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from library.models import AuthorDuplicateCandidate, Project, Publication, ordered_authors_prefetch
+from library.synthetic import clear_library, generate_library
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(settings.BASE_DIR),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(operation):
+    started = time.perf_counter()
+    operation()
+    return time.perf_counter() - started
+
+
+def measure(operation, repeat, setup=None, rollback=False):
+    # Writes are rolled back so every run (and the next benchmark) sees the same
+    # library.
+    runs = []
+    queries = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with CaptureQueriesContext(connection) as captured:
+            if rollback:
+                with transaction.atomic():
+                    runs.append(timed(operation))
+                    transaction.set_rollback(True)
+            else:
+                runs.append(timed(operation))
+        queries = len(captured)
+    return {
+        "runs": len(runs),
+        "min_ms": round(min(runs) * 1000, 2),
+        "median_ms": round(statistics.median(runs) * 1000, 2),
+        "max_ms": round(max(runs) * 1000, 2),
+        "queries": queries,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Misst zentrale Ansichten und Operationen (Publikationsliste, Projektseite, "
+        "Duplikate, Zusammenführen, Schlüsselvergabe, Autorenreihenfolge, Export) und "
+        "gibt die Ergebnisse maschinenlesbar aus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            help=(
+                "Für jede Größe eine synthetische Bibliothek erzeugen und messen "
+                "(löscht vorhandene Daten, erfordert --flush). Ohne Angabe wird die "
+                "vorhandene Datenbank gemessen."
+            ),
+        )
+        parser.add_argument("--flush", action="store_true")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Ergebnisse zusätzlich als JSON-Datei schreiben.")
+        parser.add_argument(
+            "--json", action="store_true", help="Ergebnisse als JSON ausgeben."
+        )
+
+    def handle(self, *args, **options):
+        if options["sizes"] and not options["flush"] and Publication.objects.exists():
+            raise CommandError(
+                "--sizes ersetzt die vorhandenen Daten durch synthetische; mit --flush bestätigen."
+            )
+
+        report = {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "seed": options["seed"],
+            "repeat": options["repeat"],
+            "libraries": [],
+        }
+        for size in options["sizes"] or [None]:
+            if size is not None:
+                clear_library()
+                generate_library(size, seed=options["seed"])
+            report["libraries"].append(
+                {
+                    "publications": Publication.objects.count(),
+                    "results": self.run_benchmarks(options["repeat"]),
+                }
+            )
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for library in report["libraries"]:
+            self.stdout.write(f"{library['publications']} Publikationen:")
+            for name, result in library["results"].items():
+                if result is None:
+                    self.stdout.write(f"  {name:<22} übersprungen (keine Daten)")
+                    continue
+                self.stdout.write(
+                    "  {name:<22} {median_ms:>10.2f} ms Median "
+                    "({min_ms:.2f}–{max_ms:.2f} ms), {queries} Abfragen".format(
+                        name=name, **result
+                    )
+                )
+
+    def run_benchmarks(self, repeat):
+        client = Client()
+
+        def get(url, **params):
+            def request():
+                response = client.get(url, params)
+                if response.status_code != 200:
+                    raise CommandError(f"{url}: Status {response.status_code}")
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+
+            return request
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            results["publication_list"] = measure(get(reverse("publication_list")), repeat)
+            results["publication_list_sorted"] = measure(
+                get(reverse("publication_list"), sort="title"), repeat
+            )
+
+            project = Project.objects.order_by("-cached_publication_count", "pk").first()
+            results["project_detail"] = project and measure(
+                get(reverse("project_detail", args=[project.pk])), repeat
+            )
+
+            results["author_duplicates"] = measure(get(reverse("author_duplicates")), repeat)
+
+            candidate = (
+                AuthorDuplicateCandidate.objects.annotate(
+                    publications=models.Count("author__author_publications")
+                )
+                .order_by("-publications", "-score")
+                .first()
+            )
+            if candidate is None:
+                results["author_merge"] = None
+            else:
+                url = reverse("author_merge", args=[candidate.author_id, candidate.duplicate_id])
+                results["author_merge"] = measure(
+                    lambda: client.post(url, {"keep": "primary"}), repeat, rollback=True
+                )
+
+            results["bibtex_keys"] = measure(
+                lambda: Publication.objects.assign_bibtex_keys(
+                    Publication.objects.prefetch_related(ordered_authors_prefetch()).order_by(
+                        "pk"
+                    ),
+                    force=True,
+                ),
+                repeat,
+                rollback=True,
+            )
+
+            # The longest author list: rewriting the same order should cost one
+            # read, moving the first author to the end touches every row.
+            publication = (
+                Publication.objects.annotate(author_count=models.Count("publication_authors"))
+                .order_by("-author_count", "pk")
+                .first()
+            )
+            if publication is None:
+                results["author_order_unchanged"] = results["author_order_rotated"] = None
+            else:
+                authors = list(publication.ordered_authors)
+                rotated = authors[1:] + authors[:1]
+                results["author_order_unchanged"] = measure(
+                    lambda: publication.set_authors_in_order(authors), repeat, rollback=True
+                )
+                results["author_order_rotated"] = measure(
+                    lambda: publication.set_authors_in_order(rotated), repeat, rollback=True
+                )
+
+            export = get(reverse("publication_export"))
+            results["export_cold"] = measure(export, repeat, setup=cache.clear)
+            results["export_warm"] = measure(export, repeat)
+        return results
@@ -0,0 +1,167 @@
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+ROLLBACK_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "busy_timeout": 20000,
+}
+
+
+def connect(path, pragmas):
+    # isolation_level=None: transactions are started explicitly like Django does.
+    connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name}={value}")
+    return connection
+
+
+def prepare_database(path, rows, seed):
+    rng = random.Random(seed)
+    connection = connect(path, {"journal_mode": "DELETE"})
+    connection.executescript(
+        """
+        CREATE TABLE publication (
+            id INTEGER PRIMARY KEY, title TEXT NOT NULL, year INTEGER NOT NULL, abstract TEXT
+        );
+        CREATE INDEX publication_year_title ON publication (year DESC, title);
+        """
+    )
+    connection.execute("BEGIN")
+    connection.executemany(
+        "INSERT INTO publication (title, year, abstract) VALUES (?, ?, ?)",
+        (
+            (f"Publication {index}", rng.randint(1990, 2025), "x" * rng.randint(200, 2000))
+            for index in range(rows)
+        ),
+    )
+    connection.execute("COMMIT")
+    connection.close()
+
+
+def run_profile(path, pragmas, readers, duration, write_batch, seed):
+    stop = threading.Event()
+    latencies = [[] for _ in range(readers)]
+    errors = [0] * readers
+    writes = {"transactions": 0, "errors": 0}
+
+    def read(index):
+        rng = random.Random(seed + index)
+        connection = connect(path, pragmas)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                connection.execute(
+                    "SELECT id, title FROM publication WHERE year = ? ORDER BY title LIMIT 50",
+                    (rng.randint(1990, 2025),),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                errors[index] += 1
+                continue
+            latencies[index].append(time.perf_counter() - started)
+        connection.close()
+
+    def write():
+        rng = random.Random(seed)
+        connection = connect(path, pragmas)
+        while not stop.is_set():
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                for _ in range(write_batch):
+                    connection.execute(
+                        "UPDATE publication SET abstract = ? WHERE id = ?",
+                        ("y" * rng.randint(200, 2000), rng.randint(1, 1000)),
+                    )
+                connection.execute(
+                    "INSERT INTO publication (title, year) VALUES (?, ?)",
+                    ("Neu", rng.randint(1990, 2025)),
+                )
+                connection.execute("COMMIT")
+                writes["transactions"] += 1
+            except sqlite3.OperationalError:
+                writes["errors"] += 1
+                if connection.in_transaction:
+                    connection.execute("ROLLBACK")
+        connection.close()
+
+    threads = [threading.Thread(target=read, args=(index,)) for index in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    all_latencies = sorted(latency for values in latencies for latency in values)
+    return {
+        "reads": len(all_latencies),
+        "reads_per_second": round(len(all_latencies) / duration, 1),
+        "read_errors": sum(errors),
+        "read_p50_ms": round(statistics.median(all_latencies) * 1000, 3) if all_latencies else None,
+        "read_p95_ms": (
+            round(all_latencies[int(len(all_latencies) * 0.95)] * 1000, 3)
+            if all_latencies
+            else None
+        ),
+        "write_transactions": writes["transactions"],
+        "write_errors": writes["errors"],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Misst den Lesedurchsatz von SQLite während paralleler Schreibvorgänge, "
+        "jeweils mit Rollback-Journal und mit dem WAL-Profil aus den Einstellungen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=5.0, help="Sekunden pro Profil.")
+        parser.add_argument(
+            "--write-batch", type=int, default=200, help="Updates pro Schreibtransaktion."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--json", action="store_true", help="Ergebnisse als JSON ausgeben."
+        )
+
+    def handle(self, *args, **options):
+        profiles = {"rollback": ROLLBACK_PRAGMAS, "wal": settings.SQLITE_PRAGMAS}
+        results = []
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas in profiles.items():
+                path = os.path.join(directory, f"{name}.sqlite3")
+                prepare_database(path, options["rows"], options["seed"])
+                result = run_profile(
+                    path,
+                    pragmas,
+                    options["readers"],
+                    options["duration"],
+                    options["write_batch"],
+                    options["seed"],
+                )
+                results.append({"profile": name, **result})
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for result in results:
+            self.stdout.write(
+                "{profile:>8}: {reads_per_second:>9} Lesezugriffe/s "
+                "(p50 {read_p50_ms} ms, p95 {read_p95_ms} ms, {read_errors} Fehler), "
+                "{write_transactions} Schreibtransaktionen ({write_errors} Fehler)".format(
+                    **result
+                )
+            )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from library.doi_import import cache_stats
+from library.models import DoiMetadataCache
+
+
+class Command(BaseCommand):
+    help = "Zeigt Statistiken des DOI-Caches an oder leert ihn."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clear", action="store_true", help="Alle zwischengespeicherten Antworten löschen."
+        )
+        parser.add_argument(
+            "--negative",
+            action="store_true",
+            help="Nur zwischengespeicherte 404-Antworten löschen.",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"] or options["negative"]:
+            entries = DoiMetadataCache.objects.all()
+            if not options["clear"]:
+                entries = entries.filter(status_code=404)
+            deleted, _ = entries.delete()
+            self.stdout.write(self.style.SUCCESS(f"{deleted} Cache-Einträge gelöscht."))
+            return
+
+        stats = cache_stats()
+        lookups = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / lookups * 100 if lookups else 0
+        self.stdout.write(
+            f"{stats['entries']} Einträge ({stats['negative']} nicht gefunden), "
+            f"{stats['hits']} Treffer, {stats['misses']} Abrufe, Trefferquote {hit_rate:.1f} %"
+        )
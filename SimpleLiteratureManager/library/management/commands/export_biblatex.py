@@ -0,0 +1,60 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from library.export import (
+    BIBLATEX_VARIANTS,
+    DEFAULT_CHUNK_SIZE,
+    iter_biblatex_entries,
+    selected_publications,
+)
+from library.models import Publication
+
+
+class Command(BaseCommand):
+    help = (
+        "Exportiert Publikationen als BibLaTeX, wahlweise nach Projekt, Tag, "
+        "Journal oder Suchbegriff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, help="ID des Projekts.")
+        parser.add_argument("--tag", type=int, help="ID des Tags.")
+        parser.add_argument("--journal", type=int, help="ID des Journals.")
+        parser.add_argument("--year", type=int)
+        parser.add_argument("--type", choices=Publication.PublicationType.values)
+        parser.add_argument("--query", help="Nur Treffer dieser Volltextsuche exportieren.")
+        parser.add_argument("--variant", choices=list(BIBLATEX_VARIANTS), default="full")
+        parser.add_argument(
+            "--output", default="-", help="Zieldatei, '-' für stdout (Standard)."
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        params = {
+            name: options[name]
+            for name in ("project", "tag", "journal", "year", "type")
+            if options[name] is not None
+        }
+        params["q"] = options["query"] or ""
+        try:
+            publications = selected_publications(params)
+        except ValidationError as error:
+            raise CommandError(
+                "; ".join(
+                    f"{field}: {' '.join(messages)}"
+                    for field, messages in error.message_dict.items()
+                )
+            )
+
+        chunks = iter_biblatex_entries(
+            publications, options["variant"], chunk_size=options["chunk_size"]
+        )
+        if options["output"] == "-":
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Export nach {options['output']} geschrieben."))
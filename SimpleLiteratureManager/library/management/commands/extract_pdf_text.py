@@ -0,0 +1,72 @@
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from library.models import Publication
+from library.pdf_text import (
+    clear_pdf_pages,
+    extract_pdf_file,
+    extraction_available,
+    store_pdf_pages,
+    worker_pool,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Extrahiert den Text aller hochgeladenen PDFs seitenweise für die Suche. Holt auch "
+        "Uploads nach, deren Extraktion im Hintergrund verloren ging (z. B. bei einem "
+        "Neustart des Servers)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PDF_TEXT_WORKERS or 1,
+            help="Anzahl paralleler Prozesse.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Auch unveränderte Dateien erneut extrahieren.",
+        )
+
+    def handle(self, *args, **options):
+        if not extraction_available():
+            raise CommandError("Für die Textextraktion wird das Paket 'pypdf' benötigt.")
+
+        jobs = {}
+        for publication in Publication.objects.only("id", "pdf", "pdf_text_hash"):
+            if not publication.pdf:
+                if publication.pdf_text_hash:
+                    clear_pdf_pages(publication.pk)
+                continue
+            known_hash = "" if options["force"] else publication.pdf_text_hash
+            jobs[publication.pk] = (publication.pdf.path, known_hash)
+
+        extracted = unchanged = failed = 0
+        with worker_pool(max(options["workers"], 1)) as executor:
+            futures = {
+                executor.submit(extract_pdf_file, path, known_hash): publication_id
+                for publication_id, (path, known_hash) in jobs.items()
+            }
+            for future in as_completed(futures):
+                publication_id = futures[future]
+                try:
+                    content_hash, pages = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"Publikation {publication_id}: {exc}")
+                    continue
+                if store_pdf_pages(publication_id, content_hash, pages):
+                    extracted += 1
+                else:
+                    unchanged += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{extracted} PDFs extrahiert, {unchanged} unverändert, {failed} fehlgeschlagen."
+            )
+        )
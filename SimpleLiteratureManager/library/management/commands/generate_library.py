@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.models import Publication
+from library.synthetic import clear_library, generate_library
+
+
+class Command(BaseCommand):
+    help = (
+        "Erzeugt eine reproduzierbare synthetische Bibliothek (z. B. 1000, 10000 oder "
+        "100000 Publikationen) für Benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--publications", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Vorhandene Publikationen, Autoren, Journals, Tags und Projekte vorher löschen.",
+        )
+
+    def handle(self, *args, **options):
+        if Publication.objects.exists():
+            if not options["flush"]:
+                raise CommandError(
+                    "Die Datenbank enthält bereits Publikationen; mit --flush werden sie gelöscht."
+                )
+            clear_library()
+
+        started = time.perf_counter()
+        counts = generate_library(
+            options["publications"], seed=options["seed"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "{publications} Publikationen, {authors} Autoren, {journals} Journals, "
+                "{tags} Tags, {projects} Projekte und {annotations} Annotationen "
+                "in {seconds:.1f}s erzeugt.".format(
+                    **counts, seconds=time.perf_counter() - started
+                )
+            )
+        )
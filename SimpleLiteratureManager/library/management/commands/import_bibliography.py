@@ -0,0 +1,50 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from library.bib_import import DEFAULT_CHUNK_SIZE, guess_format, import_bibliography
+
+
+class Command(BaseCommand):
+    help = "Importiert Publikationen aus einer BibTeX-/BibLaTeX- oder RIS-Datei."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Pfad zur Datei, '-' für stdin.")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=["bibtex", "ris"],
+            help="Standard: nach Dateiendung (.ris/.txt = RIS, sonst BibTeX).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            "--json", action="store_true", help="Zusammenfassung als JSON ausgeben."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["file_format"] or guess_format(path)
+        if path == "-":
+            summary = import_bibliography(sys.stdin, file_format, options["chunk_size"])
+        else:
+            with open(path, encoding="utf-8-sig", errors="replace") as handle:
+                summary = import_bibliography(handle, file_format, options["chunk_size"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        for error in summary["error_details"]:
+            self.stderr.write(f"{error['source']}: {error['error']}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{summary['created']} importiert, {summary['duplicates']} vorhanden, "
+                f"{summary['errors']} fehlerhaft; {summary['authors_created']} neue Autoren, "
+                f"{summary['journals_created']} neue Journale."
+            )
+        )
+        self.stdout.write(
+            f"{summary['seconds']} s, {summary['entries_per_second']} Einträge/s, "
+            f"Spitzenspeicher {summary['peak_memory_mb']} MB."
+        )
@@ -0,0 +1,48 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from library.doi_import import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, import_dois
+
+
+class Command(BaseCommand):
+    help = "Importiert Publikationen für eine Liste von DOIs über Crossref."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dois", nargs="*", help="DOIs, die importiert werden sollen.")
+        parser.add_argument(
+            "--file",
+            help="Datei mit DOIs (eine pro Zeile oder beliebiger Text), '-' für stdin.",
+        )
+        parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        dois = list(options["dois"])
+        if options["file"] == "-":
+            dois.append(sys.stdin.read())
+        elif options["file"]:
+            with open(options["file"], encoding="utf-8") as handle:
+                dois.append(handle.read())
+        if not dois:
+            raise CommandError("Keine DOIs angegeben.")
+
+        results = import_dois(
+            dois, max_workers=options["workers"], batch_size=options["batch_size"]
+        )
+
+        for result in results:
+            if result["status"] == "error":
+                self.stderr.write(f"{result['doi']}: {result['error']}")
+            else:
+                self.stdout.write(f"{result['doi']}: {result['status']}")
+
+        counts = {status: 0 for status in ("created", "exists", "error")}
+        for result in results:
+            counts[result["status"]] += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{counts['created']} importiert, {counts['exists']} vorhanden, "
+                f"{counts['error']} fehlgeschlagen."
+            )
+        )
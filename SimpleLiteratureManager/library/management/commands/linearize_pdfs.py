@@ -0,0 +1,69 @@
+from concurrent.futures import as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from library.models import Publication
+from library.pdf_linearize import linearization_available, linearize_pdf_file, store_linearization
+from library.pdf_text import worker_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Linearisiert die hochgeladenen PDFs, damit der Viewer die erste Seite anzeigen "
+        "kann, bevor die ganze Datei geladen ist. Holt auch Uploads nach, deren "
+        "Linearisierung im Hintergrund verloren ging."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.PDF_TEXT_WORKERS or 1,
+            help="Anzahl paralleler Prozesse.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Auch bereits als linearisiert markierte Dateien prüfen.",
+        )
+
+    def handle(self, *args, **options):
+        if not linearization_available():
+            raise CommandError("Für die Linearisierung wird das Paket 'pikepdf' benötigt.")
+
+        publications = Publication.objects.exclude(pdf="").exclude(pdf__isnull=True)
+        if not options["force"]:
+            publications = publications.filter(pdf_linearized=False)
+        jobs = {
+            publication.pk: publication.pdf for publication in publications.only("id", "pdf")
+        }
+
+        linearized = unchanged = failed = 0
+        with worker_pool(max(options["workers"], 1)) as executor:
+            futures = {
+                executor.submit(linearize_pdf_file, pdf.path): (publication_id, pdf.name)
+                for publication_id, pdf in jobs.items()
+            }
+            for future in as_completed(futures):
+                publication_id, pdf_name = futures[future]
+                try:
+                    original_hash, new_hash, linearized_path = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"Publikation {publication_id}: {exc}")
+                    continue
+                store_linearization(
+                    publication_id, pdf_name, original_hash, new_hash, linearized_path
+                )
+                if original_hash == new_hash:
+                    unchanged += 1
+                else:
+                    linearized += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{linearized} PDFs linearisiert, {unchanged} bereits linearisiert, "
+                f"{failed} fehlgeschlagen."
+            )
+        )
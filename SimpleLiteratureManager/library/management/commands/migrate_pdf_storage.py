@@ -0,0 +1,101 @@
+import os
+import shutil
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from library.models import Publication
+from library.pdf_text import file_sha256
+from library.storage import content_name, is_content_name, pdf_storage
+
+
+def hash_file(path):
+    try:
+        return file_sha256(path)
+    except FileNotFoundError:
+        return None
+
+
+def link_or_copy(source, target):
+    # A hard link moves nothing on disk; across file systems the file is
+    # copied under a temporary name first so a crash leaves no partial blob.
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        temporary = f"{target}.part"
+        shutil.copy2(source, temporary)
+        os.replace(temporary, target)
+
+
+class Command(BaseCommand):
+    help = (
+        "Überführt vorhandene PDFs in den inhaltsadressierten Speicher "
+        "(pdfs/xx/yy/<sha256>.pdf) und fasst identische Dateien zusammen."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--workers", type=int, default=4, help="Parallele Threads zum Hashen der Dateien."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Nur zählen, nichts verändern."
+        )
+
+    def handle(self, *args, **options):
+        storage = pdf_storage()
+        publications_by_name = defaultdict(list)
+        rows = Publication.objects.exclude(pdf="").exclude(pdf__isnull=True)
+        for pk, name in rows.values_list("pk", "pdf").order_by("pk"):
+            if not is_content_name(name):
+                publications_by_name[name].append(pk)
+        names = list(publications_by_name)
+
+        moved = deduplicated = missing = 0
+        known_targets = set()
+        batch_size = max(options["batch_size"], 1)
+        with ThreadPoolExecutor(max_workers=max(options["workers"], 1)) as executor:
+            for start in range(0, len(names), batch_size):
+                batch = names[start : start + batch_size]
+                digests = executor.map(hash_file, [storage.path(name) for name in batch])
+
+                updates = []
+                migrated = []
+                for name, digest in zip(batch, digests):
+                    if digest is None:
+                        missing += 1
+                        self.stderr.write(f"Datei fehlt: {name}")
+                        continue
+                    target = content_name(digest, os.path.splitext(name)[1])
+                    if target in known_targets or storage.exists(target):
+                        deduplicated += 1
+                    else:
+                        moved += 1
+                        if not options["dry_run"]:
+                            link_or_copy(storage.path(name), storage.path(target))
+                    known_targets.add(target)
+                    updates.extend(
+                        Publication(pk=pk, pdf=target) for pk in publications_by_name[name]
+                    )
+                    migrated.append(name)
+
+                if options["dry_run"] or not updates:
+                    continue
+                with transaction.atomic():
+                    Publication.objects.bulk_update(updates, ["pdf"])
+                # The old names are only removed once the rows point to the blobs.
+                for name in migrated:
+                    storage.delete(name)
+
+        prefix = "Probelauf: " if options["dry_run"] else ""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{moved} PDFs verschoben, {deduplicated} Duplikate zusammengefasst, "
+                f"{missing} Dateien fehlen."
+            )
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from library.duplicates import DEFAULT_WINDOW
+from library.models import AuthorDuplicateCandidate
+
+
+class Command(BaseCommand):
+    help = "Berechnet die Tabelle möglicher doppelter Autoren vollständig neu."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=DEFAULT_WINDOW,
+            help="Anzahl benachbarter Autoren, die nach Namen sortiert verglichen werden.",
+        )
+
+    def handle(self, *args, **options):
+        created = AuthorDuplicateCandidate.objects.rebuild(window=options["window"])
+        self.stdout.write(self.style.SUCCESS(f"{created} Duplikatkandidaten gespeichert."))
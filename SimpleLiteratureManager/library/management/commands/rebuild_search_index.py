@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from library.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Baut den Volltextindex für Publikationen neu auf."
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            self.stdout.write(
+                self.style.WARNING(
+                    "Kein FTS5-Index verfügbar, die Suche nutzt die Datenbankabfrage."
+                )
+            )
+            return
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"{count} Publikationen indiziert."))
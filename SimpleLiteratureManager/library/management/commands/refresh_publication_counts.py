@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from library.counters import refresh_all_publication_counts
+
+
+class Command(BaseCommand):
+    help = "Zählt die Publikationen je Journal, Tag und Projekt neu."
+
+    def handle(self, *args, **options):
+        refreshed = refresh_all_publication_counts()
+        summary = ", ".join(f"{count} {name}" for name, count in refreshed.items())
+        self.stdout.write(self.style.SUCCESS(f"Zähler aktualisiert: {summary}."))
@@ -0,0 +1,72 @@
+from django.db import models
+
+from .models import (
+    Author,
+    Publication,
+    PublicationAuthor,
+    ordered_authors_prefetch,
+    write_transaction,
+)
+
+FILLABLE_FIELDS = ("orcid", "university", "department")
+
+
+def choose_merge_target(authors):
+    # Keep the written-out name; missing fields such as the ORCID are copied over
+    # from the duplicates by ``fill_missing_fields``.
+    return max(
+        authors, key=lambda author: (len(author.first_name), bool(author.orcid), -author.pk)
+    )
+
+
+def fill_missing_fields(target, duplicates):
+    for field_name in FILLABLE_FIELDS:
+        if getattr(target, field_name):
+            continue
+        for duplicate in duplicates:
+            value = getattr(duplicate, field_name)
+            if value:
+                setattr(target, field_name, value)
+                break
+
+
+def merge_authors(target, duplicates):
+    # Moves every authorship of ``duplicates`` to ``target`` with two statements
+    # and saves ``target`` with its current field values. Where several of the
+    # merged authors are on one publication, the earliest position wins.
+    duplicate_ids = {author.pk for author in duplicates} - {target.pk}
+    if not duplicate_ids:
+        target.save()
+        return 0
+    merged_ids = duplicate_ids | {target.pk}
+
+    with write_transaction():
+        links = PublicationAuthor.objects.filter(author_id__in=merged_ids)
+        earlier_link = PublicationAuthor.objects.filter(
+            publication=models.OuterRef("publication"),
+            author_id__in=merged_ids,
+            position__lt=models.OuterRef("position"),
+        )
+        links.filter(models.Exists(earlier_link)).delete()
+        moved = links.filter(author_id__in=duplicate_ids).update(author=target)
+
+        Author.objects.filter(pk__in=duplicate_ids).delete()
+        target.save()
+
+        publications = Publication.objects.filter(authors=target).prefetch_related(
+            ordered_authors_prefetch()
+        )
+        Publication.objects.assign_bibtex_keys(publications)
+    return moved
+
+
+def merge_author_groups(groups):
+    merged = []
+    with write_transaction():
+        for authors in groups:
+            target = choose_merge_target(authors)
+            duplicates = [author for author in authors if author.pk != target.pk]
+            fill_missing_fields(target, duplicates)
+            merge_authors(target, duplicates)
+            merged.append(target)
+    return merged
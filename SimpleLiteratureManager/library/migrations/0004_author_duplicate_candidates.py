@@ -0,0 +1,101 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+from library.duplicates import normalize_name, phonetic_code, scored_duplicate_pairs
+
+
+def populate_duplicate_candidates(apps, schema_editor):
+    Author = apps.get_model("library", "Author")
+    AuthorDuplicateCandidate = apps.get_model("library", "AuthorDuplicateCandidate")
+
+    authors = list(Author.objects.all())
+    for author in authors:
+        author.last_name_key = normalize_name(author.last_name)[:100]
+        author.phonetic_key = phonetic_code(author.last_name)
+    Author.objects.bulk_update(
+        authors, ["last_name_key", "phonetic_key"], batch_size=1000
+    )
+
+    candidates = []
+    for first, second, score in scored_duplicate_pairs(authors):
+        if first.pk > second.pk:
+            first, second = second, first
+        candidates.append(
+            AuthorDuplicateCandidate(
+                author_id=first.pk, duplicate_id=second.pk, score=score
+            )
+        )
+    AuthorDuplicateCandidate.objects.bulk_create(candidates, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0003_extend_pdf_filename_length"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="author",
+            name="last_name_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=100
+            ),
+        ),
+        migrations.AddField(
+            model_name="author",
+            name="phonetic_key",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=4
+            ),
+        ),
+        migrations.CreateModel(
+            name="AuthorDuplicateCandidate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("score", models.FloatField()),
+                (
+                    "author",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="duplicate_candidates",
+                        to="library.author",
+                    ),
+                ),
+                (
+                    "duplicate",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="duplicate_of_candidates",
+                        to="library.author",
+                    ),
+                ),
+            ],
+            options={"ordering": ["-score"]},
+        ),
+        migrations.AddConstraint(
+            model_name="authorduplicatecandidate",
+            constraint=models.UniqueConstraint(
+                fields=("author", "duplicate"),
+                name="unique_author_duplicate_candidate",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="authorduplicatecandidate",
+            constraint=models.CheckConstraint(
+                condition=models.Q(("author__lt", models.F("duplicate"))),
+                name="author_duplicate_candidate_ordered",
+            ),
+        ),
+        migrations.RunPython(
+            populate_duplicate_candidates, migrations.RunPython.noop
+        ),
+    ]
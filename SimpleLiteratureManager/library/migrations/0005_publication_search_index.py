@@ -0,0 +1,63 @@
+from django.db import DatabaseError, migrations
+
+FTS_TABLE = "library_publication_fts"
+
+CREATE_FTS_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    title, abstract, doi, bibtex_key, authors, journal, annotations,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+POPULATE_FTS_TABLE_SQL = f"""
+INSERT INTO {FTS_TABLE} (rowid, title, abstract, doi, bibtex_key, authors, journal, annotations)
+SELECT
+    p.id,
+    p.title,
+    COALESCE(p.abstract, ''),
+    COALESCE(p.doi, ''),
+    COALESCE(p.bibtex_key, ''),
+    COALESCE((
+        SELECT group_concat(a.first_name || ' ' || a.last_name, ' ')
+        FROM (
+            SELECT pa.author_id FROM library_publicationauthor pa
+            WHERE pa.publication_id = p.id ORDER BY pa.position, pa.id
+        ) ordered
+        JOIN library_author a ON a.id = ordered.author_id
+    ), ''),
+    COALESCE(j.name || COALESCE(' ' || j.short_name, ''), ''),
+    COALESCE((
+        SELECT group_concat(c.comment, char(10))
+        FROM library_publicationannotation c
+        WHERE c.publication_id = p.id AND c.comment != ''
+    ), '')
+FROM library_publication p
+LEFT JOIN library_journal j ON j.id = p.journal_id
+"""
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(CREATE_FTS_TABLE_SQL)
+    except DatabaseError:
+        # SQLite builds without FTS5 use the LIKE based fallback search.
+        return
+    schema_editor.execute(POPULATE_FTS_TABLE_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0004_author_duplicate_candidates"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,73 @@
+from django.db import DatabaseError, migrations, models
+import django.db.models.deletion
+
+PAGE_FTS_TABLE = "library_pdfpage_fts"
+
+CREATE_PAGE_FTS_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {PAGE_FTS_TABLE} USING fts5(
+    text, publication_id UNINDEXED, page_number UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+
+def create_page_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    try:
+        schema_editor.execute(CREATE_PAGE_FTS_TABLE_SQL)
+    except DatabaseError:
+        pass
+
+
+def drop_page_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {PAGE_FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0005_publication_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="publication",
+            name="pdf_text_hash",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.CreateModel(
+            name="PublicationPdfPage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("page_number", models.PositiveIntegerField()),
+                ("text", models.TextField()),
+                (
+                    "publication",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pdf_pages",
+                        to="library.publication",
+                    ),
+                ),
+            ],
+            options={"ordering": ["publication", "page_number"]},
+        ),
+        migrations.AddConstraint(
+            model_name="publicationpdfpage",
+            constraint=models.UniqueConstraint(
+                fields=("publication", "page_number"),
+                name="unique_publication_pdf_page",
+            ),
+        ),
+        migrations.RunPython(create_page_search_index, drop_page_search_index),
+    ]
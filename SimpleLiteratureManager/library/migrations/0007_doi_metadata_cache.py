@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0006_publication_pdf_pages"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DoiMetadataCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("doi", models.CharField(max_length=255, unique=True)),
+                ("status_code", models.PositiveSmallIntegerField()),
+                ("message", models.JSONField(blank=True, null=True)),
+                ("etag", models.CharField(blank=True, max_length=255)),
+                ("last_modified", models.CharField(blank=True, max_length=64)),
+                ("fetched_at", models.DateTimeField()),
+                ("hit_count", models.PositiveIntegerField(default=0)),
+                ("miss_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["doi"],
+            },
+        ),
+    ]
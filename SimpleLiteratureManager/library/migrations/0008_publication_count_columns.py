@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def populate_publication_counts(apps, schema_editor):
+    Publication = apps.get_model("library", "Publication")
+    relations = [
+        (apps.get_model("library", "Tag"), Publication.tags.through, "tag"),
+        (apps.get_model("library", "Project"), Publication.projects.through, "project"),
+        (apps.get_model("library", "Journal"), Publication, "journal"),
+    ]
+    for model, source, field in relations:
+        count = (
+            source.objects.filter(**{field: models.OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=models.Count("*"))
+            .values("total")
+        )
+        model.objects.update(cached_publication_count=Coalesce(models.Subquery(count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0007_doi_metadata_cache"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journal",
+            name="cached_publication_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="cached_publication_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="tag",
+            name="cached_publication_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_publication_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+import logging
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_dois(apps, schema_editor):
+    Publication = apps.get_model("library", "Publication")
+    Publication.objects.filter(doi="").update(doi=None)
+    for publication in Publication.objects.exclude(doi=None).only("doi"):
+        stripped = publication.doi.strip()
+        if stripped != publication.doi:
+            Publication.objects.filter(pk=publication.pk).update(doi=stripped or None)
+
+    # Publications sharing a DOI except for case: the oldest keeps it, the
+    # others lose it so the unique constraint below can be created.
+    kept = {}
+    cleared = []
+    for pk, doi in Publication.objects.exclude(doi=None).order_by("pk").values_list("pk", "doi"):
+        if doi.lower() in kept:
+            logger.warning(
+                "DOI %s von Publikation %s entfernt, Publikation %s behält sie.",
+                doi,
+                pk,
+                kept[doi.lower()],
+            )
+            cleared.append(pk)
+        else:
+            kept[doi.lower()] = pk
+    Publication.objects.filter(pk__in=cleared).update(doi=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0008_publication_count_columns"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_dois, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="author",
+            index=models.Index(fields=["last_name", "first_name"], name="author_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="journal",
+            index=models.Index(fields=["name"], name="journal_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="publication",
+            index=models.Index(fields=["-year", "title"], name="publication_year_title_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="publicationannotation",
+            index=models.Index(
+                fields=["publication", "page_number", "created_at"],
+                name="annotation_page_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="publication",
+            constraint=models.UniqueConstraint(Lower("doi"), name="unique_publication_doi_ci"),
+        ),
+    ]
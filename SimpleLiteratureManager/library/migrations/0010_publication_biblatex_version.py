@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+import library.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0009_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="publication",
+            name="biblatex_version",
+            field=models.PositiveBigIntegerField(
+                default=library.models.initial_biblatex_version, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0010_publication_biblatex_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="publication",
+            name="pdf_linearized",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
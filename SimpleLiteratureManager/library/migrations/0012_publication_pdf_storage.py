@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+import library.models
+import library.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0011_publication_pdf_linearized"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="publication",
+            name="pdf",
+            field=models.FileField(
+                blank=True,
+                max_length=200,
+                null=True,
+                storage=library.storage.pdf_storage,
+                upload_to=library.models.publication_pdf_upload_to,
+            ),
+        ),
+    ]
@@ -1,9 +1,27 @@
 import os
 import re
-
-from django.db import models
-from django.db.models.signals import m2m_changed
-from django.dispatch import receiver
+import secrets
+import threading
+
+from contextlib import ExitStack, contextmanager, nullcontext
+from itertools import chain
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Cast, Concat, Lower
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils.text import slugify
+
+from .duplicates import (
+    DEFAULT_WINDOW,
+    normalize_name,
+    phonetic_code,
+    scored_duplicate_pairs,
+    similarity_score,
+)
+from .storage import pdf_storage
 
 
 def _normalize_filename_component(value, fallback="unknown"):
@@ -12,12 +30,10 @@ def _normalize_filename_component(value, fallback="unknown"):
     return normalized or fallback
 
 
-def publication_pdf_upload_to(instance, filename):
-    base, extension = os.path.splitext(filename)
-
+def publication_pdf_filename(instance, extension):
     pending_authors = getattr(instance, "_pending_ordered_authors", None) or []
     first_author = (pending_authors[0] if pending_authors else None) or (
-        instance.ordered_authors.first() if instance.pk else None
+        instance.first_author if instance.pk else None
     )
 
     year_part = _normalize_filename_component(str(instance.year or "unknown"))
@@ -25,9 +41,77 @@ def publication_pdf_upload_to(instance, filename):
         getattr(first_author, "last_name", None), fallback="UnknownAuthor"
     )
     title_part = _normalize_filename_component(instance.title, fallback="publication")
+    return f"{year_part}_{author_part}_{title_part}{extension}"
+
+
+def publication_pdf_upload_to(instance, filename):
+    # The content-addressed PDF storage only keeps the extension of this name.
+    base, extension = os.path.splitext(filename)
+    return os.path.join("publications", publication_pdf_filename(instance, extension))
+
+
+ORDERED_AUTHORS_ATTR = "prefetched_ordered_authors"
+
+# Sent by Publication.set_authors_in_order, which writes the through rows with
+# bulk operations that do not emit model or m2m signals.
+ordered_authors_changed = Signal()
+
+
+@contextmanager
+def write_transaction():
+    # Like transaction.atomic(), but an outermost block on SQLite starts with
+    # BEGIN IMMEDIATE: write paths that read first (key allocation, merges,
+    # imports) take the write lock up front instead of failing with "database
+    # is locked" when they upgrade. Read-only blocks keep the deferred default.
+    connection = transaction.get_connection()
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        with transaction.atomic():
+            yield
+        return
+
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    with ExitStack() as stack:
+        connection.transaction_mode = "IMMEDIATE"
+        try:
+            stack.enter_context(transaction.atomic())
+        finally:
+            connection.transaction_mode = mode
+        yield
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_derived_fields():
+    # Unit of work for publication writes: saves and author changes inside the
+    # block only register the publication, and its bibtex key is recomputed
+    # once before the block's transaction commits.
+    if getattr(_deferred, "publications", None) is not None:
+        yield
+        return
+
+    _deferred.publications = {}
+    try:
+        with write_transaction():
+            yield
+            pending, _deferred.publications = _deferred.publications, None
+            for publication in pending.values():
+                publication.refresh_derived_fields()
+    finally:
+        _deferred.publications = None
+
+
+def ordered_authors_prefetch(lookup="authors"):
+    return models.Prefetch(
+        lookup,
+        queryset=Author.objects.order_by(
+            "author_publications__position", "author_publications__id"
+        ),
+        to_attr=ORDERED_AUTHORS_ATTR,
+    )
 
-    filename = f"{year_part}_{author_part}_{title_part}{extension}"
-    return os.path.join("publications", filename)
 
 class Author(models.Model):
     first_name = models.CharField(max_length=100)
@@ -35,22 +119,160 @@ class Author(models.Model):
     orcid = models.CharField(max_length=19, blank=True, null=True)
     university = models.CharField(max_length=255, blank=True, null=True)
     department = models.CharField(max_length=255, blank=True, null=True)
+    last_name_key = models.CharField(
+        max_length=100, blank=True, editable=False, db_index=True
+    )
+    phonetic_key = models.CharField(
+        max_length=4, blank=True, editable=False, db_index=True
+    )
 
     class Meta:
         ordering = ["last_name", "first_name"]
+        indexes = [
+            models.Index(fields=["last_name", "first_name"], name="author_name_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.update_name_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "last_name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "last_name_key", "phonetic_key"}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.last_name}, {self.first_name}"
 
+    def update_name_keys(self):
+        self.last_name_key = normalize_name(self.last_name)[:100]
+        self.phonetic_key = phonetic_code(self.last_name)
+
+
+class AuthorDuplicateCandidateManager(models.Manager):
+    def _build(self, first, second, score):
+        if first.pk > second.pk:
+            first, second = second, first
+        return self.model(author_id=first.pk, duplicate_id=second.pk, score=score)
+
+    def refresh_for_author(self, author, window=DEFAULT_WINDOW):
+        self.filter(models.Q(author=author) | models.Q(duplicate=author)).delete()
+        if not author.last_name_key:
+            return []
+
+        others = Author.objects.exclude(pk=author.pk).only("id", "first_name", "last_name")
+        blocked = others.filter(
+            models.Q(last_name_key__startswith=author.last_name_key[:3])
+            | models.Q(phonetic_key=author.phonetic_key)
+        )
+        before = others.filter(last_name_key__lt=author.last_name_key).order_by(
+            "-last_name_key"
+        )[:window]
+        after = others.filter(last_name_key__gte=author.last_name_key).order_by(
+            "last_name_key"
+        )[:window]
+
+        neighbours = {other.pk: other for other in chain(blocked, before, after)}
+        candidates = []
+        for other in neighbours.values():
+            score = similarity_score(author, other)
+            if score is not None:
+                candidates.append(self._build(author, other, score))
+        return self.bulk_create(candidates)
+
+    def refresh_for_authors(self, authors, batch_size=200):
+        # Bulk variant of refresh_for_author for authors created with
+        # bulk_create. Only the blocking keys are looked up; the sorted-window
+        # neighbours are left to rebuild().
+        authors = [author for author in authors if author.last_name_key]
+        if not authors:
+            return []
+        self.filter(
+            models.Q(author__in=authors) | models.Q(duplicate__in=authors)
+        ).delete()
+
+        prefixes = sorted({author.last_name_key[:3] for author in authors})
+        phonetic_keys = sorted({author.phonetic_key for author in authors})
+        others = {}
+        for start in range(0, max(len(prefixes), len(phonetic_keys)), batch_size):
+            condition = models.Q(phonetic_key__in=phonetic_keys[start : start + batch_size])
+            for prefix in prefixes[start : start + batch_size]:
+                condition |= models.Q(last_name_key__startswith=prefix)
+            others.update(
+                (other.pk, other)
+                for other in Author.objects.filter(condition).only(
+                    "id", "first_name", "last_name", "last_name_key", "phonetic_key"
+                )
+            )
+
+        candidates = {}
+        for author in authors:
+            for other in others.values():
+                pair = tuple(sorted((author.pk, other.pk)))
+                if other.pk == author.pk or pair in candidates:
+                    continue
+                if not (
+                    other.last_name_key.startswith(author.last_name_key[:3])
+                    or other.phonetic_key == author.phonetic_key
+                ):
+                    continue
+                score = similarity_score(author, other)
+                if score is not None:
+                    candidates[pair] = self._build(author, other, score)
+        return self.bulk_create(candidates.values())
+
+    def rebuild(self, window=DEFAULT_WINDOW, batch_size=1000):
+        authors = list(Author.objects.only("id", "first_name", "last_name"))
+        created = 0
+        with transaction.atomic():
+            self.all().delete()
+            batch = []
+            for first, second, score in scored_duplicate_pairs(authors, window=window):
+                batch.append(self._build(first, second, score))
+                if len(batch) >= batch_size:
+                    created += len(self.bulk_create(batch))
+                    batch = []
+            created += len(self.bulk_create(batch))
+        return created
+
+
+class AuthorDuplicateCandidate(models.Model):
+    author = models.ForeignKey(
+        Author, related_name="duplicate_candidates", on_delete=models.CASCADE
+    )
+    duplicate = models.ForeignKey(
+        Author, related_name="duplicate_of_candidates", on_delete=models.CASCADE
+    )
+    score = models.FloatField()
+
+    objects = AuthorDuplicateCandidateManager()
+
+    class Meta:
+        ordering = ["-score"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["author", "duplicate"], name="unique_author_duplicate_candidate"
+            ),
+            models.CheckConstraint(
+                condition=models.Q(author__lt=models.F("duplicate")),
+                name="author_duplicate_candidate_ordered",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.author} ~ {self.duplicate} ({self.score:.2f})"
+
 
 class Journal(models.Model):
     name = models.CharField(max_length=255)
     short_name = models.CharField(max_length=100, blank=True, null=True)
     issn = models.CharField(max_length=20, blank=True, null=True)
     publisher = models.CharField(max_length=255, blank=True, null=True)
+    # Maintained by library.counters; the lists use it when
+    # PUBLICATION_COUNT_COLUMNS is enabled.
+    cached_publication_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["name"]
+        indexes = [models.Index(fields=["name"], name="journal_name_idx")]
 
     def __str__(self):
         return self.name
@@ -58,6 +280,7 @@ class Journal(models.Model):
 
 class Tag(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    cached_publication_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["name"]
@@ -69,6 +292,7 @@ class Tag(models.Model):
 class Project(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
+    cached_publication_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["title"]
@@ -77,6 +301,175 @@ class Project(models.Model):
         return self.title
 
 
+# Attempts to store a newly allocated bibtex key before giving up when other
+# writers keep taking the same key.
+BIBTEX_KEY_ATTEMPTS = 5
+
+# Author rows that move by the same distance (an author inserted, removed or
+# moved elsewhere) are shifted with one UPDATE per distance; more distinct
+# distances than this are written with a single CASE update instead.
+AUTHOR_POSITION_SHIFTS = 5
+BIBTEX_KEY_BASES_PER_QUERY = 200
+
+
+def bibtex_key_base(first_author, year):
+    base_name = slugify(first_author.last_name) if first_author else ""
+    return f"{base_name or 'publication'}{year or ''}"
+
+
+def bibtex_key_matches_base(key, base):
+    if key == base:
+        return True
+    suffix = key[len(base) + 1 :] if key.startswith(f"{base}-") else ""
+    return suffix.isdigit() and not suffix.startswith("0") and int(suffix) >= 2
+
+
+def next_free_bibtex_key(base, taken):
+    if base not in taken:
+        return base
+    suffix = 2
+    while f"{base}-{suffix}" in taken:
+        suffix += 1
+    return f"{base}-{suffix}"
+
+
+# Variant name -> (short_first_names, short_journal_names).
+BIBLATEX_VARIANTS = {
+    "full": (False, False),
+    "short": (True, False),
+    "short_journal": (False, True),
+    "short_all": (True, True),
+}
+
+
+def initial_biblatex_version():
+    # Random start so a reused primary key never meets entries cached for a
+    # deleted publication.
+    return secrets.randbelow(2**62)
+
+
+def biblatex_cache_key(pk, version, variant):
+    return f"biblatex:{pk}:{version}:{variant}"
+
+
+class PublicationManager(models.Manager):
+    def biblatex_entries(self, rows, variant="full"):
+        # ``rows`` are (pk, biblatex_version) pairs. Cached entries cost one
+        # cache round trip; the rest is loaded and rendered in two queries.
+        keys = {pk: biblatex_cache_key(pk, version, variant) for pk, version in rows}
+        entries = cache.get_many(keys.values())
+        missing = [pk for pk, key in keys.items() if key not in entries]
+        rendered = {}
+        if missing:
+            rendered = self._render_biblatex_entries(
+                self.filter(pk__in=missing)
+                .select_related("journal")
+                .prefetch_related(ordered_authors_prefetch()),
+                variant,
+            )
+        return [
+            entries[key] if key in entries else rendered[pk]
+            for pk, key in keys.items()
+            if key in entries or pk in rendered
+        ]
+
+    def biblatex_entries_for(self, publications, variant="full"):
+        # Like ``biblatex_entries`` for publications that are already loaded
+        # with their journal and ordered authors: misses need no query.
+        keys = {
+            publication.pk: biblatex_cache_key(publication.pk, publication.biblatex_version, variant)
+            for publication in publications
+        }
+        entries = cache.get_many(keys.values())
+        rendered = self._render_biblatex_entries(
+            [publication for publication in publications if keys[publication.pk] not in entries],
+            variant,
+        )
+        return [
+            entries[keys[publication.pk]]
+            if keys[publication.pk] in entries
+            else rendered[publication.pk]
+            for publication in publications
+        ]
+
+    def _render_biblatex_entries(self, publications, variant):
+        rendered = {
+            publication.pk: publication.render_biblatex_entry(*BIBLATEX_VARIANTS[variant])
+            for publication in publications
+        }
+        if rendered:
+            cache.set_many(
+                {
+                    biblatex_cache_key(publication.pk, publication.biblatex_version, variant): (
+                        rendered[publication.pk]
+                    )
+                    for publication in publications
+                },
+                settings.BIBLATEX_CACHE_TIMEOUT,
+            )
+        return rendered
+
+    def taken_bibtex_keys(self, bases, exclude_pk=None):
+        # Range conditions instead of LIKE so the unique index on bibtex_key is
+        # used; "." is the character following "-". SQLite limits the depth of
+        # an expression, so very many bases are split over several queries.
+        bases = sorted(set(bases))
+        taken = set()
+        for start in range(0, len(bases), BIBTEX_KEY_BASES_PER_QUERY):
+            group = bases[start : start + BIBTEX_KEY_BASES_PER_QUERY]
+            condition = models.Q(bibtex_key__in=group)
+            for base in group:
+                condition |= models.Q(bibtex_key__gt=f"{base}-", bibtex_key__lt=f"{base}.")
+            keys = self.filter(condition)
+            if exclude_pk is not None:
+                keys = keys.exclude(pk=exclude_pk)
+            taken.update(keys.order_by().values_list("bibtex_key", flat=True))
+        return taken
+
+    def allocate_bibtex_key(self, base, exclude_pk=None):
+        return next_free_bibtex_key(base, self.taken_bibtex_keys([base], exclude_pk))
+
+    def assign_bibtex_keys(self, publications, force=False, batch_size=500):
+        # Expects the ordered authors to be prefetched. Keys that still fit their
+        # publication are kept unless ``force`` is set.
+        publications = list(publications)
+        assigned = set()
+        changed = []
+        # With ``force`` every stored key is given up and handed out again, so
+        # the keys of the publications themselves do not count as taken.
+        released = set()
+        if force:
+            released = {p.bibtex_key for p in publications if p.pk and p.bibtex_key}
+        with write_transaction():
+            for start in range(0, len(publications), batch_size):
+                batch = publications[start : start + batch_size]
+                bases = [bibtex_key_base(p.first_author, p.year) for p in batch]
+                taken = (self.taken_bibtex_keys(set(bases)) - released) | assigned
+                for publication, base in zip(batch, bases):
+                    key = publication.bibtex_key
+                    if force or not key or not bibtex_key_matches_base(key, base):
+                        key = next_free_bibtex_key(base, taken)
+                        if key != publication.bibtex_key:
+                            publication.bibtex_key = key
+                            changed.append(publication)
+                    taken.add(key)
+                    assigned.add(key)
+            stored = [publication for publication in changed if publication.pk]
+            if force and stored:
+                # A new key may still be stored on another reassigned row, and
+                # the unique index is checked row by row.
+                for start in range(0, len(stored), batch_size):
+                    self.filter(pk__in=[p.pk for p in stored[start : start + batch_size]]).update(
+                        bibtex_key=Concat(models.Value("~"), Cast("pk", models.CharField()))
+                    )
+            for publication in stored:
+                publication.biblatex_version = models.F("biblatex_version") + 1
+            self.bulk_update(stored, ["bibtex_key", "biblatex_version"], batch_size=batch_size)
+            for publication in stored:
+                del publication.biblatex_version
+        return changed
+
+
 class Publication(models.Model):
     class PublicationType(models.TextChoices):
         ARTICLE = "article", "Artikel"
@@ -104,26 +497,94 @@ class Publication(models.Model):
     abstract = models.TextField(blank=True, null=True)
     pdf = models.FileField(
         upload_to=publication_pdf_upload_to,
+        storage=pdf_storage,
         max_length=200,
         blank=True,
         null=True,
     )
     bibtex_key = models.CharField(max_length=255, unique=True, blank=True, editable=False)
+    pdf_text_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # Set by library.pdf_linearize once the stored file is linearized.
+    pdf_linearized = models.BooleanField(default=False, editable=False)
+    # Part of the cache key of the rendered BibLaTeX entries; raised in SQL by
+    # every change that affects them.
+    biblatex_version = models.PositiveBigIntegerField(
+        default=initial_biblatex_version, editable=False
+    )
+
+    objects = PublicationManager()
 
     class Meta:
         ordering = ["-year", "title"]
+        indexes = [
+            models.Index(fields=["-year", "title"], name="publication_year_title_idx"),
+        ]
+        constraints = [
+            # DOIs are case-insensitive; blank DOIs are stored as NULL.
+            models.UniqueConstraint(Lower("doi"), name="unique_publication_doi_ci"),
+        ]
 
-    def save(self, *args, **kwargs):
-        should_generate = not self.bibtex_key
-        if self.pk and not should_generate:
-            existing = Publication.objects.filter(pk=self.pk).only("year").first()
-            if existing and existing.year != self.year:
-                should_generate = True
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored file name so post_save receivers can tell whether a
+        # new PDF was uploaded.
+        loaded = dict(zip(field_names, values))
+        if "pdf" in loaded:
+            instance._loaded_pdf_name = loaded["pdf"] or ""
+        if "year" in loaded:
+            instance._loaded_year = loaded["year"]
+        if "journal_id" in loaded:
+            instance._loaded_journal_id = loaded["journal_id"]
+        return instance
 
-        if should_generate:
+    def save(self, *args, **kwargs):
+        deferred = getattr(_deferred, "publications", None)
+        year_changed = self.pk is not None and self.year != getattr(self, "_loaded_year", None)
+        # New rows need a key before the insert. A changed year is handled right
+        # away when the authors are known; otherwise at the end of the unit of work.
+        authors_known = hasattr(self, "_pending_ordered_authors") or hasattr(
+            self, ORDERED_AUTHORS_ATTR
+        )
+        if not self.bibtex_key or (year_changed and (deferred is None or authors_known)):
             self.generate_bibtex_key(force=True)
 
-        super().save(*args, **kwargs)
+        if not self._state.adding:
+            self.biblatex_version = models.F("biblatex_version") + 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "biblatex_version"}
+        self._save_with_bibtex_key(*args, **kwargs)
+        # Reloaded on next access instead of keeping the expression around.
+        if isinstance(self.__dict__.get("biblatex_version"), models.Expression):
+            del self.biblatex_version
+        self._loaded_year = self.year
+        if deferred is not None:
+            deferred.setdefault(self.pk, self)
+
+    def _save_with_bibtex_key(self, *args, **kwargs):
+        if not getattr(self, "_bibtex_key_base", None):
+            super().save(*args, **kwargs)
+            return
+
+        for attempt in range(1, BIBTEX_KEY_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError:
+                # A concurrent writer may have stored the same key since it was
+                # allocated; anything else is a real error.
+                key_taken = (
+                    Publication.objects.filter(bibtex_key=self.bibtex_key)
+                    .exclude(pk=self.pk)
+                    .exists()
+                )
+                if attempt == BIBTEX_KEY_ATTEMPTS or not key_taken:
+                    raise
+                self.bibtex_key = Publication.objects.allocate_bibtex_key(
+                    self._bibtex_key_base, exclude_pk=self.pk
+                )
+        self._bibtex_key_base = None
 
     def __str__(self):
         return f"{self.title} ({self.year})"
@@ -132,49 +593,123 @@ class Publication(models.Model):
         if self.bibtex_key and not force:
             return self.bibtex_key
 
-        from django.utils.text import slugify
-
-        first_author = None
-        if self.pk:
-            first_author = self.ordered_authors.first()
-        base_name = slugify(first_author.last_name) if first_author else "publication"
-        if not base_name:
-            base_name = "publication"
-
-        year_part = str(self.year or "")
-        candidate = f"{base_name}{year_part}"
-        suffix = 1
-
-        while (
-            Publication.objects.filter(bibtex_key=candidate)
-            .exclude(pk=self.pk)
-            .exists()
-        ):
-            suffix += 1
-            candidate = f"{base_name}{year_part}-{suffix}"
+        pending_authors = getattr(self, "_pending_ordered_authors", None)
+        if pending_authors is not None:
+            first_author = pending_authors[0] if pending_authors else None
+        else:
+            first_author = self.first_author if self.pk else None
+        base = bibtex_key_base(first_author, self.year)
+        if self.bibtex_key and bibtex_key_matches_base(self.bibtex_key, base):
+            return self.bibtex_key
 
-        self.bibtex_key = candidate
-        return candidate
+        self.bibtex_key = Publication.objects.allocate_bibtex_key(base, exclude_pk=self.pk)
+        self._bibtex_key_base = base
+        return self.bibtex_key
 
     @property
     def ordered_authors(self):
+        # Views prefetch the position-ordered authors into this attribute (see
+        # ``ordered_authors_prefetch``); fall back to a query otherwise.
+        cached = getattr(self, ORDERED_AUTHORS_ATTR, None)
+        if cached is not None:
+            return cached
         return Author.objects.filter(author_publications__publication=self).order_by(
             "author_publications__position", "author_publications__id"
         )
 
+    @property
+    def first_author(self):
+        cached = getattr(self, ORDERED_AUTHORS_ATTR, None)
+        if cached is not None:
+            return cached[0] if cached else None
+        return self.ordered_authors.first()
+
+    @property
+    def pdf_filename(self):
+        # Download name of the stored PDF; derived from the current metadata
+        # because the stored name is the content hash.
+        return publication_pdf_filename(self, os.path.splitext(self.pdf.name or "")[1] or ".pdf")
+
+    def clear_ordered_authors_cache(self):
+        self.__dict__.pop(ORDERED_AUTHORS_ATTR, None)
+
     def set_authors_in_order(self, authors):
         authors = list(authors)
+        changed = self._write_author_order(authors)
+        setattr(self, ORDERED_AUTHORS_ATTR, authors)
+        self.__dict__.pop("_pending_ordered_authors", None)
+        if changed:
+            ordered_authors_changed.send(sender=Publication, instance=self)
+            self.derived_inputs_changed()
+        return authors
 
-        PublicationAuthor.objects.filter(publication=self).delete()
-        PublicationAuthor.objects.bulk_create(
-            [
-                PublicationAuthor(
-                    publication=self, author=author, position=index
-                )
-                for index, author in enumerate(authors, start=1)
-            ]
+    def _write_author_order(self, authors):
+        # Only rows whose author or position changed are written; an unchanged
+        # order costs a single SELECT.
+        positions = {author.pk: index for index, author in enumerate(authors, start=1)}
+        existing = list(
+            PublicationAuthor.objects.filter(publication=self).only("id", "author", "position")
         )
-        return authors
+        stale = [link.pk for link in existing if link.author_id not in positions]
+        moved = [
+            link
+            for link in existing
+            if link.author_id in positions and link.position != positions[link.author_id]
+        ]
+        linked = {link.author_id for link in existing}
+        created = [
+            PublicationAuthor(publication=self, author=author, position=positions[author.pk])
+            for author in authors
+            if author.pk not in linked
+        ]
+        if not (stale or moved or created):
+            return False
+
+        single_statement = not moved and not (stale and created)
+        with nullcontext() if single_statement else transaction.atomic():
+            if stale:
+                PublicationAuthor.objects.filter(pk__in=stale).delete()
+            if moved:
+                # unique_publication_author_position is checked row by row, so
+                # rows that swap or shift positions are first parked above every
+                # current and future position.
+                occupied = {
+                    link.position for link in existing if link.author_id in positions
+                }
+                if any(positions[link.author_id] in occupied for link in moved):
+                    offset = max(occupied) + len(authors)
+                    PublicationAuthor.objects.filter(pk__in=[link.pk for link in moved]).update(
+                        position=models.F("position") + offset
+                    )
+                else:
+                    offset = 0
+                shifts = {}
+                for link in moved:
+                    shifts.setdefault(positions[link.author_id] - link.position, []).append(link.pk)
+                if len(shifts) <= AUTHOR_POSITION_SHIFTS:
+                    for shift, pks in shifts.items():
+                        PublicationAuthor.objects.filter(pk__in=pks).update(
+                            position=models.F("position") + (shift - offset)
+                        )
+                else:
+                    for link in moved:
+                        link.position = positions[link.author_id]
+                    PublicationAuthor.objects.bulk_update(moved, ["position"])
+            if created:
+                PublicationAuthor.objects.bulk_create(created)
+        return True
+
+    def derived_inputs_changed(self):
+        deferred = getattr(_deferred, "publications", None)
+        if deferred is None:
+            self.refresh_derived_fields()
+        else:
+            deferred.setdefault(self.pk, self)
+
+    def refresh_derived_fields(self):
+        previous = self.bibtex_key
+        if self.generate_bibtex_key(force=True) != previous:
+            self.save(update_fields=["bibtex_key"])
 
     def _abbreviate_first_name(self, first_name):
         import re
@@ -206,6 +741,18 @@ class Publication(models.Model):
         return " and ".join(formatted_authors)
 
     def get_biblatex_entry(self, short_first_names=False, short_journal_names=False):
+        flags = (bool(short_first_names), bool(short_journal_names))
+        if self.pk is None:
+            return self.render_biblatex_entry(*flags)
+        variant = next(name for name, value in BIBLATEX_VARIANTS.items() if value == flags)
+        key = biblatex_cache_key(self.pk, self.biblatex_version, variant)
+        entry = cache.get(key)
+        if entry is None:
+            entry = self.render_biblatex_entry(*flags)
+            cache.set(key, entry, settings.BIBLATEX_CACHE_TIMEOUT)
+        return entry
+
+    def render_biblatex_entry(self, short_first_names=False, short_journal_names=False):
         entry_type_map = {
             self.PublicationType.ARTICLE: "article",
             self.PublicationType.PROCEEDINGS: "inproceedings",
@@ -311,11 +858,58 @@ class PublicationAnnotation(models.Model):
 
     class Meta:
         ordering = ["publication", "page_number", "created_at"]
+        indexes = [
+            models.Index(
+                fields=["publication", "page_number", "created_at"],
+                name="annotation_page_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Annotation Seite {self.page_number} für {self.publication.title}"
 
 
+class PublicationPdfPage(models.Model):
+    publication = models.ForeignKey(
+        Publication, related_name="pdf_pages", on_delete=models.CASCADE
+    )
+    page_number = models.PositiveIntegerField()
+    text = models.TextField()
+
+    class Meta:
+        ordering = ["publication", "page_number"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["publication", "page_number"],
+                name="unique_publication_pdf_page",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Seite {self.page_number} von {self.publication.title}"
+
+
+class DoiMetadataCache(models.Model):
+    doi = models.CharField(max_length=255, unique=True)
+    status_code = models.PositiveSmallIntegerField()
+    message = models.JSONField(null=True, blank=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    fetched_at = models.DateTimeField()
+    hit_count = models.PositiveIntegerField(default=0)
+    miss_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["doi"]
+
+    def __str__(self):
+        return f"{self.doi} ({self.status_code})"
+
+    @property
+    def is_negative(self):
+        return self.status_code == 404
+
+
 @receiver(m2m_changed, sender=Publication.authors.through)
 def refresh_bibtex_key_on_authors_change(sender, instance, action, **kwargs):
     if action not in {"post_add", "post_remove", "post_clear"}:
@@ -328,5 +922,56 @@ def refresh_bibtex_key_on_authors_change(sender, instance, action, **kwargs):
         publications = list(instance.publications.all())
 
     for publication in publications:
-        publication.generate_bibtex_key(force=True)
-        publication.save(update_fields=["bibtex_key"])
+        publication.clear_ordered_authors_cache()
+        publication.derived_inputs_changed()
+
+
+def invalidate_biblatex_entries(publications):
+    return publications.update(biblatex_version=models.F("biblatex_version") + 1)
+
+
+@receiver(ordered_authors_changed, sender=Publication)
+def invalidate_biblatex_on_reorder(sender, instance, **kwargs):
+    invalidate_biblatex_entries(Publication.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Publication.authors.through)
+def invalidate_biblatex_on_authors_change(
+    sender, instance, action, reverse, pk_set=None, **kwargs
+):
+    if action == "pre_clear" and reverse:
+        instance._biblatex_cleared_pks = list(instance.publications.values_list("pk", flat=True))
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+    if not reverse:
+        pks = [instance.pk]
+    elif action == "post_clear":
+        pks = instance.__dict__.pop("_biblatex_cleared_pks", [])
+    else:
+        pks = pk_set or ()
+    invalidate_biblatex_entries(Publication.objects.filter(pk__in=pks))
+
+
+@receiver(post_save, sender=Author)
+@receiver(pre_delete, sender=Author)
+def invalidate_biblatex_of_author(sender, instance, created=False, raw=False, **kwargs):
+    if not (created or raw):
+        invalidate_biblatex_entries(Publication.objects.filter(authors=instance))
+
+
+@receiver(post_save, sender=Journal)
+@receiver(pre_delete, sender=Journal)
+def invalidate_biblatex_of_journal(sender, instance, created=False, raw=False, **kwargs):
+    if not (created or raw):
+        invalidate_biblatex_entries(Publication.objects.filter(journal=instance))
+
+
+@receiver(post_save, sender=Author)
+def refresh_duplicate_candidates_on_author_save(
+    sender, instance, created, update_fields, raw=False, **kwargs
+):
+    if raw:
+        return
+    if update_fields is not None and not {"first_name", "last_name"} & set(update_fields):
+        return
+    AuthorDuplicateCandidate.objects.refresh_for_author(instance)
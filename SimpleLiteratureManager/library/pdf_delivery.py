@@ -0,0 +1,106 @@
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat):
+    # Size and modification time, like the ETags of nginx and Apache; hashing
+    # a large file on every request would cost more than sending it.
+    return quote_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+
+
+def parse_range(header, size):
+    # Returns the inclusive (start, end) of a single byte range, None when the
+    # whole file should be sent (no header, several ranges or an invalid one)
+    # and False when the range lies outside the file.
+    match = RANGE_PATTERN.match((header or "").strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        if not length or not size:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return False
+    if end < start:
+        return None
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request, field, filename, content_type="application/pdf"):
+    # Range requests let pdf.js fetch the pages it renders instead of the whole
+    # file. With PDF_ACCEL_REDIRECT_PREFIX nginx sends the file (ranges
+    # included) and Django only checks the request.
+    try:
+        stat = os.stat(field.path)
+    except FileNotFoundError:
+        raise Http404("Die Datei wurde nicht gefunden.")
+
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": "private, no-cache",
+    }
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None and settings.PDF_ACCEL_REDIRECT_PREFIX:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = (
+            settings.PDF_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + quote(field.name)
+        )
+        response["Content-Disposition"] = content_disposition_header(False, filename)
+    elif response is None:
+        byte_range = parse_range(request.headers.get("Range"), stat.st_size)
+        if_range = request.headers.get("If-Range")
+        if byte_range is not None and if_range and if_range not in {etag, last_modified}:
+            byte_range = None
+
+        if byte_range is None:
+            response = FileResponse(
+                open(field.path, "rb"), content_type=content_type, filename=filename
+            )
+        elif byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(field.path, start, end - start + 1),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Length"] = end - start + 1
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            response["Content-Disposition"] = content_disposition_header(False, filename)
+
+    for name, value in headers.items():
+        response[name] = value
+    return response
@@ -0,0 +1,129 @@
+import logging
+import os
+import re
+import tempfile
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+try:
+    import pikepdf
+except ImportError:  # pikepdf is optional; without it files are left as uploaded.
+    pikepdf = None
+
+from .models import Publication
+from .pdf_text import file_sha256, get_executor
+from .storage import pdf_storage
+
+logger = logging.getLogger(__name__)
+
+# The linearization dictionary has to be the first object of the file.
+LINEARIZED_PATTERN = re.compile(rb"<<[^>]*/Linearized\s")
+HEADER_BYTES = 1024
+
+
+def linearization_available():
+    return pikepdf is not None
+
+
+def is_linearized(path):
+    with open(path, "rb") as handle:
+        return LINEARIZED_PATTERN.search(handle.read(HEADER_BYTES)) is not None
+
+
+def linearize_pdf_file(path):
+    # Runs inside worker processes, so it must not touch the database or the
+    # storage. Writes the linearized copy to a temporary file and returns the
+    # content hashes before and after with its path; the hashes are equal and
+    # the path is None when the file was already linearized.
+    original_hash = file_sha256(path)
+    if is_linearized(path):
+        return original_hash, original_hash, None
+
+    handle, temporary = tempfile.mkstemp(prefix="linearize-", suffix=".pdf")
+    os.close(handle)
+    try:
+        with pikepdf.open(path) as pdf:
+            # A fixed /ID gives shared uploads the same linearized blob.
+            pdf.save(temporary, linearize=True, deterministic_id=True)
+        if not is_linearized(temporary):
+            raise ValueError("Die Datei konnte nicht linearisiert werden.")
+        return original_hash, file_sha256(temporary), temporary
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def store_linearization(publication_id, pdf_name, original_hash, new_hash, linearized_path=None):
+    # Stored files are named by their content and may be shared, so the
+    # linearized copy is saved as a new file and only the row that still
+    # points to the original is switched over; a newer upload keeps its own
+    # state. The text does not change, so a stored text hash follows the file.
+    rows = Publication.objects.filter(pk=publication_id, pdf=pdf_name)
+    new_name = pdf_name
+    if linearized_path is not None:
+        try:
+            if not rows.exists():
+                return False
+            with open(linearized_path, "rb") as handle:
+                new_name = pdf_storage().save(pdf_name, File(handle))
+        finally:
+            os.unlink(linearized_path)
+
+    with transaction.atomic():
+        updated = rows.update(pdf=new_name, pdf_linearized=True)
+        if updated and original_hash != new_hash:
+            Publication.objects.filter(pk=publication_id, pdf_text_hash=original_hash).update(
+                pdf_text_hash=new_hash
+            )
+    return bool(updated)
+
+
+def _store_future_result(publication_id, pdf_name, future):
+    try:
+        store_linearization(publication_id, pdf_name, *future.result())
+    except Exception:
+        logger.exception("PDF-Linearisierung für Publikation %s fehlgeschlagen.", publication_id)
+    finally:
+        connection.close()
+
+
+def schedule_linearization(publication):
+    if not (settings.PDF_LINEARIZE and linearization_available() and publication.pdf):
+        return
+
+    publication_id, pdf_name, path = publication.pk, publication.pdf.name, publication.pdf.path
+
+    def submit():
+        if not settings.PDF_TEXT_WORKERS:
+            try:
+                store_linearization(publication_id, pdf_name, *linearize_pdf_file(path))
+            except Exception:
+                logger.exception(
+                    "PDF-Linearisierung für Publikation %s fehlgeschlagen.", publication_id
+                )
+            return
+        future = get_executor().submit(linearize_pdf_file, path)
+        future.add_done_callback(partial(_store_future_result, publication_id, pdf_name))
+
+    transaction.on_commit(submit)
+
+
+@receiver(pre_save, sender=Publication)
+def reset_linearization_on_upload(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and "pdf" not in update_fields):
+        return
+    pdf = instance.pdf
+    if (pdf.name or "") != getattr(instance, "_loaded_pdf_name", "") or not pdf._committed:
+        instance.pdf_linearized = False
+        instance._pdf_replaced = True
+
+
+@receiver(post_save, sender=Publication)
+def linearize_after_upload(sender, instance, raw=False, **kwargs):
+    if instance.__dict__.pop("_pdf_replaced", False):
+        schedule_linearization(instance)
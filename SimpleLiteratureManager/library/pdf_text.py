@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf is optional; without it no text is extracted.
+    PdfReader = None
+
+from .models import Publication, PublicationPdfPage
+from .search import index_pdf_pages
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_executor = None
+
+
+def extraction_available():
+    return PdfReader is not None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_pdf_file(path, known_hash=""):
+    # Runs inside worker processes, so it must not touch the database. Returns
+    # ``None`` as page list when the file content is unchanged.
+    content_hash = file_sha256(path)
+    if content_hash == known_hash:
+        return content_hash, None
+
+    reader = PdfReader(path)
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(page.extract_text() or "")
+        except Exception:
+            # A single broken page should not drop the text of the whole file.
+            pages.append("")
+    return content_hash, pages
+
+
+def store_pdf_pages(publication_id, content_hash, pages):
+    if pages is None:
+        return False
+
+    with transaction.atomic():
+        updated = Publication.objects.filter(pk=publication_id).update(
+            pdf_text_hash=content_hash
+        )
+        if not updated:
+            return False
+        PublicationPdfPage.objects.filter(publication_id=publication_id).delete()
+        PublicationPdfPage.objects.bulk_create(
+            [
+                PublicationPdfPage(
+                    publication_id=publication_id, page_number=number, text=text
+                )
+                for number, text in enumerate(pages, start=1)
+                if text.strip()
+            ]
+        )
+        index_pdf_pages([publication_id])
+    return True
+
+
+def clear_pdf_pages(publication_id):
+    with transaction.atomic():
+        Publication.objects.filter(pk=publication_id).update(pdf_text_hash="")
+        PublicationPdfPage.objects.filter(publication_id=publication_id).delete()
+        index_pdf_pages([publication_id])
+
+
+def extract_publication(publication, force=False):
+    if not publication.pdf:
+        clear_pdf_pages(publication.pk)
+        return False
+    content_hash, pages = extract_pdf_file(
+        publication.pdf.path, "" if force else publication.pdf_text_hash
+    )
+    return store_pdf_pages(publication.pk, content_hash, pages)
+
+
+def worker_pool(max_workers):
+    # Spawned rather than forked: a forked worker would inherit the parent's
+    # database connections and threads. The workers only set up Django so the
+    # task functions can be imported.
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
+
+
+def get_executor():
+    # One pool per server process, fed after commit. Jobs still queued when the
+    # process exits or reloads are lost; their publications keep a stale
+    # pdf_text_hash (and pdf_linearized=False), so the extract_pdf_text and
+    # linearize_pdfs commands pick them up again.
+    global _executor
+    if _executor is None:
+        _executor = worker_pool(settings.PDF_TEXT_WORKERS)
+    return _executor
+
+
+def _store_future_result(publication_id, future):
+    # Done callbacks run on the executor's management thread, which gets its own
+    # database connection.
+    try:
+        content_hash, pages = future.result()
+        store_pdf_pages(publication_id, content_hash, pages)
+    except Exception:
+        logger.exception("PDF-Textextraktion für Publikation %s fehlgeschlagen.", publication_id)
+    finally:
+        connection.close()
+
+
+def schedule_extraction(publication):
+    publication_id = publication.pk
+    if not publication.pdf:
+        transaction.on_commit(partial(clear_pdf_pages, publication_id))
+        return
+    if not extraction_available():
+        return
+
+    path, known_hash = publication.pdf.path, publication.pdf_text_hash
+
+    def submit():
+        if not settings.PDF_TEXT_WORKERS:
+            try:
+                store_pdf_pages(publication_id, *extract_pdf_file(path, known_hash))
+            except Exception:
+                logger.exception(
+                    "PDF-Textextraktion für Publikation %s fehlgeschlagen.", publication_id
+                )
+            return
+        future = get_executor().submit(extract_pdf_file, path, known_hash)
+        future.add_done_callback(partial(_store_future_result, publication_id))
+
+    transaction.on_commit(submit)
+
+
+@receiver(post_save, sender=Publication)
+def extract_text_after_upload(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and "pdf" not in update_fields):
+        return
+    pdf_name = instance.pdf.name or ""
+    if pdf_name == getattr(instance, "_loaded_pdf_name", ""):
+        return
+    instance._loaded_pdf_name = pdf_name
+    schedule_extraction(instance)
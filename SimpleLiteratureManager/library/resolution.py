@@ -0,0 +1,211 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .duplicates import normalize_name
+from .models import Author, AuthorDuplicateCandidate, Journal
+
+ORCID_PATTERN = re.compile(r"(\d{4})-?(\d{4})-?(\d{4})-?(\d{3}[\dX])", re.IGNORECASE)
+ORCID_PREFIXES = ("https://orcid.org/", "http://orcid.org/")
+ISSN_PATTERN = re.compile(r"(\d{4})-?(\d{3}[\dX])", re.IGNORECASE)
+
+# Keeps the number of parameters of a single lookup query bounded.
+LOOKUP_BATCH_SIZE = 500
+
+
+def normalize_orcid(value):
+    match = ORCID_PATTERN.search(value or "")
+    return "-".join(match.groups()).upper() if match else None
+
+
+def normalize_issn(value):
+    match = ISSN_PATTERN.search(value or "")
+    return "-".join(match.groups()).upper() if match else None
+
+
+def clean_name(value, max_length=100):
+    return " ".join(unicodedata.normalize("NFC", value or "").split())[:max_length]
+
+
+def name_part(value):
+    value = unicodedata.normalize("NFKD", value or "").casefold()
+    return "".join(char for char in value if char.isalnum())
+
+
+def name_key(first_name, last_name):
+    # Case, accents, spacing and punctuation are ignored.
+    return (name_part(last_name), name_part(first_name))
+
+
+def _batches(values, size=LOOKUP_BATCH_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class Resolver:
+    # Resolves the authors and journals of imported records with a few bulk
+    # queries instead of one get_or_create per name. Everything found or
+    # created is memoized, so one instance is meant to live for one request or
+    # import run.
+
+    def __init__(self, refresh_duplicates=True):
+        self.refresh_duplicates = refresh_duplicates
+        self.authors_created = 0
+        self.journals_created = 0
+        self.clear()
+
+    def clear(self):
+        self._authors_by_orcid = {}
+        self._authors_by_name = defaultdict(list)
+        self._journals_by_issn = {}
+        self._journals_by_name = {}
+
+    def _remember_author(self, author):
+        orcid = normalize_orcid(author.orcid)
+        if orcid:
+            self._authors_by_orcid.setdefault(orcid, author)
+        self._authors_by_name[name_key(author.first_name, author.last_name)].append(author)
+
+    def _find_author(self, first_name, last_name, orcid):
+        if orcid and orcid in self._authors_by_orcid:
+            return self._authors_by_orcid[orcid]
+        # A name match with a different ORCID is another person.
+        for author in self._authors_by_name.get(name_key(first_name, last_name), ()):
+            known = normalize_orcid(author.orcid)
+            if not (orcid and known and known != orcid):
+                return author
+        return None
+
+    def _load_authors(self, entries):
+        for batch in _batches(entries):
+            orcids = {orcid for _, _, orcid in batch if orcid}
+            last_name_keys = set()
+            last_names = set()
+            for _, last_name, _ in batch:
+                key = normalize_name(last_name)[:100]
+                if key:
+                    last_name_keys.add(key)
+                else:
+                    last_names.add(last_name)
+            orcid_values = [
+                prefix + orcid for orcid in orcids for prefix in ("", *ORCID_PREFIXES)
+            ]
+            condition = (
+                Q(orcid__in=orcid_values)
+                | Q(last_name_key__in=last_name_keys)
+                | Q(last_name__in=last_names)
+            )
+            for author in Author.objects.filter(condition).order_by("pk"):
+                self._remember_author(author)
+
+    def author_lists(self, lists):
+        # ``lists`` holds one list of {"first_name", "last_name", "orcid"} dicts
+        # per publication; the result holds the matching authors in the same
+        # order, without empty names and repetitions.
+        lists = [
+            [
+                (
+                    clean_name(person.get("first_name")),
+                    clean_name(person.get("last_name")),
+                    normalize_orcid(person.get("orcid")),
+                )
+                for person in people
+            ]
+            for people in lists
+        ]
+        entries = [entry for people in lists for entry in people if entry[0] or entry[1]]
+        self._load_authors(
+            {entry for entry in entries if self._find_author(*entry) is None}
+        )
+
+        created = []
+        completed = []
+        for first_name, last_name, orcid in entries:
+            author = self._find_author(first_name, last_name, orcid)
+            if author is None:
+                author = Author(first_name=first_name, last_name=last_name, orcid=orcid)
+                author.update_name_keys()
+                self._remember_author(author)
+                created.append(author)
+            elif orcid and not normalize_orcid(author.orcid):
+                author.orcid = orcid
+                self._authors_by_orcid[orcid] = author
+                completed.append(author)
+
+        if created or completed:
+            with transaction.atomic():
+                if created:
+                    Author.objects.bulk_create(created)
+                    self.authors_created += len(created)
+                    if self.refresh_duplicates:
+                        AuthorDuplicateCandidate.objects.refresh_for_authors(created)
+                if completed:
+                    Author.objects.bulk_update(completed, ["orcid"])
+
+        resolved = []
+        for people in lists:
+            authors = []
+            for entry in people:
+                if not (entry[0] or entry[1]):
+                    continue
+                author = self._find_author(*entry)
+                if all(author.pk != other.pk for other in authors):
+                    authors.append(author)
+            resolved.append(authors)
+        return resolved
+
+    def authors(self, people):
+        return self.author_lists([people])[0]
+
+    def _remember_journal(self, journal):
+        issn = normalize_issn(journal.issn)
+        if issn:
+            self._journals_by_issn.setdefault(issn, journal)
+        self._journals_by_name.setdefault(journal.name.lower(), journal)
+
+    def _find_journal(self, name, issn):
+        if issn and issn in self._journals_by_issn:
+            return self._journals_by_issn[issn]
+        return self._journals_by_name.get(name.lower())
+
+    def _load_journals(self, entries):
+        for batch in _batches(entries):
+            # Stored ISSNs are not normalized, so both spellings are looked up.
+            issns = {
+                variant for _, issn in batch if issn for variant in (issn, issn.replace("-", ""))
+            }
+            names = {name for name, _ in batch}
+            condition = (
+                Q(issn__in=issns)
+                | Q(name__in=names)
+                | Q(name_lower__in={name.lower() for name in names})
+            )
+            journals = Journal.objects.alias(name_lower=Lower("name")).filter(condition)
+            for journal in journals.order_by("pk"):
+                self._remember_journal(journal)
+
+    def journals(self, items):
+        # ``items`` holds (name, issn) pairs; an empty name resolves to None.
+        entries = [(clean_name(name, 255), normalize_issn(issn)) for name, issn in items]
+        named = [entry for entry in entries if entry[0]]
+        self._load_journals({entry for entry in named if self._find_journal(*entry) is None})
+
+        created = []
+        for name, issn in named:
+            if self._find_journal(name, issn) is None:
+                journal = Journal(name=name, issn=issn or "", publisher="")
+                self._remember_journal(journal)
+                created.append(journal)
+        if created:
+            Journal.objects.bulk_create(created)
+            self.journals_created += len(created)
+
+        return [self._find_journal(*entry) if entry[0] else None for entry in entries]
+
+    def journal(self, name, issn=None):
+        return self.journals([(name, issn)])[0]
@@ -0,0 +1,335 @@
+import re
+import threading
+
+from django.db import connection, models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import (
+    Author,
+    Journal,
+    Publication,
+    PublicationAnnotation,
+    PublicationPdfPage,
+    ordered_authors_changed,
+    ordered_authors_prefetch,
+)
+
+FTS_TABLE = "library_publication_fts"
+FTS_COLUMNS = ["title", "abstract", "doi", "bibtex_key", "authors", "journal", "annotations"]
+# bm25 weights in FTS_COLUMNS order: title hits rank far above comment hits.
+FTS_WEIGHTS = [10.0, 2.0, 5.0, 5.0, 4.0, 3.0, 1.0]
+PAGE_FTS_TABLE = "library_pdfpage_fts"
+
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+SNIPPET_TOKENS = 16
+DEFAULT_LIMIT = 50
+INDEX_BATCH_SIZE = 500
+
+_pending = threading.local()
+_fts_tables = {}
+
+
+def fts_available(table=FTS_TABLE):
+    if connection.vendor != "sqlite":
+        return False
+    key = (connection.settings_dict["NAME"], table)
+    if key not in _fts_tables:
+        _fts_tables[key] = table in connection.introspection.table_names()
+    return _fts_tables[key]
+
+
+def _in_placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def _documents(publication_ids):
+    publications = (
+        Publication.objects.filter(pk__in=publication_ids)
+        .select_related("journal")
+        .prefetch_related(ordered_authors_prefetch(), "annotations")
+    )
+    for publication in publications:
+        journal = publication.journal
+        yield (
+            publication.pk,
+            publication.title,
+            publication.abstract or "",
+            publication.doi or "",
+            publication.bibtex_key or "",
+            " ".join(
+                f"{author.first_name} {author.last_name}"
+                for author in publication.ordered_authors
+            ),
+            " ".join(filter(None, [journal.name, journal.short_name])) if journal else "",
+            "\n".join(
+                annotation.comment
+                for annotation in publication.annotations.all()
+                if annotation.comment
+            ),
+        )
+
+
+def index_publications(publication_ids):
+    publication_ids = list(publication_ids)
+    if not publication_ids or not fts_available():
+        return
+
+    placeholders = ", ".join(["%s"] * (len(FTS_COLUMNS) + 1))
+    removed = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(publication_ids), INDEX_BATCH_SIZE):
+            batch = publication_ids[start : start + INDEX_BATCH_SIZE]
+            documents = list(_documents(batch))
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({_in_placeholders(batch)})",
+                batch,
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                documents,
+            )
+            indexed = {document[0] for document in documents}
+            removed.extend(pk for pk in batch if pk not in indexed)
+    # Page rows vanish with their publication through the cascade.
+    index_pdf_pages(removed)
+
+
+def index_pdf_pages(publication_ids):
+    publication_ids = list(publication_ids)
+    if not publication_ids or not fts_available(PAGE_FTS_TABLE):
+        return
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(publication_ids), INDEX_BATCH_SIZE):
+            batch = publication_ids[start : start + INDEX_BATCH_SIZE]
+            cursor.execute(
+                f"DELETE FROM {PAGE_FTS_TABLE} WHERE publication_id IN ({_in_placeholders(batch)})",
+                batch,
+            )
+            cursor.executemany(
+                f"INSERT INTO {PAGE_FTS_TABLE} (rowid, text, publication_id, page_number) "
+                "VALUES (%s, %s, %s, %s)",
+                PublicationPdfPage.objects.filter(publication_id__in=batch)
+                .values_list("pk", "text", "publication_id", "page_number")
+                .iterator(),
+            )
+
+
+def rebuild_index():
+    if not fts_available():
+        return 0
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            if fts_available(PAGE_FTS_TABLE):
+                cursor.execute(f"DELETE FROM {PAGE_FTS_TABLE}")
+        publication_ids = list(Publication.objects.values_list("pk", flat=True))
+        index_publications(publication_ids)
+        index_pdf_pages(
+            PublicationPdfPage.objects.values_list("publication_id", flat=True).distinct()
+        )
+    return len(publication_ids)
+
+
+def _flush_pending():
+    publication_ids = getattr(_pending, "ids", None)
+    if not publication_ids:
+        return
+    _pending.ids = set()
+    index_publications(publication_ids)
+
+
+def schedule_reindex(publication_ids):
+    # Collect the touched publications and index them once when the transaction
+    # commits; ids left over from a rolled back transaction are simply re-read.
+    if not hasattr(_pending, "ids"):
+        _pending.ids = set()
+    _pending.ids.update(publication_ids)
+    transaction.on_commit(_flush_pending)
+
+
+def _fts_query(query):
+    terms = re.findall(r"\w+", query, flags=re.UNICODE)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _highlight(snippet):
+    highlighted = escape(snippet)
+    highlighted = highlighted.replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>")
+    return mark_safe(highlighted)
+
+
+def _load_publications(publication_ids):
+    publications = Publication.objects.select_related("journal").prefetch_related(
+        ordered_authors_prefetch(), "tags", "projects"
+    )
+    return publications.in_bulk(publication_ids)
+
+
+def _fts_search(query, limit):
+    match = _fts_query(query)
+    if not match:
+        return []
+
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, snippet({FTS_TABLE}, -1, %s, %s, '…', %s), "
+            f"bm25({FTS_TABLE}, {weights}) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+            [SNIPPET_START, SNIPPET_END, SNIPPET_TOKENS, match, limit],
+        )
+        rows = cursor.fetchall()
+
+    publications = _load_publications([row[0] for row in rows])
+    return [
+        {"publication": publications[pk], "snippet": _highlight(snippet), "rank": rank}
+        for pk, snippet, rank in rows
+        if pk in publications
+    ]
+
+
+def _fallback_search(query, limit):
+    terms = re.findall(r"\w+", query, flags=re.UNICODE)
+    if not terms:
+        return []
+
+    publications = Publication.objects.all()
+    for term in terms:
+        publications = publications.filter(
+            models.Q(title__icontains=term)
+            | models.Q(abstract__icontains=term)
+            | models.Q(doi__icontains=term)
+            | models.Q(bibtex_key__icontains=term)
+            | models.Q(authors__last_name__icontains=term)
+            | models.Q(authors__first_name__icontains=term)
+            | models.Q(journal__name__icontains=term)
+            | models.Q(annotations__comment__icontains=term)
+        )
+    publication_ids = list(publications.values_list("pk", flat=True).distinct()[:limit])
+    loaded = _load_publications(publication_ids)
+    return [
+        {
+            "publication": loaded[pk],
+            "snippet": _highlight((loaded[pk].abstract or "")[:200]),
+            "rank": None,
+        }
+        for pk in publication_ids
+    ]
+
+
+def _page_excerpt(text, term, width=120):
+    position = text.lower().find(term.lower())
+    start = max(position - width // 2, 0) if position >= 0 else 0
+    excerpt = text[start : start + width]
+    if position >= 0:
+        offset = position - start
+        excerpt = (
+            excerpt[:offset]
+            + SNIPPET_START
+            + excerpt[offset : offset + len(term)]
+            + SNIPPET_END
+            + excerpt[offset + len(term) :]
+        )
+    return ("…" if start else "") + excerpt + "…"
+
+
+def search_pdf_pages(query, limit=DEFAULT_LIMIT):
+    terms = re.findall(r"\w+", (query or "").strip(), flags=re.UNICODE)
+    if not terms:
+        return []
+
+    if fts_available(PAGE_FTS_TABLE):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT publication_id, page_number, "
+                f"snippet({PAGE_FTS_TABLE}, 0, %s, %s, '…', %s), bm25({PAGE_FTS_TABLE}) AS rank "
+                f"FROM {PAGE_FTS_TABLE} WHERE {PAGE_FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+                [SNIPPET_START, SNIPPET_END, SNIPPET_TOKENS, _fts_query(query), limit],
+            )
+            rows = cursor.fetchall()
+    else:
+        pages = PublicationPdfPage.objects.all()
+        for term in terms:
+            pages = pages.filter(text__icontains=term)
+        rows = [
+            (page.publication_id, page.page_number, _page_excerpt(page.text, terms[0]), None)
+            for page in pages[:limit]
+        ]
+
+    publications = _load_publications({row[0] for row in rows})
+    return [
+        {
+            "publication": publications[publication_id],
+            "page_number": page_number,
+            "snippet": _highlight(snippet),
+            "rank": rank,
+        }
+        for publication_id, page_number, snippet, rank in rows
+        if publication_id in publications
+    ]
+
+
+def search_publications(query, limit=DEFAULT_LIMIT):
+    query = (query or "").strip()
+    if not query:
+        return []
+    if fts_available():
+        return _fts_search(query, limit)
+    return _fallback_search(query, limit)
+
+
+@receiver(post_save, sender=Publication)
+@receiver(post_delete, sender=Publication)
+def reindex_saved_publication(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_reindex([instance.pk])
+
+
+@receiver(ordered_authors_changed, sender=Publication)
+def reindex_reordered_publication(sender, instance, **kwargs):
+    schedule_reindex([instance.pk])
+
+
+@receiver(m2m_changed, sender=Publication.authors.through)
+def reindex_on_authors_change(sender, instance, action, reverse, pk_set=None, **kwargs):
+    if action == "pre_clear" and reverse:
+        instance._search_cleared_pks = list(instance.publications.values_list("pk", flat=True))
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+    if not reverse:
+        schedule_reindex([instance.pk])
+    elif action == "post_clear":
+        schedule_reindex(instance.__dict__.pop("_search_cleared_pks", []))
+    else:
+        schedule_reindex(pk_set or ())
+
+
+@receiver(post_save, sender=PublicationAnnotation)
+@receiver(post_delete, sender=PublicationAnnotation)
+def reindex_annotated_publication(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_reindex([instance.publication_id])
+
+
+@receiver(post_save, sender=Author)
+@receiver(pre_delete, sender=Author)
+def reindex_author_publications(sender, instance, created=False, raw=False, **kwargs):
+    if not (created or raw):
+        schedule_reindex(instance.publications.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Journal)
+@receiver(pre_delete, sender=Journal)
+def reindex_journal_publications(sender, instance, created=False, raw=False, **kwargs):
+    if not (created or raw):
+        schedule_reindex(instance.publication_set.values_list("pk", flat=True))
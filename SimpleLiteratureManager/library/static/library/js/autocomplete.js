@@ -0,0 +1,202 @@
+(function () {
+    const DEBOUNCE_MS = 200;
+
+    const debounce = (callback) => {
+        let timer = null;
+        return (...args) => {
+            clearTimeout(timer);
+            timer = setTimeout(() => callback(...args), DEBOUNCE_MS);
+        };
+    };
+
+    // Returns a search function that only hands the newest response to
+    // onResults, so slow answers to old queries cannot overwrite newer ones.
+    const createSearch = (url, onResults) => {
+        let latest = 0;
+        return async (query) => {
+            const request = ++latest;
+            const params = new URLSearchParams({ q: query });
+            let results = [];
+            try {
+                const response = await fetch(`${url}?${params}`, {
+                    headers: { Accept: "application/json" },
+                });
+                if (response.ok) {
+                    results = (await response.json()).results || [];
+                }
+            } catch (error) {
+                results = [];
+            }
+            if (request === latest) {
+                onResults(results);
+            }
+        };
+    };
+
+    window.setupAutocompleteDualList = ({
+        hiddenSelectId,
+        availableSelectId,
+        selectedSelectId,
+        filterInputId,
+        addButtonId,
+        removeButtonId,
+        moveUpButtonId,
+        moveDownButtonId,
+        orderInputId,
+    }) => {
+        const hiddenSelect = document.getElementById(hiddenSelectId);
+        const availableSelect = document.getElementById(availableSelectId);
+        const selectedSelect = document.getElementById(selectedSelectId);
+        const filterInput = document.getElementById(filterInputId);
+        const addButton = document.getElementById(addButtonId);
+        const removeButton = document.getElementById(removeButtonId);
+        const moveUpButton = moveUpButtonId ? document.getElementById(moveUpButtonId) : null;
+        const moveDownButton = moveDownButtonId ? document.getElementById(moveDownButtonId) : null;
+        const orderInput = orderInputId ? document.getElementById(orderInputId) : null;
+
+        if (!hiddenSelect || !availableSelect || !selectedSelect) {
+            return;
+        }
+
+        // The server renders only the selected options; labels of everything
+        // found later are remembered here.
+        const labels = new Map(
+            Array.from(hiddenSelect.options).map((option) => [option.value, option.text]),
+        );
+        let selectedOrder = (orderInput?.value || "")
+            .split(",")
+            .map((value) => value.trim())
+            .filter((value) => labels.has(value));
+        Array.from(hiddenSelect.options).forEach((option) => {
+            if (!selectedOrder.includes(option.value)) {
+                selectedOrder.push(option.value);
+            }
+        });
+        let results = [];
+
+        const renderLists = () => {
+            const selectedSet = new Set(selectedOrder);
+            availableSelect.replaceChildren(
+                ...results
+                    .filter((result) => !selectedSet.has(result.value))
+                    .map((result) => new Option(result.text, result.value)),
+            );
+            selectedSelect.replaceChildren(
+                ...selectedOrder.map((value) => new Option(labels.get(value), value)),
+            );
+        };
+
+        const syncHiddenFields = () => {
+            hiddenSelect.replaceChildren(
+                ...selectedOrder.map((value) => new Option(labels.get(value), value, true, true)),
+            );
+            if (orderInput) {
+                orderInput.value = selectedOrder.join(",");
+            }
+        };
+
+        const search = createSearch(hiddenSelect.dataset.autocompleteUrl, (found) => {
+            results = found.map((result) => ({ value: String(result.id), text: result.text }));
+            results.forEach((result) => labels.set(result.value, result.text));
+            renderLists();
+        });
+
+        const moveOptions = (fromSelect, markSelected) => {
+            const values = Array.from(fromSelect.selectedOptions).map((option) => option.value);
+            if (!values.length) {
+                return;
+            }
+            if (markSelected) {
+                values
+                    .filter((value) => !selectedOrder.includes(value))
+                    .forEach((value) => selectedOrder.push(value));
+            } else {
+                selectedOrder = selectedOrder.filter((value) => !values.includes(value));
+            }
+            renderLists();
+            syncHiddenFields();
+        };
+
+        const reorderSelection = (direction) => {
+            const selectedIds = new Set(
+                Array.from(selectedSelect.selectedOptions).map((option) => option.value),
+            );
+            if (!selectedIds.size) {
+                return;
+            }
+
+            const step = direction === "up" ? -1 : 1;
+            const indices = selectedOrder
+                .map((value, index) => (selectedIds.has(value) ? index : -1))
+                .filter((index) => index >= 0)
+                .sort((a, b) => (direction === "up" ? a - b : b - a));
+            const reordered = [...selectedOrder];
+            indices.forEach((currentIndex) => {
+                const newIndex = currentIndex + step;
+                if (newIndex < 0 || newIndex >= reordered.length) {
+                    return;
+                }
+                [reordered[newIndex], reordered[currentIndex]] = [
+                    reordered[currentIndex],
+                    reordered[newIndex],
+                ];
+            });
+
+            selectedOrder = reordered;
+            renderLists();
+            syncHiddenFields();
+            Array.from(selectedSelect.options).forEach((option) => {
+                option.selected = selectedIds.has(option.value);
+            });
+        };
+
+        addButton?.addEventListener("click", () => moveOptions(availableSelect, true));
+        removeButton?.addEventListener("click", () => moveOptions(selectedSelect, false));
+        availableSelect.addEventListener("dblclick", () => moveOptions(availableSelect, true));
+        selectedSelect.addEventListener("dblclick", () => moveOptions(selectedSelect, false));
+        moveUpButton?.addEventListener("click", () => reorderSelection("up"));
+        moveDownButton?.addEventListener("click", () => reorderSelection("down"));
+        filterInput?.addEventListener(
+            "input",
+            debounce(() => search(filterInput.value.trim())),
+        );
+        hiddenSelect.form?.addEventListener("submit", syncHiddenFields);
+
+        renderLists();
+        syncHiddenFields();
+        search("");
+    };
+
+    window.setupAutocompleteSelect = ({ selectId, filterInputId }) => {
+        const select = document.getElementById(selectId);
+        const filterInput = document.getElementById(filterInputId);
+        if (!select || !filterInput) {
+            return;
+        }
+
+        const emptyOption = Array.from(select.options).find((option) => option.value === "");
+        const search = createSearch(select.dataset.autocompleteUrl, (found) => {
+            const current = select.selectedOptions[0];
+            const options = [];
+            if (emptyOption) {
+                options.push(emptyOption);
+            }
+            if (current && current !== emptyOption) {
+                options.push(current);
+            }
+            found
+                .filter((result) => String(result.id) !== current?.value)
+                .forEach((result) => options.push(new Option(result.text, String(result.id))));
+            select.replaceChildren(...options);
+            if (current) {
+                current.selected = true;
+            }
+        });
+
+        filterInput.addEventListener(
+            "input",
+            debounce(() => search(filterInput.value.trim())),
+        );
+        search("");
+    };
+})();
@@ -359,8 +359,10 @@
             renderAnnotations();
         });
 
+        // Without streaming and background fetching pdf.js requests only the
+        // byte ranges of the pages it renders.
         pdfjsLib
-            .getDocument(pdfUrl)
+            .getDocument({ url: pdfUrl, disableStream: true, disableAutoFetch: true })
             .promise.then((doc) => {
                 pdfViewer.setDocument(doc);
                 linkService.setDocument(doc, null);
@@ -0,0 +1,52 @@
+import hashlib
+import os
+import re
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils.deconstruct import deconstructible
+
+CONTENT_DIRECTORY = "pdfs"
+# Two levels of two hex digits: 65,536 directories keep even millions of files
+# at a few entries per directory.
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+CONTENT_NAME_PATTERN = re.compile(
+    rf"^{CONTENT_DIRECTORY}/(?:[0-9a-f]{{{SHARD_WIDTH}}}/){{{SHARD_LEVELS}}}[0-9a-f]{{64}}(\.\w+)?$"
+)
+
+
+def content_name(digest, extension=""):
+    shards = [
+        digest[level * SHARD_WIDTH : (level + 1) * SHARD_WIDTH] for level in range(SHARD_LEVELS)
+    ]
+    return "/".join([CONTENT_DIRECTORY, *shards, digest + extension.lower()])
+
+
+def is_content_name(name):
+    return bool(CONTENT_NAME_PATTERN.match(name or ""))
+
+
+@deconstructible(path="library.storage.ContentAddressedStorage")
+class ContentAddressedStorage(FileSystemStorage):
+    # Stores every file under the SHA-256 of its content, so identical uploads
+    # share one file and names never go stale. Only the extension of the name
+    # chosen by upload_to is kept; the readable name is used for downloads
+    # (Publication.pdf_filename).
+
+    def __init__(self, *args, allow_overwrite=True, **kwargs):
+        super().__init__(*args, allow_overwrite=allow_overwrite, **kwargs)
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        name = content_name(digest.hexdigest(), os.path.splitext(name)[1])
+        if self.exists(name):
+            return name
+        # A concurrent upload of the same content writes the same bytes, so
+        # overwriting is harmless.
+        return super()._save(name, content)
+
+
+def pdf_storage():
+    return storages["pdfs"]
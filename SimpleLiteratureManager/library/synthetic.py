@@ -0,0 +1,250 @@
+import math
+import random
+from types import SimpleNamespace
+
+from django.db import connection, transaction
+
+from .counters import refresh_all_publication_counts
+from .models import (
+    ORDERED_AUTHORS_ATTR,
+    Author,
+    AuthorDuplicateCandidate,
+    Journal,
+    Project,
+    Publication,
+    PublicationAnnotation,
+    PublicationAuthor,
+    PublicationPdfPage,
+    Tag,
+)
+from .search import rebuild_index
+
+SYLLABLES = [
+    "ba", "be", "ber", "ch", "da", "der", "en", "er", "fi", "ga", "hal", "han",
+    "ka", "ker", "la", "ler", "li", "ma", "mann", "mei", "mi", "mo", "na", "ne",
+    "ri", "ro", "sa", "sch", "ser", "sto", "ta", "ter", "to", "wa", "we", "zi",
+]
+FIRST_NAMES = [
+    "Anna", "Benedikt", "Clara", "Daniel", "Elena", "Felix", "Greta", "Hannes",
+    "Ida", "Jonas", "Katharina", "Lukas", "Marie", "Niklas", "Olga", "Paul",
+    "Rosa", "Stefan", "Theresa", "Ulrich", "Vera", "Wei", "Xenia", "Yusuf",
+]
+WORDS = [
+    "adaptive", "analysis", "bayesian", "climate", "cohort", "data", "deep", "dynamics",
+    "effects", "evidence", "field", "framework", "genome", "graph", "imaging", "learning",
+    "model", "network", "neural", "observation", "optimal", "protein", "quantum", "random",
+    "regional", "response", "sampling", "signal", "soil", "spatial", "study", "survey",
+    "systems", "temporal", "theory", "transfer", "urban", "variation", "water", "yield",
+]
+PUBLICATION_TYPES = [
+    Publication.PublicationType.ARTICLE,
+    Publication.PublicationType.PROCEEDINGS,
+    Publication.PublicationType.BOOK,
+]
+PUBLICATION_TYPE_WEIGHTS = [75, 18, 7]
+
+# Deleted in this order by clear_library (children before parents).
+LIBRARY_MODELS = [
+    PublicationPdfPage,
+    PublicationAnnotation,
+    PublicationAuthor,
+    Publication.tags.through,
+    Publication.projects.through,
+    Publication,
+    AuthorDuplicateCandidate,
+    Author,
+    Journal,
+    Tag,
+    Project,
+]
+
+
+def synthetic_authors(count, seed=0, duplicate_rate=0.05):
+    rng = random.Random(seed)
+    authors = []
+    for author_id in range(1, count + 1):
+        if authors and rng.random() < duplicate_rate:
+            original = rng.choice(authors)
+            first_name, last_name = original.first_name, original.last_name
+            if rng.random() < 0.5:
+                first_name = f"{first_name[0]}."
+            else:
+                position = rng.randrange(len(last_name))
+                last_name = last_name[:position] + last_name[position + 1 :]
+        else:
+            last_name = "".join(
+                rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))
+            ).capitalize()
+            first_name = rng.choice(FIRST_NAMES)
+        authors.append(
+            SimpleNamespace(id=author_id, first_name=first_name, last_name=last_name)
+        )
+    return authors
+
+
+def skewed_index(rng, size, exponent=2.0):
+    # Small indices are picked far more often, like productive authors, large
+    # journals and popular tags.
+    return int(size * rng.random() ** exponent)
+
+
+def author_list_length(rng):
+    # Mostly short author lists with a long tail of consortium papers.
+    if rng.random() < 0.005:
+        return rng.randint(50, 300)
+    return min(1 + int(rng.expovariate(1 / 3)), 30)
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def library_dimensions(publications):
+    return {
+        "authors": max(10, int(publications * 0.6)),
+        "journals": max(5, publications // 25),
+        "tags": max(10, int(math.sqrt(publications) * 3)),
+        "projects": max(3, publications // 200),
+    }
+
+
+def clear_library():
+    # Raw deletes: the ORM would run the delete signals once per row.
+    with transaction.atomic(), connection.cursor() as cursor:
+        for model in LIBRARY_MODELS:
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+    rebuild_index()
+
+
+def _publication_batch(rng, start, count, seed, authors, journals, tags, projects):
+    publications = []
+    for index in range(start, start + count):
+        publication = Publication(
+            title=_words(rng, rng.randint(4, 12)).capitalize(),
+            year=rng.randint(1990, 2025),
+            doi=f"10.5555/synthetic.{seed}.{index}" if rng.random() < 0.8 else None,
+            publication_type=rng.choices(PUBLICATION_TYPES, PUBLICATION_TYPE_WEIGHTS)[0],
+            journal=journals[skewed_index(rng, len(journals))] if rng.random() < 0.9 else None,
+            volume=str(rng.randint(1, 80)),
+            pages=f"{rng.randint(1, 900)}-{rng.randint(901, 1200)}",
+            abstract=_words(rng, rng.randint(30, 60)).capitalize() + ".",
+        )
+        ordered = {}
+        for _ in range(author_list_length(rng)):
+            author = authors[skewed_index(rng, len(authors), exponent=1.5)]
+            ordered.setdefault(author.pk, author)
+        setattr(publication, ORDERED_AUTHORS_ATTR, list(ordered.values()))
+        publication.synthetic_tags = {
+            tags[skewed_index(rng, len(tags))].pk for _ in range(rng.choice([0, 1, 1, 2, 3, 5]))
+        }
+        publication.synthetic_projects = {
+            projects[skewed_index(rng, len(projects))].pk
+            for _ in range(rng.choice([0, 0, 1, 1, 2, 3]))
+        }
+        publications.append(publication)
+    return publications
+
+
+def _annotations(rng, publication):
+    if rng.random() >= 0.2:
+        return []
+    return [
+        PublicationAnnotation(
+            publication=publication,
+            page_number=rng.randint(1, 20),
+            x=rng.random() * 0.8,
+            y=rng.random() * 0.9,
+            width=0.2,
+            height=0.05,
+            comment=_words(rng, rng.randint(0, 12)),
+        )
+        for _ in range(rng.randint(1, 15))
+    ]
+
+
+def generate_library(publications, seed=0, batch_size=5000):
+    # Writes a reproducible synthetic library with bulk inserts. Author lists,
+    # journals, tags and projects follow skewed distributions and about 5% of
+    # the authors are misspelled or abbreviated duplicates.
+    rng = random.Random(seed)
+    dimensions = library_dimensions(publications)
+    with transaction.atomic():
+        authors = []
+        for synthetic in synthetic_authors(dimensions["authors"], seed=seed):
+            author = Author(first_name=synthetic.first_name, last_name=synthetic.last_name)
+            author.update_name_keys()
+            authors.append(author)
+        authors = Author.objects.bulk_create(authors, batch_size=batch_size)
+        journals = Journal.objects.bulk_create(
+            Journal(
+                name=f"Journal of {_words(rng, 2).title()} {index}",
+                issn=f"{rng.randrange(10000):04d}-{rng.randrange(1000):03d}{rng.randrange(10)}",
+                publisher=rng.choice(["Springer", "Elsevier", "Wiley", "De Gruyter"]),
+            )
+            for index in range(dimensions["journals"])
+        )
+        tags = Tag.objects.bulk_create(
+            Tag(name=f"{rng.choice(WORDS)}-{index}") for index in range(dimensions["tags"])
+        )
+        projects = Project.objects.bulk_create(
+            Project(title=f"Projekt {_words(rng, 2).title()} {index}")
+            for index in range(dimensions["projects"])
+        )
+
+        annotation_count = 0
+        for start in range(0, publications, batch_size):
+            batch = _publication_batch(
+                rng,
+                start,
+                min(batch_size, publications - start),
+                seed,
+                authors,
+                journals,
+                tags,
+                projects,
+            )
+            Publication.objects.assign_bibtex_keys(batch, batch_size=batch_size)
+            Publication.objects.bulk_create(batch, batch_size=batch_size)
+            PublicationAuthor.objects.bulk_create(
+                (
+                    PublicationAuthor(publication=publication, author=author, position=position)
+                    for publication in batch
+                    for position, author in enumerate(
+                        getattr(publication, ORDERED_AUTHORS_ATTR), start=1
+                    )
+                ),
+                batch_size=batch_size,
+            )
+            Publication.tags.through.objects.bulk_create(
+                (
+                    Publication.tags.through(publication_id=publication.pk, tag_id=tag_id)
+                    for publication in batch
+                    for tag_id in publication.synthetic_tags
+                ),
+                batch_size=batch_size,
+            )
+            Publication.projects.through.objects.bulk_create(
+                (
+                    Publication.projects.through(
+                        publication_id=publication.pk, project_id=project_id
+                    )
+                    for publication in batch
+                    for project_id in publication.synthetic_projects
+                ),
+                batch_size=batch_size,
+            )
+            annotations = [
+                annotation for publication in batch for annotation in _annotations(rng, publication)
+            ]
+            PublicationAnnotation.objects.bulk_create(annotations, batch_size=batch_size)
+            annotation_count += len(annotations)
+
+        refresh_all_publication_counts()
+        candidates = AuthorDuplicateCandidate.objects.rebuild()
+    rebuild_index()
+    return {
+        "publications": publications,
+        **dimensions,
+        "annotations": annotation_count,
+        "duplicate_candidates": candidates,
+    }
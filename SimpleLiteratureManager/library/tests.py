@@ -1,3 +1,1941 @@
-from django.test import TestCase
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import (
+    autocomplete,
+    bib_import,
+    doi_import,
+    export,
+    instrumentation,
+    pdf_linearize,
+    pdf_text,
+    resolution,
+    search,
+    synthetic,
+)
+from . import urls, views
+from .duplicates import candidate_pairs, find_duplicate_groups
+from .forms import PublicationForm
+from .models import (
+    Author,
+    AuthorDuplicateCandidate,
+    DoiMetadataCache,
+    Journal,
+    Project,
+    Publication,
+    PublicationAnnotation,
+    PublicationAuthor,
+    PublicationPdfPage,
+    Tag,
+    deferred_derived_fields,
+    ordered_authors_prefetch,
+    write_transaction,
+)
+from .storage import content_name
+
+
+def make_pdf(page_texts):
+    objects = []
+    page_ids = [4 + index * 2 for index in range(len(page_texts))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for page_id, text in zip(page_ids, page_texts):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref_offset,
+    )
+    return bytes(output)
+
+
+def create_publication(title, year=2020, authors=(), journal=None, tags=(), projects=()):
+    publication = Publication.objects.create(title=title, year=year, journal=journal)
+    publication.set_authors_in_order(authors)
+    publication.tags.set(tags)
+    publication.projects.set(projects)
+    return publication
+
+
+CROSSREF_WORKS = {
+    "10.1000/alpha": {
+        "title": ["Alpha Study"],
+        "issued": {"date-parts": [[2021]]},
+        "container-title": ["Journal of Tests"],
+        "author": [{"given": "Ada", "family": "Lovelace"}],
+        "type": "journal-article",
+    },
+    "10.1000/beta": {
+        "title": ["Beta Study"],
+        "issued": {"date-parts": [[2022]]},
+        "author": [{"given": "Ada", "family": "Lovelace"}, {"given": "Alan", "family": "Turing"}],
+        "type": "book",
+    },
+}
+
+
+class CrossrefStandIn(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        doi = self.path.split("/works/", 1)[1]
+        self.requests.append(doi)
+        message = CROSSREF_WORKS.get(doi.lower())
+        etag = f'"{doi.lower()}"'
+        if message and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200 if message else 404)
+        self.send_header("Content-Type", "application/json")
+        if message:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if message:
+            self.wfile.write(json.dumps({"message": message}).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+class CrossrefServerMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.crossref = ThreadingHTTPServer(("127.0.0.1", 0), CrossrefStandIn)
+        threading.Thread(target=cls.crossref.serve_forever, daemon=True).start()
+        cls.addClassCleanup(cls.crossref.server_close)
+        cls.addClassCleanup(cls.crossref.shutdown)
+        cls.crossref_settings = override_settings(
+            CROSSREF_API_URL=f"http://127.0.0.1:{cls.crossref.server_port}/works/"
+        )
+        cls.crossref_settings.enable()
+        cls.addClassCleanup(cls.crossref_settings.disable)
+
+    def setUp(self):
+        super().setUp()
+        CrossrefStandIn.requests = []
+
+
+class OrderedAuthorsTests(TestCase):
+    def setUp(self):
+        self.first = Author.objects.create(first_name="Zoe", last_name="Zimmer")
+        self.second = Author.objects.create(first_name="Anna", last_name="Adler")
+
+    def test_prefetched_authors_keep_position_order(self):
+        create_publication("Ordered", authors=[self.first, self.second])
+        create_publication("Reversed", authors=[self.second, self.first])
+
+        publication, reversed_publication = Publication.objects.prefetch_related(
+            ordered_authors_prefetch()
+        ).order_by("title")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                publication.ordered_authors, [self.first, self.second]
+            )
+            self.assertEqual(publication.first_author, self.first)
+            self.assertIn("Zimmer, Zoe and Adler, Anna", publication.biblatex_entry)
+            self.assertEqual(
+                reversed_publication.ordered_authors, [self.second, self.first]
+            )
+
+    def test_unprefetched_authors_fall_back_to_query(self):
+        publication = create_publication("Ordered", authors=[self.second, self.first])
+        publication = Publication.objects.get(pk=publication.pk)
+
+        self.assertEqual(list(publication.ordered_authors), [self.second, self.first])
+
+    def test_reordering_writes_only_changed_rows(self):
+        authors = [self.first, self.second] + [
+            Author.objects.create(first_name="A", last_name=f"Author{index}") for index in range(8)
+        ]
+        publication = create_publication("Consortium", authors=authors)
+        untouched = PublicationAuthor.objects.get(publication=publication, author=authors[5])
+
+        appended = authors + [Author.objects.create(first_name="B", last_name="New")]
+        swapped = [*appended[:2], appended[3], appended[2], *appended[4:]]
+        removed = [author for author in swapped if author != authors[4]]
+        cases = [
+            ("unchanged", authors, 1),
+            ("appended", appended, 3),
+            ("swapped", swapped, 7),
+            ("removed", removed, 7),
+        ]
+        for name, order, queries in cases:
+            with self.subTest(name):
+                publication = Publication.objects.get(pk=publication.pk)
+                with self.assertNumQueries(queries):
+                    publication.set_authors_in_order(order)
+                publication = Publication.objects.get(pk=publication.pk)
+                self.assertEqual(list(publication.ordered_authors), order)
+                links = PublicationAuthor.objects.filter(publication=publication)
+                self.assertEqual(
+                    [link.position for link in links], list(range(1, len(order) + 1))
+                )
+
+        # Rows that keep their author are updated in place, never recreated.
+        self.assertTrue(PublicationAuthor.objects.filter(pk=untouched.pk).exists())
+
+
+class ListViewQueryCountTests(TestCase):
+    def build_library(self, count):
+        journal = Journal.objects.create(name=f"Journal {count}")
+        tag = Tag.objects.create(name=f"Tag {count}")
+        project = Project.objects.create(title=f"Project {count}")
+        authors = [
+            Author.objects.create(first_name=f"First{i}", last_name=f"Last{i}")
+            for i in range(3)
+        ]
+        for index in range(count):
+            create_publication(
+                f"Publication {count}-{index}",
+                authors=authors,
+                journal=journal,
+                tags=[tag],
+                projects=[project],
+            )
+        return {
+            "publication_list": reverse("publication_list"),
+            "journal_detail": reverse("journal_detail", args=[journal.pk]),
+            "tag_detail": reverse("tag_detail", args=[tag.pk]),
+            "author_detail": reverse("author_detail", args=[authors[0].pk]),
+            "project_detail": reverse("project_detail", args=[project.pk]),
+            "project_list": reverse("project_list"),
+            "tag_list": reverse("tag_list"),
+            "journal_list": reverse("journal_list"),
+        }
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        small = self.build_library(2)
+        large = self.build_library(20)
+
+        for name in small:
+            with self.subTest(view=name):
+                self.assertEqual(
+                    self.count_queries(small[name]), self.count_queries(large[name])
+                )
+
+
+class RequestMetricsTests(TestCase):
+    # Views that call Crossref or change data on GET are left out.
+    SKIPPED_VIEWS = {"publication_update_from_doi", "author_delete", "author_merge"}
+
+    def setUp(self):
+        journal = Journal.objects.create(name="Journal")
+        tag = Tag.objects.create(name="Tag")
+        project = Project.objects.create(title="Project")
+        self.authors = [
+            Author.objects.create(first_name="Ada", last_name="Lovelace"),
+            Author.objects.create(first_name="A.", last_name="Lovelace"),
+        ]
+        self.publications = [
+            create_publication(
+                f"Publication {index}",
+                authors=self.authors,
+                journal=journal,
+                tags=[tag],
+                projects=[project],
+            )
+            for index in range(5)
+        ]
+        annotation = PublicationAnnotation.objects.create(
+            publication=self.publications[0], page_number=1, x=0, y=0, width=0.1, height=0.1
+        )
+        self.pks = {
+            "authors": self.authors[0].pk,
+            "journals": journal.pk,
+            "tags": tag.pk,
+            "projects": project.pk,
+            "publications": self.publications[0].pk,
+            "annotation_id": annotation.pk,
+        }
+        search.rebuild_index()
+
+    def url_for(self, pattern):
+        route = str(pattern.pattern)
+        kwargs = {}
+        if "<int:pk>" in route:
+            kwargs["pk"] = self.pks[route.split("/")[0]]
+        if "<int:annotation_id>" in route:
+            kwargs["annotation_id"] = self.pks["annotation_id"]
+        if "<str:kind>" in route:
+            kwargs["kind"] = "authors"
+        return reverse(pattern.name, kwargs=kwargs)
+
+    def test_views_stay_within_their_query_budgets(self):
+        patterns = [p for p in urls.urlpatterns if p.name not in self.SKIPPED_VIEWS]
+        with instrumentation.recorded_requests() as recorded:
+            for pattern in patterns:
+                self.client.get(self.url_for(pattern))
+            self.client.get(reverse("publication_search"), {"q": "Publication"})
+            self.client.get(reverse("publication_search"), {"q": "Publication", "format": "json"})
+            self.client.get(reverse("publication_list"), {"year": 2020, "format": "json"})
+            self.client.get(
+                reverse("publication_list"),
+                {
+                    "journal": self.pks["journals"],
+                    "tag": self.pks["tags"],
+                    "project": self.pks["projects"],
+                },
+            )
+            for kind in autocomplete.SOURCES:
+                self.client.get(reverse("autocomplete", args=[kind]), {"q": "Pub Lo"})
+
+        self.assertEqual(len(recorded), len(patterns) + 4 + len(autocomplete.SOURCES))
+        budgeted = {summary["view"] for summary in recorded if summary["query_budget"]}
+        self.assertIn("publication_list", budgeted)
+        self.assertIn("project_detail", budgeted)
+
+    def test_exceeded_budget_fails_or_warns(self):
+        with mock.patch.object(views.publication_list, "query_budget", (2, {"GET"})):
+            with instrumentation.recorded_requests():
+                with self.assertRaises(instrumentation.QueryBudgetExceeded):
+                    self.client.get(reverse("publication_list"))
+
+            with instrumentation.recorded_requests(enforce_budgets=False) as recorded:
+                with self.assertLogs("library.instrumentation", "WARNING"):
+                    self.client.get(reverse("publication_list"))
+        self.assertEqual(recorded[0]["query_budget"], 2)
+        self.assertGreater(recorded[0]["queries"], 2)
+
+    def test_server_timing_and_json_log(self):
+        self.assertNotIn("Server-Timing", self.client.get(reverse("publication_list")))
+
+        with override_settings(REQUEST_METRICS=True, REQUEST_METRICS_LOG=True):
+            with self.assertLogs("library.request_metrics", "INFO") as logs:
+                response = self.client.get(reverse("project_list"))
+
+        summary = json.loads(logs.records[0].getMessage())
+        self.assertEqual(summary["view"], "project_list")
+        self.assertEqual(summary["queries"], 1)
+        self.assertGreater(summary["template_ms"], 0)
+        self.assertEqual(len(summary["slowest_queries"]), 1)
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+
+
+class PublicationListPaginationTests(TestCase):
+    def setUp(self):
+        self.journal = Journal.objects.create(name="Journal")
+        self.tag = Tag.objects.create(name="Tag")
+        for index in range(7):
+            create_publication(
+                f"Title {index % 3}",
+                year=2000 + index % 2,
+                journal=self.journal if index % 2 else None,
+                tags=[self.tag] if index < 3 else [],
+            )
+
+    def collect_pages(self, **params):
+        url = reverse("publication_list")
+        params = {"format": "json", "page_size": 2, **params}
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            data = response.json()
+            ids.extend(row["id"] for row in data["results"])
+            if not data["next_url"]:
+                return ids
+            response = self.client.get(url + data["next_url"])
+
+    def test_keyset_pages_follow_model_ordering(self):
+        expected = list(
+            Publication.objects.order_by("-year", "title", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(self.collect_pages(), expected)
+
+    def test_keyset_pages_for_alternative_sort(self):
+        expected = list(
+            Publication.objects.order_by("-title", "-year", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(self.collect_pages(sort="-title"), expected)
+
+    def test_filters_restrict_results(self):
+        expected = set(
+            Publication.objects.filter(journal=self.journal, tags=self.tag).values_list(
+                "id", flat=True
+            )
+        )
+        ids = self.collect_pages(journal=self.journal.pk, tag=self.tag.pk)
+        self.assertEqual(set(ids), expected)
+        self.assertEqual(self.collect_pages(has_pdf="1"), [])
+
+    def test_malformed_cursor_starts_from_the_first_page(self):
+        first_page = self.client.get(
+            reverse("publication_list"), {"format": "json", "page_size": 2}
+        ).json()["results"]
+        for values in [["x", "y", "z"], [{"a": 1}, "t", 1], [None, None, None], [2000, "t"]]:
+            with self.subTest(values=values):
+                cursor = views._encode_cursor(values)
+                response = self.client.get(
+                    reverse("publication_list"),
+                    {"format": "json", "page_size": 2, "cursor": cursor},
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["results"], first_page)
+
+    def test_html_page_is_limited_to_page_size(self):
+        response = self.client.get(reverse("publication_list"), {"page_size": 3})
+        self.assertEqual(len(response.context["publications"]), 3)
+        self.assertIsNotNone(response.context["next_url"])
+
+
+class AuthorDuplicateDetectionTests(TestCase):
+    def test_groups_abbreviations_and_typos(self):
+        authors = [
+            SimpleNamespace(id=1, first_name="Katharina", last_name="Schneider"),
+            SimpleNamespace(id=2, first_name="K.", last_name="Schneider"),
+            SimpleNamespace(id=3, first_name="Katharina", last_name="Schnieder"),
+            SimpleNamespace(id=4, first_name="Katharina", last_name="Weber"),
+            SimpleNamespace(id=5, first_name="Paul", last_name="Schneider"),
+        ]
+
+        groups = find_duplicate_groups(authors)
+
+        self.assertEqual(
+            [sorted(author.id for author in group) for group in groups], [[1, 2, 3]]
+        )
+
+    def test_candidate_pairs_skip_unrelated_authors(self):
+        authors = [
+            SimpleNamespace(id=index, first_name="Anna", last_name=name)
+            for index, name in enumerate(["Adler", "Berg", "Czerny", "Dietrich", "Engel"])
+        ]
+
+        pairs = list(candidate_pairs(authors, window=0))
+
+        self.assertEqual(pairs, [])
+
+
+class AuthorDuplicateCandidateTests(TestCase):
+    def test_candidates_follow_author_changes(self):
+        first = Author.objects.create(first_name="Maria", last_name="Huber")
+        second = Author.objects.create(first_name="M.", last_name="Huber")
+
+        candidate = AuthorDuplicateCandidate.objects.get()
+        self.assertEqual((candidate.author, candidate.duplicate), (first, second))
+
+        second.last_name = "Weber"
+        second.save()
+        self.assertFalse(AuthorDuplicateCandidate.objects.exists())
+
+        second.last_name = "Hubers"
+        second.save()
+        self.assertTrue(AuthorDuplicateCandidate.objects.exists())
+
+        first.delete()
+        self.assertFalse(AuthorDuplicateCandidate.objects.exists())
+
+    def test_rebuild_command_recreates_candidates(self):
+        Author.objects.create(first_name="Maria", last_name="Huber")
+        Author.objects.create(first_name="M.", last_name="Huber")
+        AuthorDuplicateCandidate.objects.all().delete()
+
+        call_command("rebuild_author_duplicates", stdout=StringIO())
+
+        self.assertEqual(AuthorDuplicateCandidate.objects.count(), 1)
+
+    def test_duplicates_page_reads_stored_candidates(self):
+        Author.objects.create(first_name="Maria", last_name="Huber")
+        Author.objects.create(first_name="M.", last_name="Huber")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("author_duplicates"))
+
+        self.assertEqual(len(response.context["duplicate_groups"]), 1)
+
+
+class AuthorMergeTests(TestCase):
+    def setUp(self):
+        self.target = Author.objects.create(first_name="Maria", last_name="Huber")
+        self.duplicate = Author.objects.create(
+            first_name="M.", last_name="Huber", orcid="0000-0001-2345-6789"
+        )
+        self.other = Author.objects.create(first_name="Paul", last_name="Weber")
+
+    def positions(self, publication):
+        return list(
+            publication.publication_authors.values_list("author_id", "position")
+        )
+
+    def merge(self, **data):
+        return self.client.post(
+            reverse("author_merge", args=[self.target.pk, self.duplicate.pk]),
+            {"keep": "primary", **data},
+        )
+
+    def test_merge_resolves_position_conflicts(self):
+        both_later = create_publication("A", authors=[self.other, self.target, self.duplicate])
+        duplicate_first = create_publication("B", authors=[self.duplicate, self.other, self.target])
+        only_duplicate = create_publication("C", authors=[self.duplicate])
+
+        self.merge(orcid_source="duplicate")
+
+        self.assertFalse(Author.objects.filter(pk=self.duplicate.pk).exists())
+        self.target.refresh_from_db()
+        self.assertEqual(self.target.orcid, "0000-0001-2345-6789")
+        self.assertEqual(self.positions(both_later), [(self.other.pk, 1), (self.target.pk, 2)])
+        self.assertEqual(
+            self.positions(duplicate_first), [(self.target.pk, 1), (self.other.pk, 2)]
+        )
+        self.assertEqual(self.positions(only_duplicate), [(self.target.pk, 1)])
+        self.assertEqual(
+            set(Publication.objects.values_list("bibtex_key", flat=True)),
+            {"weber2020", "huber2020", "huber2020-2"},
+        )
+
+    def test_merge_query_count_does_not_grow_with_publications(self):
+        def merge_queries(publication_count):
+            self.duplicate = Author.objects.create(first_name="M.", last_name="Huber")
+            for index in range(publication_count):
+                create_publication(f"P{index}", authors=[self.duplicate, self.other])
+            with CaptureQueriesContext(connection) as queries:
+                self.merge()
+            return len(queries)
+
+        self.assertEqual(merge_queries(2), merge_queries(20))
+
+    def test_batch_merge_from_duplicates_page(self):
+        publication = create_publication("A", authors=[self.duplicate])
+        target = Author.objects.get(pk=self.target.pk)
+
+        response = self.client.post(reverse("author_merge_groups"), {"groups": [target.pk]})
+
+        self.assertRedirects(response, reverse("author_duplicates"))
+        self.assertEqual(list(Author.objects.filter(last_name="Huber")), [target])
+        target.refresh_from_db()
+        self.assertEqual(target.orcid, "0000-0001-2345-6789")
+        self.assertEqual(self.positions(publication), [(target.pk, 1)])
+
+    def test_batch_merge_ignores_unselected_groups(self):
+        self.client.post(reverse("author_merge_groups"), {"groups": [self.other.pk]})
+
+        self.assertEqual(Author.objects.filter(last_name="Huber").count(), 2)
+
+
+class PublicationSearchTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            author = Author.objects.create(first_name="Ada", last_name="Lovelace")
+            journal = Journal.objects.create(name="Analytical Engines")
+            self.publication = create_publication(
+                "Notes on the engine", year=1843, authors=[author], journal=journal
+            )
+            PublicationAnnotation.objects.create(
+                publication=self.publication,
+                page_number=1,
+                x=0,
+                y=0,
+                width=1,
+                height=1,
+                comment="Bernoulli numbers",
+            )
+            create_publication("Unrelated paper", year=2000)
+
+    def test_search_matches_related_fields(self):
+        self.assertTrue(search.fts_available())
+        for query in ["engine", "lovelace", "Analytical", "bernoulli", "engi"]:
+            with self.subTest(query=query):
+                results = search.search_publications(query)
+                self.assertEqual([r["publication"] for r in results], [self.publication])
+
+    def test_snippets_are_highlighted_and_escaped(self):
+        result = search.search_publications("notes")[0]
+        self.assertIn("<mark>Notes</mark>", result["snippet"])
+
+    def test_index_follows_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.publication.delete()
+        self.assertEqual(search.search_publications("lovelace"), [])
+
+    def test_index_follows_author_side_changes(self):
+        author = self.publication.authors.get()
+        other = create_publication("Second note", year=1844)
+        with self.captureOnCommitCallbacks(execute=True):
+            author.publications.remove(self.publication)
+            author.publications.add(other)
+        self.assertEqual(
+            [r["publication"] for r in search.search_publications("ada")], [other]
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            author.publications.clear()
+        self.assertEqual(search.search_publications("ada"), [])
+
+    def test_fallback_search_without_fts(self):
+        with mock.patch("library.search.fts_available", return_value=False):
+            results = search.search_publications("bernoulli")
+        self.assertEqual([r["publication"] for r in results], [self.publication])
+
+    def test_search_view(self):
+        response = self.client.get(reverse("publication_search"), {"q": "lovelace"})
+        self.assertContains(response, "Notes on the engine")
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.ada = Author.objects.create(
+            first_name="Ada", last_name="Lovelace", orcid="0000-0002-1825-0097"
+        )
+        self.annie = Author.objects.create(first_name="Annie", last_name="Lovelace")
+        Author.objects.create(first_name="Alan", last_name="Turing")
+        self.journal = Journal.objects.create(name="Analytical Engines")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.publication = create_publication(
+                "Notes on the engine", year=1843, authors=[self.ada], journal=self.journal
+            )
+
+    def results(self, kind, **params):
+        response = self.client.get(reverse("autocomplete", args=[kind]), params)
+        self.assertEqual(response.status_code, 200)
+        return [(result["id"], result["text"]) for result in response.json()["results"]]
+
+    def test_authors_match_every_term_or_the_orcid(self):
+        self.assertEqual(
+            self.results("authors", q="love"),
+            [(self.ada.pk, "Lovelace, Ada"), (self.annie.pk, "Lovelace, Annie")],
+        )
+        self.assertEqual(self.results("authors", q="ada LOVE"), [(self.ada.pk, "Lovelace, Ada")])
+        self.assertEqual(
+            self.results("authors", q="https://orcid.org/0000-0002-1825-0097"),
+            [(self.ada.pk, "Lovelace, Ada")],
+        )
+        self.assertEqual(len(self.results("authors", limit=2)), 2)
+
+    def test_every_term_is_checked_in_the_query(self):
+        crowd = [Author(first_name="Jane", last_name=f"J{index:03d}") for index in range(150)]
+        for author in crowd:
+            author.update_name_keys()
+        Author.objects.bulk_create(crowd)
+        smith = Author.objects.create(first_name="John", last_name="Smith")
+
+        self.assertEqual(self.results("authors", q="j smith"), [(smith.pk, "Smith, John")])
+        self.assertEqual(self.results("authors", q="Smi J."), [(smith.pk, "Smith, John")])
+
+    def test_prefix_matches_come_first_and_limit_is_capped(self):
+        Tag.objects.bulk_create(
+            [Tag(name="Paleoclimate"), Tag(name="Climate")]
+            + [Tag(name=f"Tag {index:02d}") for index in range(60)]
+        )
+        self.assertEqual(
+            [text for _, text in self.results("tags", q="clim")], ["Climate", "Paleoclimate"]
+        )
+        self.assertEqual(len(self.results("tags", limit=500)), autocomplete.MAX_LIMIT)
+        self.assertEqual(len(self.results("tags", limit="x")), autocomplete.DEFAULT_LIMIT)
+        self.assertEqual(
+            self.results("journals", q="engines"), [(self.journal.pk, "Analytical Engines")]
+        )
+        self.assertEqual(
+            self.results("publications", q="engi"), [(self.publication.pk, str(self.publication))]
+        )
+        response = self.client.get(reverse("autocomplete", args=["users"]))
+        self.assertEqual(response.status_code, 404)
+
+    def render_forms(self, project):
+        pages = []
+        for url in [
+            reverse("publication_update", args=[self.publication.pk]),
+            reverse("publication_create"),
+            reverse("project_update", args=[project.pk]),
+        ]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append((len(response.content), len(queries)))
+        return pages
+
+    def test_form_pages_do_not_grow_with_the_catalogue(self):
+        project = Project.objects.create(title="Engines")
+        self.publication.projects.add(project)
+        small = self.render_forms(project)
+
+        Author.objects.bulk_create(
+            Author(first_name="Extra", last_name=f"Author {index}") for index in range(200)
+        )
+        Journal.objects.bulk_create(Journal(name=f"Journal {index}") for index in range(50))
+        Tag.objects.bulk_create(Tag(name=f"Tag {index}") for index in range(50))
+        Project.objects.bulk_create(Project(title=f"Project {index}") for index in range(50))
+        for index in range(20):
+            create_publication(f"Publication {index}")
+
+        self.assertEqual(self.render_forms(project), small)
+        response = self.client.get(reverse("publication_update", args=[self.publication.pk]))
+        self.assertContains(response, 'data-autocomplete-url="/autocomplete/authors/"')
+        self.assertContains(response, "Lovelace, Ada")
+        self.assertNotContains(response, "Turing")
+
+    def test_list_filters_do_not_grow_with_the_catalogue(self):
+        def render_list(**params):
+            response = self.client.get(reverse("publication_list"), params)
+            self.assertEqual(response.status_code, 200)
+            return response
+
+        small = len(render_list().content)
+        Journal.objects.bulk_create(Journal(name=f"Journal {index}") for index in range(50))
+        Tag.objects.bulk_create(Tag(name=f"Tag {index}") for index in range(50))
+        Project.objects.bulk_create(Project(title=f"Project {index}") for index in range(50))
+
+        self.assertEqual(len(render_list().content), small)
+        response = render_list(journal=self.journal.pk)
+        self.assertContains(response, 'data-autocomplete-url="/autocomplete/journals/"')
+        self.assertContains(response, f'<option value="{self.journal.pk}" selected>')
+        self.assertNotContains(response, "Journal 1")
+
+    def test_bound_form_renders_selection_in_submitted_order(self):
+        form = PublicationForm(
+            data={
+                "title": "",
+                "publication_type": "article",
+                "authors": [self.annie.pk, self.ada.pk],
+            }
+        )
+        self.assertFalse(form.is_valid())
+        html = str(form["authors"])
+        self.assertLess(html.index("Lovelace, Annie"), html.index("Lovelace, Ada"))
+        self.assertNotIn("Turing", html)
+
+
+@skipUnless(pdf_text.extraction_available(), "pypdf ist nicht installiert")
+@override_settings(PDF_TEXT_WORKERS=0)
+class PdfTextExtractionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.publication = create_publication("Thesis")
+            self.publication.pdf = SimpleUploadedFile(
+                "thesis.pdf", make_pdf(["Introduction", "Finite elements converge"])
+            )
+            self.publication.save()
+
+    def test_upload_extracts_pages_and_makes_them_searchable(self):
+        self.publication.refresh_from_db()
+        pages = list(self.publication.pdf_pages.values_list("page_number", "text"))
+
+        self.assertEqual([number for number, _ in pages], [1, 2])
+        self.assertIn("Finite elements", pages[1][1])
+        self.assertTrue(self.publication.pdf_text_hash)
+
+        results = search.search_pdf_pages("converge")
+        self.assertEqual(
+            [(r["publication"], r["page_number"]) for r in results],
+            [(self.publication, 2)],
+        )
+
+    def test_extraction_is_skipped_for_unchanged_content(self):
+        publication = Publication.objects.get(pk=self.publication.pk)
+        with mock.patch.object(pdf_text, "PdfReader") as reader:
+            self.assertFalse(pdf_text.extract_publication(publication))
+        reader.assert_not_called()
+
+    def test_command_reextracts_with_workers(self):
+        PublicationPdfPage.objects.all().delete()
+        out = StringIO()
+
+        call_command("extract_pdf_text", "--workers", "2", "--force", stdout=out)
+
+        self.assertEqual(self.publication.pdf_pages.count(), 2)
+        self.assertIn("1 PDFs extrahiert", out.getvalue())
+
+    def test_command_recovers_lost_background_jobs(self):
+        with override_settings(PDF_TEXT_WORKERS=1):
+            with mock.patch.object(pdf_text, "get_executor") as get_executor:
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.publication.pdf = SimpleUploadedFile(
+                        "thesis-2.pdf", make_pdf(["Revised introduction"])
+                    )
+                    self.publication.save()
+        get_executor.return_value.submit.assert_called_once()
+        out = StringIO()
+
+        call_command("extract_pdf_text", "--workers", "1", stdout=out)
+
+        self.assertIn("1 PDFs extrahiert", out.getvalue())
+        self.assertEqual(
+            list(self.publication.pdf_pages.values_list("text", flat=True)),
+            ["Revised introduction"],
+        )
+
+
+class PdfDeliveryTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+        self.content = bytes(range(256)) * 40
+        self.publication = create_publication("Thesis")
+        self.publication.pdf = SimpleUploadedFile("thesis.pdf", self.content)
+        self.publication.save()
+        self.url = reverse("publication_pdf", args=[self.publication.pk])
+
+    def test_full_file_and_conditional_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+        response = self.client.get(self.url, headers={"If-None-Match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual(self.client.get(reverse("publication_pdf", args=[0])).status_code, 404)
+
+    def test_byte_ranges(self):
+        size = len(self.content)
+        response = self.client.head(self.url)
+        response.close()
+        etag = response["ETag"]
+        cases = [
+            ("bytes=0-99", 206, f"bytes 0-99/{size}", self.content[:100]),
+            ("bytes=10000-", 206, f"bytes 10000-{size - 1}/{size}", self.content[10000:]),
+            ("bytes=-16", 206, f"bytes {size - 16}-{size - 1}/{size}", self.content[-16:]),
+            ("bytes=5-9999999", 206, f"bytes 5-{size - 1}/{size}", self.content[5:]),
+            ("bytes=0-1,5-6", 200, None, self.content),
+            (f"bytes={size}-", 416, f"bytes */{size}", b""),
+        ]
+        for header, status, content_range, body in cases:
+            with self.subTest(header):
+                response = self.client.get(self.url, headers={"Range": header})
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(response.get("Content-Range"), content_range)
+                content = (
+                    b"".join(response.streaming_content) if response.streaming else response.content
+                )
+                self.assertEqual(content, body)
+
+        response = self.client.get(self.url, headers={"Range": "bytes=0-9", "If-Range": etag})
+        self.assertEqual(response.status_code, 206)
+        response = self.client.get(self.url, headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+        response.close()
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(PDF_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_accel_redirect_leaves_the_file_to_nginx(self):
+        response = self.client.get(self.url, headers={"Range": "bytes=0-99"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/" + self.publication.pdf.name
+        )
+        self.assertIn("ETag", response)
+
+
+class PdfStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.author = Author.objects.create(first_name="Ada", last_name="Lovelace")
+        self.content = b"%PDF-1.4 identical"
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.media_root)
+            for directory, _, names in os.walk(self.media_root)
+            for name in names
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        publications = []
+        for title in ["Notes", "Notes (Preprint)"]:
+            publication = create_publication(title, authors=[self.author])
+            publication.pdf = SimpleUploadedFile(f"{title}.pdf", self.content)
+            publication.save()
+            publications.append(publication)
+
+        digest = hashlib.sha256(self.content).hexdigest()
+        expected = f"pdfs/{digest[:2]}/{digest[2:4]}/{digest}.pdf"
+        self.assertEqual([p.pdf.name for p in publications], [expected, expected])
+        self.assertEqual(self.stored_files(), [expected])
+
+        self.author.last_name = "King"
+        self.author.save()
+        response = self.client.get(reverse("publication_pdf", args=[publications[0].pk]))
+        response.close()
+        self.assertEqual(response["Content-Disposition"], 'inline; filename="2020_King_Notes.pdf"')
+
+    def test_command_moves_legacy_files(self):
+        legacy = {"publications/a.pdf": self.content, "publications/b.pdf": self.content}
+        os.makedirs(os.path.join(self.media_root, "publications"))
+        for name, content in legacy.items():
+            with open(os.path.join(self.media_root, name), "wb") as handle:
+                handle.write(content)
+        publications = [create_publication(title) for title in ["A", "B", "C"]]
+        for publication, name in zip(publications, [*legacy, "publications/missing.pdf"]):
+            Publication.objects.filter(pk=publication.pk).update(pdf=name)
+
+        out = StringIO()
+        call_command("migrate_pdf_storage", "--dry-run", stdout=out, stderr=StringIO())
+        self.assertIn("Probelauf: 1 PDFs verschoben, 1 Duplikate", out.getvalue())
+        self.assertEqual(self.stored_files(), sorted(legacy))
+
+        out = StringIO()
+        call_command("migrate_pdf_storage", "--batch-size", "1", stdout=out, stderr=StringIO())
+        self.assertIn("1 PDFs verschoben, 1 Duplikate zusammengefasst, 1 Dateien fehlen", out.getvalue())
+
+        digest = hashlib.sha256(self.content).hexdigest()
+        blob = f"pdfs/{digest[:2]}/{digest[2:4]}/{digest}.pdf"
+        self.assertEqual(self.stored_files(), [blob])
+        self.assertEqual(
+            list(Publication.objects.order_by("title").values_list("pdf", flat=True)),
+            [blob, blob, "publications/missing.pdf"],
+        )
+
+
+@override_settings(PDF_TEXT_WORKERS=0, PDF_LINEARIZE=True)
+class PdfLinearizationTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.content = make_pdf(["Scanned page"])
+
+    def upload(self, publication, name="scan.pdf"):
+        with self.captureOnCommitCallbacks(execute=True):
+            publication.pdf = SimpleUploadedFile(name, self.content)
+            publication.save()
+        return Publication.objects.get(pk=publication.pk)
+
+    def linearized_copy(self, path):
+        handle, temporary = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as target, open(path, "rb") as source:
+            target.write(source.read() + b"% linearized\n")
+        return "before", "after", temporary
+
+    def test_uploads_are_linearized_once(self):
+        publication = create_publication("Scan")
+        with mock.patch.object(pdf_linearize, "linearization_available", return_value=True):
+            with mock.patch.object(
+                pdf_linearize, "linearize_pdf_file", side_effect=self.linearized_copy
+            ) as linearize_file:
+                publication = self.upload(publication)
+                self.assertTrue(publication.pdf_linearized)
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    publication.title = "Scan (bearbeitet)"
+                    publication.save()
+                self.assertEqual(linearize_file.call_count, 1)
+
+                with mock.patch.object(pdf_linearize, "store_linearization") as store:
+                    publication = self.upload(publication, "scan-2.pdf")
+                self.assertFalse(publication.pdf_linearized)
+                self.assertEqual(linearize_file.call_count, 2)
+                store.assert_called_once_with(
+                    publication.pk, publication.pdf.name, "before", "after", mock.ANY
+                )
+                os.unlink(store.call_args.args[4])
+
+    @override_settings(PDF_LINEARIZE=False)
+    def test_linearized_copy_is_stored_as_a_new_file(self):
+        first, second = [self.upload(create_publication(f"Scan {index}")) for index in range(2)]
+        original = first.pdf.name
+        self.assertEqual(second.pdf.name, original)
+
+        result = self.linearized_copy(first.pdf.path)
+        self.assertTrue(pdf_linearize.store_linearization(first.pk, original, *result))
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertTrue(first.pdf_linearized)
+        self.assertNotEqual(first.pdf.name, original)
+        self.assertEqual((second.pdf.name, second.pdf_linearized), (original, False))
+        for publication in [first, second]:
+            with open(publication.pdf.path, "rb") as handle:
+                digest = hashlib.sha256(handle.read()).hexdigest()
+            self.assertEqual(publication.pdf.name, content_name(digest, ".pdf"))
+        self.assertFalse(os.path.exists(result[2]))
+
+        # A row that moved on to another file is left alone.
+        result = self.linearized_copy(second.pdf.path)
+        self.assertFalse(pdf_linearize.store_linearization(first.pk, original, *result))
+        self.assertFalse(os.path.exists(result[2]))
+
+    @override_settings(PDF_LINEARIZE=False)
+    def test_failure_keeps_the_original(self):
+        publication = self.upload(create_publication("Scan"))
+        path = publication.pdf.path
+        self.assertFalse(pdf_linearize.is_linearized(path))
+
+        broken = mock.Mock()
+        broken.open.side_effect = ValueError("kaputt")
+        with mock.patch.object(pdf_linearize, "pikepdf", broken):
+            with self.assertRaises(ValueError):
+                pdf_linearize.linearize_pdf_file(path)
+
+        with open(path, "rb") as handle:
+            self.assertEqual(handle.read(), self.content)
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+        self.assertFalse(Publication.objects.get(pk=publication.pk).pdf_linearized)
+
+    @skipUnless(pdf_linearize.linearization_available(), "pikepdf ist nicht installiert")
+    def test_command_backfills_existing_uploads(self):
+        with override_settings(PDF_LINEARIZE=False):
+            publications = [self.upload(create_publication(f"Scan {index}")) for index in range(2)]
+        out = StringIO()
+
+        call_command("linearize_pdfs", "--workers", "2", stdout=out)
+
+        self.assertIn("2 PDFs linearisiert", out.getvalue())
+        for publication in publications:
+            publication.refresh_from_db()
+            self.assertTrue(publication.pdf_linearized)
+            self.assertTrue(pdf_linearize.is_linearized(publication.pdf.path))
+
+
+class BiblatexExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(title="Projekt")
+        cls.ada = Author.objects.create(first_name="Ada Augusta", last_name="Lovelace")
+        cls.journal = Journal.objects.create(name="Analytical Engines", short_name="Anal. Eng.")
+        for index in range(5):
+            create_publication(
+                f"Paper {index}",
+                year=2000 + index,
+                authors=[cls.ada],
+                journal=cls.journal,
+                projects=[cls.project] if index < 3 else [],
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def export(self, **params):
+        response = self.client.get(reverse("publication_export"), params)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_exports_only_the_selection(self):
+        content = self.export(project=self.project.pk)
+
+        self.assertEqual(content.count("@article{"), 3)
+        self.assertIn("Lovelace, Ada Augusta", content)
+        self.assertNotIn("Paper 4", content)
+
+    def test_follows_the_order_shown_on_screen(self):
+        def titles(content):
+            return re.findall(r"^\s*title = \{(.*)\},$", content, flags=re.MULTILINE)
+
+        self.assertEqual(titles(self.export()), [f"Paper {index}" for index in range(4, -1, -1)])
+
+        ranked = [Publication.objects.get(title=f"Paper {index}") for index in [2, 0, 4]]
+        with mock.patch.object(
+            export, "search_publications",
+            return_value=[{"publication": publication} for publication in ranked],
+        ):
+            self.assertEqual(titles(self.export(q="paper")), ["Paper 2", "Paper 0", "Paper 4"])
+            self.assertEqual(
+                titles(self.export(q="paper", sort="year")), ["Paper 0", "Paper 2", "Paper 4"]
+            )
+
+    def test_renders_only_the_requested_variant(self):
+        content = self.export(variant="short_all", year=2001)
+
+        self.assertEqual(content.count("@article{"), 1)
+        self.assertIn("Lovelace, A. A.", content)
+        self.assertIn("journaltitle = {Anal. Eng.}", content)
+
+    def test_rejects_unknown_variant_and_invalid_filters(self):
+        response = self.client.get(reverse("publication_export"), {"variant": "kurz"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse("publication_export"), {"project": 999})
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_per_chunk(self):
+        def export_chunks():
+            return list(export.iter_biblatex_entries(Publication.objects.all(), chunk_size=2))
+
+        # Ids and versions, then publications and authors for each cold chunk.
+        with self.assertNumQueries(7):
+            self.assertEqual(len(export_chunks()), 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(export_chunks()), 3)
+
+    def test_command_writes_entries(self):
+        out = StringIO()
+        call_command("export_biblatex", "--project", str(self.project.pk), stdout=out)
+        self.assertEqual(out.getvalue().count("@article{"), 3)
+
+
+class BiblatexCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ada = Author.objects.create(first_name="Ada", last_name="Lovelace")
+        self.alan = Author.objects.create(first_name="Alan", last_name="Turing")
+        self.journal = Journal.objects.create(name="Analytical Engines", short_name="AE")
+        self.publication = create_publication(
+            "Notes", year=1843, authors=[self.ada, self.alan], journal=self.journal
+        )
+
+    def entry(self, **flags):
+        return Publication.objects.get(pk=self.publication.pk).get_biblatex_entry(**flags)
+
+    def test_entries_are_rendered_once_per_version(self):
+        with mock.patch.object(
+            Publication, "render_biblatex_entry", autospec=True,
+            side_effect=Publication.render_biblatex_entry,
+        ) as render:
+            first = self.entry()
+            self.assertEqual(self.entry(), first)
+            self.entry(short_first_names=True)
+            list(export.iter_biblatex_entries(Publication.objects.all()))
+
+        self.assertEqual(render.call_count, 2)
+
+    def test_loaded_publications_are_rendered_without_queries(self):
+        publications = list(
+            Publication.objects.select_related("journal").prefetch_related(
+                ordered_authors_prefetch()
+            )
+        )
+        with self.assertNumQueries(0):
+            entries = Publication.objects.biblatex_entries_for(publications)
+        self.assertIn("Lovelace, Ada and Turing, Alan", entries[0])
+        with mock.patch.object(Publication, "render_biblatex_entry") as render:
+            self.assertEqual(Publication.objects.biblatex_entries_for(publications), entries)
+        render.assert_not_called()
+
+    def test_changes_invalidate_cached_entries(self):
+        self.entry(short_journal_names=True)
+
+        self.ada.last_name = "King"
+        self.ada.save()
+        self.assertIn("King, Ada and Turing, Alan", self.entry())
+
+        self.journal.short_name = "Anal. Eng."
+        self.journal.save()
+        self.assertIn("{Anal. Eng.}", self.entry(short_journal_names=True))
+
+        self.publication.set_authors_in_order([self.alan, self.ada])
+        self.assertIn("Turing, Alan and King, Ada", self.entry())
+
+        self.alan.publications.remove(self.publication)
+        self.assertIn("author = {King, Ada}", self.entry())
+
+        version = Publication.objects.get(pk=self.publication.pk).biblatex_version
+        Publication.objects.assign_bibtex_keys(
+            Publication.objects.prefetch_related(ordered_authors_prefetch()), force=True
+        )
+        self.assertNotEqual(
+            Publication.objects.get(pk=self.publication.pk).biblatex_version, version
+        )
+
+        self.journal.delete()
+        self.assertNotIn("journaltitle", self.entry())
+
+
+BIBTEX_SAMPLE = r"""
+@string{ tests = "Journal of Tests" }
+@Article{knuth84,
+  author = {Donald E. Knuth and M{\"u}ller, J{\"o}rg and {World Health Organization}},
+  title = {Literate {P}rogramming \& More},
+  journal = tests # " II",
+  year = 1984,
+  pages = {97--111},
+  doi = {https://doi.org/10.1000/knuth},
+}
+@comment{ignored}
+@inproceedings{vonb,
+  author = {Ludwig van Beethoven},
+  title = "Sonatas",
+  booktitle = {Proceedings of Music},
+  date = {1801-03-01},
+}
+@book{notitle, year = 2000}
+@article{again, title = {Duplicate}, year = 1984, doi = {10.1000/KNUTH}}
+"""
+
+RIS_SAMPLE = """TY  - JOUR
+AU  - Lovelace, Ada
+AU  - Babbage, Charles
+TI  - Notes
+PY  - 1843///
+JO  - journal of tests ii
+SP  - 666
+EP  - 731
+AB  - First line
+  continued
+ER  - 
+"""
+
+
+class BibliographyImportTests(TestCase):
+    def import_text(self, text, file_format="bibtex", **kwargs):
+        return bib_import.import_bibliography(StringIO(text), file_format, **kwargs)
+
+    def test_parses_bibtex_entries(self):
+        records = list(bib_import.read_records(StringIO(BIBTEX_SAMPLE), "bibtex"))
+
+        self.assertEqual(
+            [record["source"] for record in records], ["knuth84", "vonb", "notitle", "again"]
+        )
+        knuth, vonb = records[0], records[1]
+        self.assertEqual(knuth["title"], "Literate Programming & More")
+        self.assertEqual(knuth["journal"], "Journal of Tests II")
+        self.assertEqual(knuth["pages"], "97-111")
+        self.assertEqual(knuth["doi"], "10.1000/knuth")
+        self.assertEqual(
+            knuth["authors"],
+            [("Donald E.", "Knuth"), ("Jörg", "Müller"), ("", "World Health Organization")],
+        )
+        self.assertEqual(vonb["authors"], [("Ludwig", "van Beethoven")])
+        self.assertEqual((vonb["year"], vonb["publication_type"]), (1801, "proceedings"))
+
+    def test_imports_in_bulk_and_skips_duplicates(self):
+        journal = Journal.objects.create(name="Journal of Tests II")
+        knuth = Author.objects.create(first_name="Donald E.", last_name="Knuth")
+
+        summary = self.import_text(BIBTEX_SAMPLE)
+
+        self.assertEqual(
+            (summary["created"], summary["duplicates"], summary["errors"]), (2, 1, 1)
+        )
+        self.assertEqual((summary["authors_created"], summary["journals_created"]), (3, 1))
+        publication = Publication.objects.get(doi="10.1000/knuth")
+        self.assertEqual(publication.journal, journal)
+        self.assertEqual(publication.first_author, knuth)
+        self.assertEqual(publication.bibtex_key, "knuth1984")
+        self.assertEqual(len(list(publication.ordered_authors)), 3)
+        journal.refresh_from_db()
+        self.assertEqual(journal.cached_publication_count, 1)
+
+        summary = self.import_text(RIS_SAMPLE, "ris")
+        self.assertEqual(summary["created"], 1)
+        notes = Publication.objects.get(title="Notes")
+        self.assertEqual(notes.journal, journal)
+        self.assertEqual((notes.pages, notes.abstract), ("666-731", "First line continued"))
+
+    def test_query_count_does_not_grow_with_entries(self):
+        def import_queries(count, offset):
+            text = "".join(
+                f"@article{{e{index}, title={{Paper {index}}}, year=2020, "
+                f"author={{Author{index}, Ann and Shared{offset}, Sam}}, "
+                f"journal={{J{offset + index % 3}}}}}\n"
+                for index in range(offset, offset + count)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                self.import_text(text, chunk_size=100)
+            # The similar test names pair up, and bulk_create splits the
+            # duplicate candidates by SQLite's variable limit.
+            return sum(
+                not query["sql"].startswith('INSERT INTO "library_authorduplicatecandidate"')
+                for query in queries.captured_queries
+            )
+
+        import_queries(1, 1000)
+        self.assertEqual(import_queries(3, 0), import_queries(30, 100))
+
+    def test_new_authors_get_duplicate_candidates_without_rebuild(self):
+        existing = Author.objects.create(first_name="Grace", last_name="Hopper")
+
+        with mock.patch.object(AuthorDuplicateCandidate.objects, "rebuild") as rebuild:
+            self.import_text("@article{h, title={Compilers}, year=1952, author={Hoper, G.}}")
+
+        rebuild.assert_not_called()
+        self.assertTrue(
+            AuthorDuplicateCandidate.objects.filter(
+                author=existing, duplicate__last_name="Hoper"
+            ).exists()
+        )
+
+    def test_upload_view_imports_ris(self):
+        upload = SimpleUploadedFile("export.ris", RIS_SAMPLE.encode(), content_type="text/plain")
+
+        response = self.client.post(reverse("publication_import_bibliography"), {"file": upload})
+
+        self.assertEqual(response.context["summary"]["created"], 1)
+        self.assertTrue(Publication.objects.filter(title="Notes").exists())
+
+
+class ResolutionTests(TestCase):
+    def publication_data(self, authors):
+        return {
+            "title": "Consortium Paper",
+            "year": 2023,
+            "journal_title": "Journal of Tests",
+            "issn": "1234-5678",
+            "abstract": "",
+            "authors": authors,
+        }
+
+    def test_prefers_orcid_and_matches_normalized_names(self):
+        orcid_author = Author.objects.create(
+            first_name="Jörg", last_name="Müller", orcid="0000-0001-2345-678X"
+        )
+        namesake = Author.objects.create(first_name="Jörg", last_name="Müller")
+        resolver = resolution.Resolver()
+
+        authors = resolver.authors(
+            [
+                {
+                    "first_name": "J.",
+                    "last_name": "Mueller",
+                    "orcid": "https://orcid.org/0000-0001-2345-678x",
+                },
+                {"first_name": " jörg ", "last_name": "MÜLLER"},
+                {"first_name": "Jorg", "last_name": "Muller", "orcid": "0000-0002-0000-0001"},
+            ]
+        )
+
+        self.assertEqual(authors, [orcid_author, namesake])
+        namesake.refresh_from_db()
+        self.assertEqual(namesake.orcid, "0000-0002-0000-0001")
+
+    def test_different_orcid_creates_a_new_author(self):
+        existing = Author.objects.create(
+            first_name="Ada", last_name="Lovelace", orcid="0000-0001-0000-0001"
+        )
+
+        [author] = resolution.Resolver().authors(
+            [{"first_name": "Ada", "last_name": "Lovelace", "orcid": "0000-0002-0000-0002"}]
+        )
+
+        self.assertNotEqual(author, existing)
+        self.assertEqual(Author.objects.filter(last_name="Lovelace").count(), 2)
+
+    def test_journals_match_issn_before_name(self):
+        journal = Journal.objects.create(name="Old Title", issn="12345678")
+        resolver = resolution.Resolver()
+
+        self.assertEqual(resolver.journal("New Title", "1234-5678"), journal)
+        self.assertEqual(resolver.journal("old title"), journal)
+        self.assertIsNone(resolver.journal(""))
+        self.assertEqual(resolver.journal("Another Journal").name, "Another Journal")
+        self.assertEqual(Journal.objects.count(), 2)
+
+    def test_doi_import_queries_do_not_grow_with_authors(self):
+        def import_queries(doi, count):
+            # Unrelated names, so no duplicate candidates are written.
+            authors = [
+                {
+                    "first_name": "Member",
+                    "last_name": hashlib.sha1(f"{doi}{index}".encode()).hexdigest(),
+                }
+                for index in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                doi_import.create_publication_from_doi(doi, self.publication_data(authors))
+            return len(queries)
+
+        import_queries("10.1000/warmup", 1)
+        self.assertEqual(import_queries("10.1000/small", 3), import_queries("10.1000/large", 100))
+        self.assertEqual(Publication.objects.get(doi="10.1000/large").authors.count(), 100)
+        self.assertEqual(Journal.objects.count(), 1)
+
+    def test_memo_answers_repeated_lookups(self):
+        resolver = resolution.Resolver()
+        people = [{"first_name": "Alan", "last_name": "Turing"}]
+        resolver.authors(people)
+        resolver.journal("Journal of Tests")
+
+        with self.assertNumQueries(0):
+            resolver.authors(people)
+            resolver.journal("journal of tests")
+
+    def test_new_authors_get_duplicate_candidates(self):
+        existing = Author.objects.create(first_name="Grace", last_name="Hopper")
+
+        [author] = resolution.Resolver().authors([{"first_name": "G.", "last_name": "Hoper"}])
+
+        self.assertTrue(
+            AuthorDuplicateCandidate.objects.filter(author=existing, duplicate=author).exists()
+        )
+
+
+class DoiBatchImportTests(CrossrefServerMixin, TestCase):
+    def test_parse_doi_list_normalizes_and_deduplicates(self):
+        text = "https://doi.org/10.1000/alpha, doi:10.1000/ALPHA\n10.1000/beta."
+        self.assertEqual(doi_import.parse_doi_list(text), ["10.1000/alpha", "10.1000/beta"])
+
+    def test_parse_doi_list_strips_surrounding_punctuation(self):
+        text = (
+            "Smith (doi:10.1000/xyz). Jones, 10.1000/abc; "
+            "[10.1000/def]: \"10.1000/ghi\" <10.1000/jkl> "
+            "10.1002/(SICI)1097-4571(199806)49:8<693::AID-ASI4>3.0.CO;2-0)."
+        )
+        self.assertEqual(
+            doi_import.parse_doi_list(text),
+            [
+                "10.1000/xyz",
+                "10.1000/abc",
+                "10.1000/def",
+                "10.1000/ghi",
+                "10.1000/jkl",
+                "10.1002/(SICI)1097-4571(199806)49:8<693::AID-ASI4>3.0.CO;2-0",
+            ],
+        )
+
+    def test_import_reports_created_existing_and_failed_dois(self):
+        existing = Publication.objects.create(title="Beta", year=2022, doi="10.1000/BETA")
+
+        results = doi_import.import_dois(["10.1000/alpha", "10.1000/beta", "10.1000/missing"])
+
+        self.assertEqual(
+            [(r["doi"], r["status"]) for r in results],
+            [("10.1000/alpha", "created"), ("10.1000/beta", "exists"), ("10.1000/missing", "error")],
+        )
+        self.assertEqual(results[1]["publication_id"], existing.pk)
+        self.assertNotIn("10.1000/beta", CrossrefStandIn.requests)
+
+        publication = Publication.objects.get(pk=results[0]["publication_id"])
+        self.assertEqual(publication.journal.name, "Journal of Tests")
+        self.assertEqual([a.last_name for a in publication.ordered_authors], ["Lovelace"])
+        self.assertEqual(publication.bibtex_key, "lovelace2021")
+
+    def test_shared_authors_are_created_once(self):
+        doi_import.import_dois(["10.1000/alpha", "10.1000/beta"])
+
+        self.assertEqual(Author.objects.filter(last_name="Lovelace").count(), 1)
+        self.assertEqual(Publication.objects.count(), 2)
+
+    def test_json_endpoint(self):
+        response = self.client.post(
+            reverse("publication_import_dois"),
+            data=json.dumps({"dois": ["10.1000/alpha"]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["status"], "created")
+
+        response = self.client.post(
+            reverse("publication_import_dois"),
+            data=json.dumps({"dois": "10.1000/alpha"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_form_accepts_uploaded_list(self):
+        response = self.client.post(
+            reverse("publication_import_dois"),
+            {"doi_list": "", "doi_file": SimpleUploadedFile("dois.txt", b"10.1000/alpha\n")},
+        )
+
+        self.assertContains(response, "Importiert")
+        self.assertTrue(Publication.objects.filter(doi="10.1000/alpha").exists())
+
+    def test_command(self):
+        out, err = StringIO(), StringIO()
+
+        call_command("import_dois", "10.1000/alpha", "10.1000/missing", stdout=out, stderr=err)
+
+        self.assertIn("10.1000/alpha: created", out.getvalue())
+        self.assertIn("10.1000/missing", err.getvalue())
+
+
+class DoiMetadataCacheTests(CrossrefServerMixin, TestCase):
+    def test_repeated_lookups_are_served_from_cache(self):
+        first = doi_import.fetch_publication_by_doi("https://doi.org/10.1000/ALPHA")
+        second = doi_import.fetch_publication_by_doi("10.1000/alpha")
+
+        self.assertEqual(first, second)
+        self.assertEqual(CrossrefStandIn.requests, ["10.1000/ALPHA"])
+        entry = DoiMetadataCache.objects.get(doi="10.1000/alpha")
+        self.assertEqual((entry.hit_count, entry.miss_count), (1, 1))
+
+    def test_unknown_dois_are_cached_negatively(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                doi_import.fetch_publication_by_doi("10.1000/missing")
+
+        self.assertEqual(CrossrefStandIn.requests, ["10.1000/missing"])
+        self.assertTrue(DoiMetadataCache.objects.get(doi="10.1000/missing").is_negative)
+
+    @override_settings(DOI_CACHE_TTL=0)
+    def test_expired_entries_are_revalidated_with_etag(self):
+        doi_import.fetch_publication_by_doi("10.1000/alpha")
+        data = doi_import.fetch_publication_by_doi("10.1000/alpha")
+
+        self.assertEqual(data["title"], "Alpha Study")
+        self.assertEqual(len(CrossrefStandIn.requests), 2)
+        entry = DoiMetadataCache.objects.get(doi="10.1000/alpha")
+        self.assertEqual((entry.hit_count, entry.miss_count), (1, 1))
+
+    @override_settings(DOI_CACHE_TTL=0)
+    def test_expired_entries_are_used_when_crossref_is_unreachable(self):
+        doi_import.fetch_publication_by_doi("10.1000/alpha")
+
+        with override_settings(CROSSREF_API_URL="http://127.0.0.1:9/works/"), self.assertLogs(
+            "library.doi_import", "WARNING"
+        ):
+            data = doi_import.fetch_publication_by_doi("10.1000/alpha")
+
+        self.assertEqual(data["title"], "Alpha Study")
+
+    def test_batch_import_uses_cache(self):
+        doi_import.fetch_publication_by_doi("10.1000/alpha")
+
+        results = doi_import.import_dois(["10.1000/alpha", "10.1000/beta"])
+
+        self.assertEqual([r["status"] for r in results], ["created", "created"])
+        self.assertEqual(CrossrefStandIn.requests, ["10.1000/alpha", "10.1000/beta"])
+
+    def test_update_from_doi_fetches_once_for_get_and_post(self):
+        publication = Publication.objects.create(title="Alt", year=2000, doi="10.1000/alpha")
+        url = reverse("publication_update_from_doi", args=[publication.pk])
+
+        self.assertContains(self.client.get(url), "Alpha Study")
+        self.client.post(url, {"title_source": "doi"})
+
+        publication.refresh_from_db()
+        self.assertEqual(publication.title, "Alpha Study")
+        self.assertEqual(CrossrefStandIn.requests, ["10.1000/alpha"])
+
+    def test_command_reports_and_clears(self):
+        doi_import.fetch_publication_by_doi("10.1000/alpha")
+        out = StringIO()
+
+        call_command("doi_cache", stdout=out)
+        call_command("doi_cache", "--clear", stdout=out)
+
+        self.assertIn("1 Einträge", out.getvalue())
+        self.assertFalse(DoiMetadataCache.objects.exists())
+
+
+class BibtexKeyAllocationTests(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(first_name="Li", last_name="Wang")
+
+    def create_wang(self, year=2020):
+        return create_publication("Paper", year=year, authors=[self.author])
+
+    def unsaved_wang(self, year=2020):
+        publication = Publication(title="New", year=year)
+        publication._pending_ordered_authors = [self.author]
+        return publication
+
+    def test_allocation_uses_one_query_regardless_of_collisions(self):
+        for _ in range(30):
+            self.create_wang()
+        Publication.objects.create(title="Other", year=2020, bibtex_key="wang20201")
+        publication = self.unsaved_wang()
+
+        with self.assertNumQueries(1):
+            key = publication.generate_bibtex_key(force=True)
+
+        self.assertEqual(key, "wang2020-31")
+
+    def test_free_suffixes_are_reused_and_fitting_keys_kept(self):
+        first, second, third = (self.create_wang() for _ in range(3))
+        second.delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(third.generate_bibtex_key(force=True), "wang2020-3")
+        self.assertEqual(self.create_wang().bibtex_key, "wang2020-2")
+
+    def test_save_retries_when_a_concurrent_writer_took_the_key(self):
+        publication = self.unsaved_wang(year=2021)
+        publication.generate_bibtex_key()
+        Publication.objects.create(title="Other", year=2021, bibtex_key="wang2021")
+
+        publication.save()
+
+        publication.refresh_from_db()
+        self.assertEqual(publication.bibtex_key, "wang2021-2")
+
+    def test_bulk_assignment(self):
+        other = Author.objects.create(first_name="Ada", last_name="Lovelace")
+        publications = []
+        for index in range(40):
+            publication = Publication.objects.create(title=f"P{index}", year=2020)
+            publication.set_authors_in_order([self.author if index % 2 else other])
+            publications.append(publication)
+        for publication in publications[1:]:
+            Publication.objects.filter(pk=publication.pk).update(bibtex_key=f"alt{publication.pk}")
+        Publication.objects.filter(pk=publications[0].pk).update(bibtex_key="lovelace2020")
+
+        loaded = Publication.objects.prefetch_related(ordered_authors_prefetch()).order_by("pk")
+        # Publications, authors, savepoint, then one key lookup and one update
+        # per batch.
+        with self.assertNumQueries(8):
+            changed = Publication.objects.assign_bibtex_keys(loaded, batch_size=20)
+
+        self.assertEqual(len(changed), 39)
+        keys = list(Publication.objects.order_by("pk").values_list("bibtex_key", flat=True))
+        self.assertEqual(len(set(keys)), 40)
+        self.assertEqual(keys[:3], ["lovelace2020", "wang2020", "lovelace2020-2"])
+        self.assertIn("wang2020-20", keys)
+
+
+    def test_forced_assignment_closes_gaps(self):
+        publications = []
+        for index in range(3):
+            publication = Publication.objects.create(title=f"P{index}", year=2020)
+            publication.set_authors_in_order([self.author])
+            publications.append(publication)
+
+        def force(keys):
+            for publication in publications:
+                Publication.objects.filter(pk=publication.pk).update(bibtex_key=publication.pk)
+            for publication, key in zip(publications, keys):
+                Publication.objects.filter(pk=publication.pk).update(bibtex_key=key)
+            Publication.objects.assign_bibtex_keys(
+                Publication.objects.prefetch_related(ordered_authors_prefetch()).order_by("pk"),
+                force=True,
+            )
+            return list(Publication.objects.order_by("pk").values_list("bibtex_key", flat=True))
+
+        dense = ["wang2020", "wang2020-2", "wang2020-3"]
+        self.assertEqual(force(dense), dense)
+        self.assertEqual(force(["wang2020", "wang2020-3", "wang2020-5"]), dense)
+        self.assertEqual(force(["wang2020-3", "wang2020", "wang2020-2"]), dense)
+
+class DeferredDerivedFieldsTests(TestCase):
+    def setUp(self):
+        self.ada = Author.objects.create(first_name="Ada", last_name="Lovelace")
+        self.alan = Author.objects.create(first_name="Alan", last_name="Turing")
+        self.tag = Tag.objects.create(name="Numerik")
+        self.project = Project.objects.create(title="Projekt")
+
+    def form_data(self, order, **overrides):
+        return {
+            "title": "Paper",
+            "year": 2020,
+            "publication_type": Publication.PublicationType.ARTICLE,
+            "authors": [self.ada.pk, self.alan.pk],
+            "authors_order": ",".join(str(author.pk) for author in order),
+            "tags": [self.tag.pk],
+            "projects": [self.project.pk],
+            **overrides,
+        }
+
+    def valid_form(self, data, instance=None):
+        form = PublicationForm(data, instance=instance)
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def test_form_create_derives_the_key_before_the_insert(self):
+        form = self.valid_form(self.form_data([self.alan, self.ada]))
+
+        # Savepoints, key lookup, insert, author rows with the BibLaTeX version
+        # bump, then tags and projects with their counters; the key is never
+        # written again.
+        with self.assertNumQueries(17):
+            publication = form.save()
+
+        self.assertEqual(publication.bibtex_key, "turing2020")
+        self.assertEqual(list(publication.ordered_authors), [self.alan, self.ada])
+
+    def test_form_update_without_key_changes(self):
+        publication = self.valid_form(self.form_data([self.alan, self.ada])).save()
+        form = self.valid_form(
+            self.form_data([self.alan, self.ada], title="Neu"),
+            Publication.objects.get(pk=publication.pk),
+        )
+
+        # The unchanged author order is read once and not written.
+        with self.assertNumQueries(6):
+            form.save()
+
+    def test_form_update_with_new_year_writes_the_key_with_the_row(self):
+        publication = self.valid_form(self.form_data([self.alan, self.ada])).save()
+        form = self.valid_form(
+            self.form_data([self.alan, self.ada], year=2021),
+            Publication.objects.get(pk=publication.pk),
+        )
+
+        with self.assertNumQueries(9):
+            form.save()
+
+        publication.refresh_from_db()
+        self.assertEqual(publication.bibtex_key, "turing2021")
+
+    def test_changes_inside_a_unit_of_work_update_the_key_once(self):
+        publication = create_publication("Paper", authors=[self.ada])
+
+        with CaptureQueriesContext(connection) as queries:
+            with deferred_derived_fields():
+                publication.set_authors_in_order([self.alan])
+                publication.tags.add(self.tag)
+                publication.set_authors_in_order([self.alan, self.ada])
+
+        key_updates = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('UPDATE "library_publication" SET "bibtex_key"')
+        ]
+        self.assertEqual(len(key_updates), 1)
+        publication.refresh_from_db()
+        self.assertEqual(publication.bibtex_key, "turing2020")
+
+    def test_reverse_author_changes_refresh_the_key(self):
+        publication = create_publication("Paper", year=2020)
+        self.alan.publications.add(publication)
+
+        publication.refresh_from_db()
+        self.assertEqual(publication.bibtex_key, "turing2020")
+
+
+class PublicationCountTests(TestCase):
+    def setUp(self):
+        self.journal = Journal.objects.create(name="Journal")
+        self.tag = Tag.objects.create(name="Tag")
+        self.project = Project.objects.create(title="Projekt")
+
+    def assertCounts(self, journal, tag, project):
+        for model, expected in ((Journal, journal), (Tag, tag), (Project, project)):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(model.objects.get().cached_publication_count, expected)
+
+    def test_counters_follow_relation_changes(self):
+        first = create_publication(
+            "Eins", journal=self.journal, tags=[self.tag], projects=[self.project]
+        )
+        second = create_publication("Zwei", tags=[self.tag])
+        self.assertCounts(journal=1, tag=2, project=1)
+
+        second.journal = self.journal
+        second.save()
+        self.project.publications.add(second)
+        first.tags.clear()
+        self.assertCounts(journal=2, tag=1, project=2)
+
+        first.journal = None
+        first.save()
+        second.delete()
+        self.assertCounts(journal=0, tag=0, project=1)
+
+    def test_lists_show_counts_from_aggregates_and_columns(self):
+        create_publication("Eins", journal=self.journal, tags=[self.tag], projects=[self.project])
+        Tag.objects.update(cached_publication_count=7)
+
+        for setting in (False, True):
+            with self.subTest(columns=setting), self.settings(PUBLICATION_COUNT_COLUMNS=setting):
+                for name in ("project_list", "journal_list", "tag_list"):
+                    response = self.client.get(reverse(name))
+                    item = response.context[name.replace("_list", "s")][0]
+                    expected = 7 if setting and name == "tag_list" else 1
+                    self.assertEqual(item.publication_count, expected)
+
+    def test_command_repairs_counters(self):
+        create_publication("Eins", journal=self.journal, tags=[self.tag], projects=[self.project])
+        Journal.objects.update(cached_publication_count=5)
+
+        call_command("refresh_publication_counts", stdout=StringIO())
+
+        self.assertCounts(journal=1, tag=1, project=1)
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN ist SQLite-spezifisch")
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.journal = Journal.objects.create(name="Journal")
+        cls.author = Author.objects.create(first_name="Ada", last_name="Lovelace")
+        for index in range(30):
+            publication = create_publication(
+                f"Paper {index}", year=2000 + index % 5, authors=[cls.author], journal=cls.journal
+            )
+            Publication.objects.filter(pk=publication.pk).update(doi=f"10.1000/abc{index}")
+        cls.publication = Publication.objects.first()
+
+    # No ANALYZE on purpose: without statistics SQLite plans for large tables,
+    # which is what these tests guard.
+    def plans(self, run, table):
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        statements = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith("SELECT") and f'FROM "{table}"' in query["sql"]
+        ]
+        self.assertTrue(statements, f"Keine Abfrage auf {table} ausgeführt.")
+        plans = []
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plans.append([row[-1] for row in cursor.fetchall()])
+        return plans
+
+    def assertIndexed(self, run, table, sorted_by_index=False):
+        for plan in self.plans(run, table):
+            for step in plan:
+                with self.subTest(step=step):
+                    self.assertNotRegex(step, rf"^SCAN {table}$", plan)
+                    if sorted_by_index:
+                        self.assertNotIn("TEMP B-TREE FOR ORDER BY", step, plan)
+
+    def test_doi_lookups(self):
+        self.assertIndexed(
+            lambda: doi_import.existing_dois(["10.1000/ABC3", "10.1000/new"]), "library_publication"
+        )
+
+    def test_publication_list_page(self):
+        self.assertIndexed(
+            lambda: self.client.get(reverse("publication_list")),
+            "library_publication",
+            sorted_by_index=True,
+        )
+
+    def test_bibtex_key_allocation(self):
+        self.assertIndexed(
+            lambda: Publication.objects.allocate_bibtex_key("lovelace2001"), "library_publication"
+        )
+
+    def test_author_and_journal_get_or_create(self):
+        self.assertIndexed(
+            lambda: Author.objects.get_or_create(first_name="Ada", last_name="Lovelace"),
+            "library_author",
+        )
+        self.assertIndexed(
+            lambda: Journal.objects.get_or_create(name="Journal"), "library_journal"
+        )
+
+    def test_author_list_ordering(self):
+        self.assertIndexed(
+            lambda: list(Author.objects.all()[:50]), "library_author", sorted_by_index=True
+        )
+
+    def test_annotations_of_publication(self):
+        self.assertIndexed(
+            lambda: list(self.publication.annotations.all()),
+            "library_publicationannotation",
+            sorted_by_index=True,
+        )
+
+    def test_doi_uniqueness_ignores_case(self):
+        with self.assertRaises(IntegrityError):
+            Publication.objects.create(title="Kopie", year=2020, doi="10.1000/ABC3")
+
+    def test_form_reports_duplicate_doi(self):
+        data = {
+            "title": "Kopie",
+            "year": 2020,
+            "publication_type": "article",
+            "authors": [self.author.pk],
+        }
+        form = PublicationForm({**data, "doi": " https://doi.org/10.1000/ABC3 "})
+        self.assertFalse(form.is_valid())
+        self.assertIn("doi", form.errors)
+
+        form = PublicationForm({**data, "doi": ""})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertIsNone(form.cleaned_data["doi"])
+
+
+class SqliteConcurrencyBenchmarkTests(TestCase):
+    def test_compares_rollback_journal_with_wal(self):
+        out = StringIO()
+        call_command(
+            "benchmark_sqlite_concurrency",
+            "--rows", "200", "--readers", "2", "--duration", "0.2", "--json",
+            stdout=out,
+        )
+        results = {result["profile"]: result for result in json.loads(out.getvalue())}
+
+        self.assertEqual(set(results), {"rollback", "wal"})
+        for result in results.values():
+            self.assertGreater(result["reads"], 0)
+            self.assertGreater(result["write_transactions"], 0)
+            self.assertEqual(result["write_errors"], 0)
+
+
+class WriteTransactionTests(TransactionTestCase):
+    def test_only_write_paths_begin_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with write_transaction():
+                Tag.objects.create(name="Numerik")
+            with transaction.atomic():
+                Tag.objects.count()
+
+        begins = [q["sql"] for q in queries.captured_queries if q["sql"].startswith("BEGIN")]
+        self.assertEqual(begins, ["BEGIN IMMEDIATE", "BEGIN"])
+        self.assertIsNone(connection.transaction_mode)
+
+class SyntheticLibraryTests(TestCase):
+    def test_generation_is_reproducible(self):
+        counts = synthetic.generate_library(150, seed=3, batch_size=40)
+        snapshot = list(Publication.objects.order_by("pk").values_list("title", "bibtex_key"))
+
+        self.assertEqual(Publication.objects.count(), 150)
+        self.assertEqual(Author.objects.count(), counts["authors"])
+        self.assertFalse(Publication.objects.filter(bibtex_key="").exists())
+        self.assertTrue(PublicationAnnotation.objects.exists())
+        self.assertGreater(counts["duplicate_candidates"], 0)
+        tag = Tag.objects.order_by("-cached_publication_count").first()
+        self.assertEqual(tag.publications.count(), tag.cached_publication_count)
+
+        synthetic.clear_library()
+        self.assertFalse(Author.objects.exists())
+        synthetic.generate_library(150, seed=3, batch_size=40)
+        self.assertEqual(
+            list(Publication.objects.order_by("pk").values_list("title", "bibtex_key")), snapshot
+        )
+
+    def test_benchmark_reports_every_operation_and_leaves_data_unchanged(self):
+        synthetic.generate_library(80, seed=1)
+        authors = Author.objects.count()
+        keys = set(Publication.objects.values_list("bibtex_key", flat=True))
+
+        out = StringIO()
+        call_command("benchmark_library", "--repeat", "1", "--json", stdout=out)
+        report = json.loads(out.getvalue())
+
+        [library] = report["libraries"]
+        self.assertEqual(library["publications"], 80)
+        self.assertEqual(
+            set(library["results"]),
+            {
+                "publication_list",
+                "publication_list_sorted",
+                "project_detail",
+                "author_duplicates",
+                "author_merge",
+                "bibtex_keys",
+                "author_order_unchanged",
+                "author_order_rotated",
+                "export_cold",
+                "export_warm",
+            },
+        )
+        self.assertEqual(library["results"]["publication_list"]["runs"], 1)
+        self.assertLess(
+            library["results"]["author_order_unchanged"]["queries"],
+            library["results"]["author_order_rotated"]["queries"],
+        )
+        self.assertEqual(Author.objects.count(), authors)
+        self.assertEqual(set(Publication.objects.values_list("bibtex_key", flat=True)), keys)
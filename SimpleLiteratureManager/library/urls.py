@@ -4,6 +4,11 @@ from . import views
 urlpatterns = [
     path("authors/", views.author_list, name="author_list"),
     path("authors/duplicates/", views.author_duplicates, name="author_duplicates"),
+    path(
+        "authors/duplicates/merge/",
+        views.author_merge_groups,
+        name="author_merge_groups",
+    ),
     path(
         "authors/merge/<int:primary_id>/<int:duplicate_id>/",
         views.author_merge,
@@ -23,6 +28,8 @@ urlpatterns = [
     path("tags/<int:pk>/edit/", views.tag_update, name="tag_update"),
     path("publications/", views.publication_list, name="publication_list"),
     path("publications/add/", views.publication_create, name="publication_create"),
+    path("publications/search/", views.publication_search, name="publication_search"),
+    path("publications/export/", views.publication_export, name="publication_export"),
     path("publications/<int:pk>/", views.publication_detail, name="publication_detail"),
     path(
         "publications/<int:pk>/edit/", views.publication_update, name="publication_update"
@@ -33,10 +40,21 @@ urlpatterns = [
         name="publication_update_from_doi",
     ),
     path("publications/add-doi/", views.publication_add_by_doi, name="publication_add_by_doi"),
+    path(
+        "publications/add-dois/",
+        views.publication_import_dois,
+        name="publication_import_dois",
+    ),
+    path(
+        "publications/import/",
+        views.publication_import_bibliography,
+        name="publication_import_bibliography",
+    ),
     path("projects/", views.project_list, name="project_list"),
     path("projects/add/", views.project_create, name="project_create"),
     path("projects/<int:pk>/", views.project_detail, name="project_detail"),
     path("projects/<int:pk>/edit/", views.project_update, name="project_update"),
+    path("publications/<int:pk>/pdf/", views.publication_pdf, name="publication_pdf"),
     path(
         "publications/<int:pk>/annotations/",
         views.publication_annotations,
@@ -47,4 +65,5 @@ urlpatterns = [
         views.publication_annotation_detail,
         name="publication_annotation_detail",
     ),
+    path("autocomplete/<str:kind>/", views.autocomplete, name="autocomplete"),
 ]
@@ -1,52 +1,68 @@
+import base64
 from collections import defaultdict
-from difflib import SequenceMatcher
-from itertools import combinations
+import io
 import json
-import re
 
 import requests
-from django.db import models, transaction
-from django.db.models import Prefetch
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils.html import strip_tags
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 
+from . import autocomplete as autocomplete_sources
+from .bib_import import guess_format, import_bibliography
+from .doi_import import (
+    create_publication_from_doi,
+    existing_dois,
+    fetch_publication_by_doi,
+    import_dois,
+    normalize_doi,
+)
+from .duplicates import DisjointSet
+from .export import BIBLATEX_VARIANTS, iter_biblatex_entries, selected_publications
 from .forms import (
     AuthorForm,
+    BibliographyImportForm,
+    DoiBatchImportForm,
     DoiImportForm,
     JournalForm,
     ProjectForm,
+    PublicationFilterForm,
     PublicationForm,
     TagForm,
 )
+from .instrumentation import query_budget
+from .merging import choose_merge_target, merge_author_groups, merge_authors
 from .models import (
     Author,
+    AuthorDuplicateCandidate,
     Journal,
     Project,
     Publication,
     PublicationAnnotation,
-    PublicationAuthor,
     Tag,
+    deferred_derived_fields,
+    ordered_authors_prefetch,
 )
+from .pdf_delivery import serve_file
+from .resolution import Resolver
+from .search import search_pdf_pages, search_publications
 
 
-AUTHOR_PREFETCH = Prefetch(
-    "authors",
-    queryset=Author.objects.order_by(
-        "author_publications__position", "author_publications__id"
-    ),
-)
+AUTHOR_PREFETCH = ordered_authors_prefetch()
 
+@query_budget(1)
 def author_list(request):
     authors = Author.objects.all()
     return render(request, "author_list.html", {"authors": authors})
 
 
+@query_budget(3)
 def author_detail(request, pk):
-    author = get_object_or_404(
-        Author.objects.prefetch_related("publications__journal"), pk=pk
-    )
+    author = get_object_or_404(Author, pk=pk)
     publications = author.publications.select_related("journal").prefetch_related(
         AUTHOR_PREFETCH
     )
@@ -57,100 +73,85 @@ def author_detail(request, pk):
     )
 
 
-def author_duplicates(request):
-    authors = list(Author.objects.all())
-
-    def normalize_name(value):
-        return re.sub(r"[^a-z]", "", (value or "").lower())
-
-    def is_abbreviation_match(left, right):
-        left_norm, right_norm = normalize_name(left), normalize_name(right)
-        if not left_norm or not right_norm or left_norm[0] != right_norm[0]:
-            return False
-
-        short, long = (
-            (left_norm, right_norm) if len(left_norm) <= len(right_norm) else (right_norm, left_norm)
-        )
-        return len(short) == 1 or long.startswith(short) or (len(short) <= 3 and long.startswith(short))
-
-    def is_similar_enough(left, right, threshold=0.85):
-        left_norm, right_norm = normalize_name(left), normalize_name(right)
-        if not left_norm or not right_norm:
-            return False
-        if left_norm == right_norm:
-            return True
-        return SequenceMatcher(None, left_norm, right_norm).ratio() >= threshold
-
-    def is_first_name_match(left, right):
-        return is_abbreviation_match(left, right) or is_similar_enough(left, right, threshold=0.8)
-
-    def is_last_name_match(left, right):
-        return is_similar_enough(left, right, threshold=0.85)
-
-    def is_potential_duplicate(first_author, second_author):
-        return is_last_name_match(first_author.last_name, second_author.last_name) and is_first_name_match(
-            first_author.first_name, second_author.first_name
+def _author_duplicate_groups():
+    candidates = list(
+        AuthorDuplicateCandidate.objects.select_related("author", "duplicate")
+    )
+    authors = {}
+    for candidate in candidates:
+        authors[candidate.author_id] = candidate.author
+        authors[candidate.duplicate_id] = candidate.duplicate
+
+    disjoint_set = DisjointSet(authors)
+    for candidate in candidates:
+        disjoint_set.union(candidate.author_id, candidate.duplicate_id)
+
+    def name_key(author):
+        return (author.last_name.lower(), author.first_name.lower())
+
+    pairs_by_root = defaultdict(list)
+    for candidate in candidates:
+        primary, duplicate = sorted((candidate.author, candidate.duplicate), key=name_key)
+        pairs_by_root[disjoint_set.find(candidate.author_id)].append(
+            (primary, duplicate, candidate.score)
         )
 
-    parent = {author.id: author.id for author in authors}
-
-    def find(author_id):
-        while parent[author_id] != author_id:
-            parent[author_id] = parent[parent[author_id]]
-            author_id = parent[author_id]
-        return author_id
-
-    def union(first_id, second_id):
-        root_first, root_second = find(first_id), find(second_id)
-        if root_first != root_second:
-            parent[root_second] = root_first
-
-    for author_a, author_b in combinations(authors, 2):
-        if is_potential_duplicate(author_a, author_b):
-            union(author_a.id, author_b.id)
-
-    grouped_authors = defaultdict(list)
-    for author in authors:
-        grouped_authors[find(author.id)].append(author)
-
     duplicate_groups = []
-    for author_list in grouped_authors.values():
-        if len(author_list) < 2:
-            continue
-
-        sorted_authors = sorted(author_list, key=lambda a: (a.last_name.lower(), a.first_name.lower()))
+    for group in disjoint_set.groups():
+        sorted_authors = sorted((authors[author_id] for author_id in group), key=name_key)
         representative = sorted_authors[0]
         duplicate_groups.append(
             {
                 "key": (representative.first_name, representative.last_name),
                 "authors": sorted_authors,
-                "pairs": list(combinations(sorted_authors, 2)),
+                "target": choose_merge_target(sorted_authors),
+                "pairs": sorted(
+                    pairs_by_root[disjoint_set.find(representative.id)],
+                    key=lambda pair: -pair[2],
+                ),
             }
         )
 
     duplicate_groups.sort(key=lambda entry: (entry["key"][1], entry["key"][0]))
+    return duplicate_groups
 
+
+@query_budget(1)
+def author_duplicates(request):
     return render(
         request,
         "author_duplicates.html",
-        {"duplicate_groups": duplicate_groups},
+        {"duplicate_groups": _author_duplicate_groups()},
     )
 
 
+@require_http_methods(["POST"])
+def author_merge_groups(request):
+    selected = set(request.POST.getlist("groups"))
+    groups = [
+        group["authors"]
+        for group in _author_duplicate_groups()
+        if str(group["target"].pk) in selected
+    ]
+    merge_author_groups(groups)
+    return redirect("author_duplicates")
+
+
+def _with_publication_count(queryset, lookup):
+    if settings.PUBLICATION_COUNT_COLUMNS:
+        return queryset.annotate(publication_count=models.F("cached_publication_count"))
+    return queryset.annotate(publication_count=models.Count(lookup))
+
+
+@query_budget(1)
 def journal_list(request):
-    journals = Journal.objects.all()
+    journals = _with_publication_count(Journal.objects.all(), "publication")
     return render(request, "journal_list.html", {"journals": journals})
 
 
+@query_budget(4)
 def journal_detail(request, pk):
-    journal = get_object_or_404(
-        Journal.objects.prefetch_related(
-            "publication_set__authors",
-            "publication_set__journal",
-            "publication_set__tags",
-        ),
-        pk=pk,
-    )
+    journal = get_object_or_404(Journal, pk=pk)
     publications = journal.publication_set.select_related("journal").prefetch_related(
         AUTHOR_PREFETCH,
         "tags",
@@ -160,20 +161,15 @@ def journal_detail(request, pk):
     )
 
 
+@query_budget(1)
 def tag_list(request):
-    tags = Tag.objects.annotate(publication_count=models.Count("publications"))
+    tags = _with_publication_count(Tag.objects.all(), "publications")
     return render(request, "tag_list.html", {"tags": tags})
 
 
+@query_budget(4)
 def tag_detail(request, pk):
-    tag = get_object_or_404(
-        Tag.objects.prefetch_related(
-            "publications__authors",
-            "publications__journal",
-            "publications__tags",
-        ),
-        pk=pk,
-    )
+    tag = get_object_or_404(Tag, pk=pk)
     publications = tag.publications.select_related("journal").prefetch_related(
         AUTHOR_PREFETCH, "tags"
     )
@@ -191,6 +187,7 @@ def tag_create(request):
     return render(request, "tag_form.html", {"form": form, "is_edit": False})
 
 
+@query_budget(1)
 def tag_update(request, pk):
     tag = get_object_or_404(Tag, pk=pk)
     if request.method == "POST":
@@ -218,6 +215,7 @@ def journal_create(request):
     return render(request, "journal_form.html", {"form": form, "is_edit": False})
 
 
+@query_budget(1)
 def journal_update(request, pk):
     journal = get_object_or_404(Journal, pk=pk)
     if request.method == "POST":
@@ -232,14 +230,223 @@ def journal_update(request, pk):
         request, "journal_form.html", {"form": form, "is_edit": True, "journal": journal}
     )
 
+PUBLICATION_LIST_PAGE_SIZE = 50
+PUBLICATION_LIST_MAX_PAGE_SIZE = 200
+
+CURSOR_FIELD_TYPES = {"year": int, "title": str, "id": int}
+
+
+def _encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor, ordering):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(ordering):
+        return None
+    for field, value in zip(ordering, values):
+        expected = CURSOR_FIELD_TYPES[field.lstrip("-")]
+        if isinstance(value, bool) or not isinstance(value, expected):
+            return None
+    return values
+
+
+def _keyset_filter(ordering, values):
+    # (a, b, c) > (x, y, z) expands to a > x OR (a = x AND b > y) OR ..., with the
+    # comparison flipped for descending fields.
+    condition = models.Q()
+    equal = models.Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal & models.Q(**{f"{name}__{lookup}": value})
+        equal &= models.Q(**{name: value})
+    return condition
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get("page_size", PUBLICATION_LIST_PAGE_SIZE))
+    except ValueError:
+        size = PUBLICATION_LIST_PAGE_SIZE
+    return max(1, min(size, PUBLICATION_LIST_MAX_PAGE_SIZE))
+
+
+def _query_url(request, **changes):
+    params = request.GET.copy()
+    for key, value in changes.items():
+        if value is None:
+            params.pop(key, None)
+        else:
+            params[key] = value
+    query = params.urlencode()
+    return f"?{query}" if query else request.path
+
+
+def _serialize_publication_row(publication):
+    return {
+        "id": publication.id,
+        "url": reverse("publication_detail", args=[publication.id]),
+        "title": publication.title,
+        "year": publication.year,
+        "publication_type": publication.publication_type,
+        "publication_type_label": publication.get_publication_type_display(),
+        "journal": publication.journal.name if publication.journal else None,
+        "has_pdf": bool(publication.pdf),
+        "authors": [
+            {
+                "id": author.id,
+                "name": str(author),
+                "url": reverse("author_detail", args=[author.id]),
+            }
+            for author in publication.ordered_authors
+        ],
+        "tags": [tag.name for tag in publication.tags.all()],
+        "projects": [
+            {
+                "id": project.id,
+                "title": project.title,
+                "url": reverse("project_detail", args=[project.id]),
+            }
+            for project in publication.projects.all()
+        ],
+    }
+
+
+# Each selected journal, tag or project costs one query to validate and one
+# to render its option.
+@query_budget(10)
 def publication_list(request):
-    publications = (
-        Publication.objects.select_related("journal")
-        .prefetch_related(AUTHOR_PREFETCH, "tags", "projects")
+    filter_form = PublicationFilterForm(request.GET or None)
+    publications = Publication.objects.all()
+    sort = PublicationFilterForm.DEFAULT_SORT
+    if filter_form.is_bound and filter_form.is_valid():
+        publications = filter_form.filter_queryset(publications)
+        sort = filter_form.cleaned_data.get("sort") or sort
+
+    ordering = PublicationFilterForm.SORT_ORDERINGS[sort]
+    cursor_values = _decode_cursor(request.GET.get("cursor", ""), ordering)
+    if cursor_values is not None:
+        publications = publications.filter(_keyset_filter(ordering, cursor_values))
+
+    page_size = _page_size(request)
+    page = list(
+        publications.order_by(*ordering)
+        .select_related("journal")
+        .prefetch_related(AUTHOR_PREFETCH, "tags", "projects")[: page_size + 1]
+    )
+    has_next = len(page) > page_size
+    page = page[:page_size]
+
+    next_cursor = None
+    if has_next:
+        last = page[-1]
+        next_cursor = _encode_cursor(
+            getattr(last, field.lstrip("-")) for field in ordering
+        )
+
+    if request.GET.get("format") == "json":
+        return JsonResponse(
+            {
+                "results": [_serialize_publication_row(p) for p in page],
+                "next_cursor": next_cursor,
+                "next_url": (
+                    _query_url(request, cursor=next_cursor) if next_cursor else None
+                ),
+            }
+        )
+
+    sort_urls = {
+        field: _query_url(
+            request,
+            sort=field if sort != field else f"-{field}",
+            cursor=None,
+        )
+        for field in ("year", "title")
+    }
+    return render(
+        request,
+        "publication_list.html",
+        {
+            "publications": page,
+            "filter_form": filter_form,
+            "sort": sort,
+            "sort_urls": sort_urls,
+            "is_first_page": cursor_values is None,
+            "first_page_url": _query_url(request, cursor=None),
+            "next_url": _query_url(request, cursor=next_cursor) if next_cursor else None,
+            "next_json_url": (
+                _query_url(request, cursor=next_cursor, format="json")
+                if next_cursor
+                else None
+            ),
+            "export_url": reverse("publication_export")
+            + _query_url(request, cursor=None, format=None, page_size=None, download="1"),
+        },
+    )
+
+
+@query_budget(6)
+def publication_search(request):
+    query = request.GET.get("q", "").strip()
+    results = search_publications(query)
+    page_results = search_pdf_pages(query)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse(
+            {
+                "query": query,
+                "results": [
+                    {
+                        **_serialize_publication_row(result["publication"]),
+                        "snippet": str(result["snippet"]),
+                        "rank": result["rank"],
+                    }
+                    for result in results
+                ],
+                "pages": [
+                    {
+                        "publication_id": result["publication"].id,
+                        "page_number": result["page_number"],
+                        "snippet": str(result["snippet"]),
+                        "rank": result["rank"],
+                    }
+                    for result in page_results
+                ],
+            }
+        )
+
+    return render(
+        request,
+        "publication_search.html",
+        {"query": query, "results": results, "page_results": page_results},
+    )
+
+
+def publication_export(request):
+    variant = request.GET.get("variant", "full")
+    if variant not in BIBLATEX_VARIANTS:
+        return JsonResponse({"error": f"Unbekannte Variante '{variant}'."}, status=400)
+    try:
+        publications = selected_publications(request.GET)
+    except ValidationError as error:
+        return JsonResponse({"errors": error.message_dict}, status=400)
+
+    response = StreamingHttpResponse(
+        iter_biblatex_entries(publications, variant),
+        content_type="application/x-bibtex; charset=utf-8",
     )
-    return render(request, "publication_list.html", {"publications": publications})
+    if request.GET.get("download"):
+        response["Content-Disposition"] = 'attachment; filename="literatur.bib"'
+    return response
 
 
+@query_budget(4)
 def publication_create(request):
     if request.method == "POST":
         form = PublicationForm(request.POST, request.FILES)
@@ -251,6 +458,7 @@ def publication_create(request):
     return render(request, "publication_form.html", {"form": form, "is_edit": False})
 
 
+@query_budget(4)
 def publication_detail(request, pk):
     publication = get_object_or_404(
         Publication.objects.select_related("journal").prefetch_related(
@@ -276,6 +484,18 @@ def _serialize_annotation(annotation):
     }
 
 
+@query_budget(2)
+@require_http_methods(["GET", "HEAD"])
+def publication_pdf(request, pk):
+    publication = get_object_or_404(
+        Publication.objects.only("pk", "pdf", "title", "year"), pk=pk
+    )
+    if not publication.pdf:
+        raise Http404("Zu dieser Publikation ist keine PDF-Datei hinterlegt.")
+    return serve_file(request, publication.pdf, publication.pdf_filename)
+
+
+@query_budget(2)
 @require_http_methods(["GET", "POST"])
 def publication_annotations(request, pk):
     publication = get_object_or_404(Publication, pk=pk)
@@ -335,6 +555,7 @@ def publication_annotation_detail(request, pk, annotation_id):
     return JsonResponse(_serialize_annotation(annotation))
 
 
+@query_budget(9)
 def publication_update(request, pk):
     publication = get_object_or_404(Publication, pk=pk)
     if request.method == "POST":
@@ -368,7 +589,7 @@ def publication_update_from_doi(request, pk):
         )
 
     try:
-        doi_data = _fetch_publication_by_doi(doi_value)
+        doi_data = fetch_publication_by_doi(doi_value)
     except (requests.RequestException, ValueError) as exc:
         return render(
             request,
@@ -414,32 +635,20 @@ def publication_update_from_doi(request, pk):
             else publication.publication_type
         )
 
+        resolver = Resolver()
         if request.POST.get("journal_source") == "doi":
-            journal = None
-            if doi_data.get("journal_title"):
-                journal, _ = Journal.objects.get_or_create(
-                    name=doi_data["journal_title"],
-                    defaults={"issn": doi_data.get("issn") or "", "publisher": ""},
-                )
-            publication.journal = journal
+            publication.journal = resolver.journal(
+                doi_data.get("journal_title") or "", doi_data.get("issn")
+            )
 
+        author_instances = None
         if request.POST.get("authors_source") == "doi":
-            author_instances = []
-            for author in doi_data.get("authors", []):
-                instance, _ = Author.objects.get_or_create(
-                    first_name=author.get("first_name", ""),
-                    last_name=author.get("last_name", ""),
-                    defaults={
-                        "orcid": author.get("orcid"),
-                        "university": "",
-                        "department": "",
-                    },
-                )
-                author_instances.append(instance)
-            publication.set_authors_in_order(author_instances)
-
-        publication.generate_bibtex_key(force=True)
-        publication.save()
+            author_instances = resolver.authors(doi_data.get("authors", []))
+
+        with deferred_derived_fields():
+            publication.save()
+            if author_instances is not None:
+                publication.set_authors_in_order(author_instances)
         return redirect("publication_detail", pk=publication.pk)
 
     return render(
@@ -449,39 +658,24 @@ def publication_update_from_doi(request, pk):
     )
 
 
+@query_budget(1)
 def project_list(request):
-    projects = Project.objects.prefetch_related(
-        "publications__authors", "publications__journal"
-    )
+    projects = _with_publication_count(Project.objects.all(), "publications")
     return render(request, "project_list.html", {"projects": projects})
 
 
+@query_budget(4)
 def project_detail(request, pk):
-    project = get_object_or_404(
-        Project.objects.prefetch_related(
-            "publications__authors",
-            "publications__journal",
-            "publications__tags",
-        ),
-        pk=pk,
-    )
+    project = get_object_or_404(Project, pk=pk)
     project_publications = list(
         project.publications.select_related("journal").prefetch_related(
             AUTHOR_PREFETCH, "tags"
         )
     )
+    # Only the default variant is embedded; the page loads the others from
+    # publication_export when they are toggled.
     biblatex_entries = "\n\n".join(
-        publication.biblatex_entry for publication in project_publications
-    )
-    biblatex_entries_short = "\n\n".join(
-        publication.biblatex_entry_short for publication in project_publications
-    )
-    biblatex_entries_short_journal = "\n\n".join(
-        publication.biblatex_entry_short_journal
-        for publication in project_publications
-    )
-    biblatex_entries_short_all = "\n\n".join(
-        publication.biblatex_entry_short_all for publication in project_publications
+        Publication.objects.biblatex_entries_for(project_publications)
     )
     return render(
         request,
@@ -490,13 +684,11 @@ def project_detail(request, pk):
             "project": project,
             "publications": project_publications,
             "biblatex_entries": biblatex_entries,
-            "biblatex_entries_short": biblatex_entries_short,
-            "biblatex_entries_short_journal": biblatex_entries_short_journal,
-            "biblatex_entries_short_all": biblatex_entries_short_all,
         },
     )
 
 
+@query_budget(1)
 def project_create(request):
     if request.method == "POST":
         form = ProjectForm(request.POST)
@@ -508,6 +700,7 @@ def project_create(request):
     return render(request, "project_form.html", {"form": form, "is_edit": False})
 
 
+@query_budget(3)
 def project_update(request, pk):
     project = get_object_or_404(Project, pk=pk)
     if request.method == "POST":
@@ -524,126 +717,18 @@ def project_update(request, pk):
     )
 
 
-def _extract_year(message):
-    for key in ("published-print", "published-online", "issued"):
-        info = message.get(key)
-        if info and "date-parts" in info and info["date-parts"]:
-            return info["date-parts"][0][0]
-    raise ValueError("Kein Veröffentlichungsjahr in den DOI-Daten gefunden.")
-
-
-def _parse_authors(message):
-    authors = []
-    for entry in message.get("author", []):
-        first = entry.get("given", "").strip()
-        last = entry.get("family", "").strip()
-        if not (first or last):
-            continue
-        orcid = entry.get("ORCID") or ""
-        authors.append(
-            {
-                "first_name": first,
-                "last_name": last,
-                "orcid": orcid.replace("https://orcid.org/", "") if orcid else None,
-            }
-        )
-    return authors
-
-
-def _map_crossref_type(raw_type):
-    mapping = {
-        "journal-article": Publication.PublicationType.ARTICLE,
-        "article": Publication.PublicationType.ARTICLE,
-        "proceedings-article": Publication.PublicationType.PROCEEDINGS,
-        "proceedings": Publication.PublicationType.PROCEEDINGS,
-        "book": Publication.PublicationType.BOOK,
-        "monograph": Publication.PublicationType.BOOK,
-    }
-    return mapping.get(raw_type, Publication.PublicationType.ARTICLE)
-
-
-def _fetch_publication_by_doi(doi):
-    response = requests.get(f"https://api.crossref.org/works/{doi}", timeout=10)
-    response.raise_for_status()
-    message = response.json().get("message", {})
-
-    title_list = message.get("title", [])
-    if not title_list:
-        raise ValueError("Kein Titel in den DOI-Daten gefunden.")
-
-    title = title_list[0]
-    year = _extract_year(message)
-    abstract = strip_tags(message.get("abstract", "")).strip()
-    journal_title = (message.get("container-title") or [None])[0]
-    issn = (message.get("ISSN") or [None])[0]
-    authors = _parse_authors(message)
-    publication_type = _map_crossref_type(message.get("type"))
-
-    return {
-        "title": title,
-        "year": year,
-        "abstract": abstract,
-        "journal_title": journal_title,
-        "issn": issn,
-        "authors": authors,
-        "volume": message.get("volume", ""),
-        "pages": message.get("page", ""),
-        "publication_type": publication_type,
-    }
-
-
 def publication_add_by_doi(request):
     error = None
     if request.method == "POST":
         form = DoiImportForm(request.POST)
         if form.is_valid():
-            doi = form.cleaned_data["doi"].strip()
+            doi = normalize_doi(form.cleaned_data["doi"])
+            existing = existing_dois([doi]).get(doi.lower())
+            if existing is not None:
+                return redirect("publication_detail", pk=existing)
             try:
-                publication_data = _fetch_publication_by_doi(doi)
-
-                with transaction.atomic():
-                    journal = None
-                    if publication_data["journal_title"]:
-                        journal, _ = Journal.objects.get_or_create(
-                            name=publication_data["journal_title"],
-                            defaults={
-                                "issn": publication_data.get("issn") or "",
-                                "publisher": "",
-                            },
-                        )
-
-                    publication = Publication.objects.create(
-                        title=publication_data["title"],
-                        year=publication_data["year"],
-                        doi=doi,
-                        journal=journal,
-                        abstract=publication_data["abstract"],
-                        volume=publication_data.get("volume") or "",
-                        pages=publication_data.get("pages") or "",
-                        publication_type=publication_data.get(
-                            "publication_type", Publication.PublicationType.ARTICLE
-                        ),
-                    )
-
-                    author_instances = []
-                    for author in publication_data["authors"]:
-                        instance, _ = Author.objects.get_or_create(
-                            first_name=author["first_name"],
-                            last_name=author["last_name"],
-                            defaults={
-                                "orcid": author.get("orcid"),
-                                "university": "",
-                                "department": "",
-                            },
-                        )
-                        author_instances.append(instance)
-
-                    if author_instances:
-                        publication.set_authors_in_order(author_instances)
-
-                    publication.generate_bibtex_key(force=True)
-                    publication.save(update_fields=["bibtex_key"])
-
+                publication_data = fetch_publication_by_doi(doi)
+                create_publication_from_doi(doi, publication_data)
                 return redirect("publication_list")
             except (requests.RequestException, ValueError) as exc:
                 error = str(exc)
@@ -652,6 +737,49 @@ def publication_add_by_doi(request):
 
     return render(request, "publication_import_doi.html", {"form": form, "error": error})
 
+
+@require_http_methods(["GET", "POST"])
+def publication_import_dois(request):
+    if request.content_type == "application/json":
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Ungültiger JSON-Body."}, status=400)
+        dois = payload.get("dois") if isinstance(payload, dict) else None
+        if not isinstance(dois, list) or not all(isinstance(doi, str) for doi in dois):
+            return JsonResponse({"error": "Feld 'dois' muss eine Liste sein."}, status=400)
+        return JsonResponse({"results": import_dois(dois)})
+
+    results = None
+    if request.method == "POST":
+        form = DoiBatchImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            results = import_dois(form.cleaned_data["dois"])
+    else:
+        form = DoiBatchImportForm()
+
+    return render(
+        request, "publication_import_dois.html", {"form": form, "results": results}
+    )
+
+
+def publication_import_bibliography(request):
+    summary = None
+    if request.method == "POST":
+        form = BibliographyImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data["file"]
+            file_format = form.cleaned_data["file_format"] or guess_format(upload.name)
+            lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", errors="replace")
+            summary = import_bibliography(lines, file_format)
+    else:
+        form = BibliographyImportForm()
+
+    return render(
+        request, "publication_import_bibliography.html", {"form": form, "summary": summary}
+    )
+
+
 def author_create(request):
     if request.method == "POST":
         form = AuthorForm(request.POST)
@@ -663,6 +791,7 @@ def author_create(request):
     return render(request, "author_form.html", {"form": form, "is_edit": False})
 
 
+@query_budget(1)
 def author_update(request, pk):
     author = get_object_or_404(Author, pk=pk)
     if request.method == "POST":
@@ -715,49 +844,7 @@ def author_merge(request, primary_id, duplicate_id):
         target.orcid = resolve_value("orcid")
         target.university = resolve_value("university")
         target.department = resolve_value("department")
-        target.save()
-
-        publications = other.publications.all()
-        if publications.exists():
-            touched_publications = set()
-            with transaction.atomic():
-                for publication in publications:
-                    duplicate_link = PublicationAuthor.objects.filter(
-                        publication=publication, author=other
-                    ).first()
-
-                    if duplicate_link is None:
-                        continue
-
-                    touched_publications.add(publication)
-
-                    existing_link = PublicationAuthor.objects.filter(
-                        publication=publication, author=target
-                    ).first()
-
-                    # If the target author is not linked yet, reuse the duplicate link
-                    # by switching its author. This avoids violating the unique
-                    # (publication, position) constraint while preserving ordering.
-                    if existing_link is None:
-                        duplicate_link.author = target
-                        duplicate_link.save(update_fields=["author"])
-                        continue
-
-                    # When both authors are linked, keep the earlier of the two positions
-                    # without introducing duplicate positions.
-                    if duplicate_link.position < existing_link.position:
-                        target_position = duplicate_link.position
-                        duplicate_link.delete()
-                        existing_link.position = target_position
-                        existing_link.save(update_fields=["position"])
-                    else:
-                        duplicate_link.delete()
-
-                for publication in touched_publications:
-                    publication.generate_bibtex_key(force=True)
-                    publication.save(update_fields=["bibtex_key"])
-
-        other.delete()
+        merge_authors(target, [other])
 
         return redirect("author_detail", pk=target.pk)
 
@@ -803,3 +890,13 @@ def author_merge(request, primary_id, duplicate_id):
             "merge_fields": merge_fields,
         },
     )
+
+
+@query_budget(4)
+def autocomplete(request, kind):
+    source = autocomplete_sources.SOURCES.get(kind)
+    if source is None:
+        return JsonResponse({"error": f"Unbekannte Auswahlliste '{kind}'."}, status=404)
+    limit = autocomplete_sources.parse_limit(request.GET.get("limit"))
+    query = request.GET.get("q", "").strip()
+    return JsonResponse({"results": source(query, limit)})